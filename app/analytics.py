@@ -0,0 +1,256 @@
+"""
+기간별 재활용 및 탄소 절감 집계
+
+분석 결과가 저장될 때마다 (일/주, 카테고리, 재질) 단위의 집계 문서를 $inc로 갱신하고,
+기간 조회는 분석 원본 대신 집계 문서만 읽습니다.
+재질 "_all" 문서는 해당 구간의 전체 분석 건수와 탄소 합계를 담습니다.
+
+집계 재계산:
+    python -m app.analytics --rebuild
+"""
+
+import argparse
+import time
+from datetime import date, datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+from . import database
+
+# 집계 단위
+GRANULARITIES = ("day", "week")
+
+# 전체 합계 행의 재질 키
+ALL_MATERIALS = "_all"
+
+# 집계 문서를 구분하는 필드
+ROLLUP_KEY_FIELDS = ("granularity", "bucket", "category", "material")
+
+def bucket_start(value: datetime, granularity: str):
+    """
+    시각이 속한 집계 구간의 시작 시각을 계산합니다.
+
+    Args:
+        value: 시각 또는 날짜
+        granularity: 집계 단위 (day, week)
+
+    Returns:
+        구간 시작 시각 (주 단위는 월요일 0시)
+    """
+    day = datetime(value.year, value.month, value.day)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+def _rollup_increments(recycling_analysis: dict):
+    """
+    분석 결과 한 건이 재질별 집계 행에 더하는 값을 계산합니다.
+
+    Returns:
+        {재질 키: {필드: 증가량}} 딕셔너리
+    """
+    carbon_impact = recycling_analysis.get("carbon_impact") or {}
+
+    rows = {
+        ALL_MATERIALS: {
+            "count": 1,
+            "carbon_impact": carbon_impact.get("total_carbon_impact", 0),
+            "carbon_saving": carbon_impact.get("total_carbon_saving", 0)
+        }
+    }
+    for material_key in recycling_analysis.get("detected_materials") or {}:
+        rows[material_key] = {"count": 1, "carbon_impact": 0, "carbon_saving": 0}
+    for detail in carbon_impact.get("carbon_details", []):
+        row = rows.setdefault(detail["material"], {"count": 1, "carbon_impact": 0, "carbon_saving": 0})
+        row["carbon_impact"] += detail.get("weighted_impact", 0)
+        row["carbon_saving"] += detail.get("carbon_saving", 0)
+
+    return rows
+
+def _rollup_keys(category: str, analyzed_at: datetime, material: str):
+    """
+    분석 결과가 반영되는 집계 문서의 키 목록을 생성합니다.
+    """
+    return [
+        {
+            "granularity": granularity,
+            "bucket": bucket_start(analyzed_at, granularity),
+            "category": category,
+            "material": material
+        }
+        for granularity in GRANULARITIES
+    ]
+
+async def record_analysis(category: str, recycling_analysis: dict, analyzed_at: datetime):
+    """
+    분석 결과를 일/주 단위 집계에 반영합니다.
+
+    Args:
+        category: 이미지 카테고리 (없으면 None으로 집계)
+        recycling_analysis: 재활용 분석 결과
+        analyzed_at: 분석 시각
+    """
+    requests = [
+        UpdateOne(key, {"$inc": increments}, upsert=True)
+        for material, increments in _rollup_increments(recycling_analysis).items()
+        for key in _rollup_keys(category, analyzed_at, material)
+    ]
+    await database.analytics_rollups_collection.bulk_write(requests, ordered=False)
+
+async def get_carbon_report(start: date, end: date, granularity: str = "day", category: str = None):
+    """
+    기간별 재활용 및 탄소 절감 추이를 집계 문서에서 조회합니다.
+
+    Args:
+        start: 시작 날짜 (포함)
+        end: 종료 날짜 (포함)
+        granularity: 집계 단위 (day, week)
+        category: 특정 카테고리만 조회할 경우 카테고리 (없으면 전체)
+
+    Returns:
+        구간별 추이와 기간 합계
+    """
+    match = {
+        "granularity": granularity,
+        "bucket": {"$gte": bucket_start(start, granularity), "$lte": bucket_start(end, granularity)}
+    }
+    if category is not None:
+        match["category"] = category
+
+    # 카테고리 간 합산은 DB에서 처리하고 (구간, 재질) 단위 결과만 가져옵니다
+    pipeline = [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {"bucket": "$bucket", "material": "$material"},
+                "count": {"$sum": "$count"},
+                "carbon_impact": {"$sum": "$carbon_impact"},
+                "carbon_saving": {"$sum": "$carbon_saving"}
+            }
+        },
+        {"$sort": {"_id.bucket": 1}}
+    ]
+    cursor = database.analytics_rollups_collection.aggregate(pipeline)
+
+    series = {}
+    totals = {"analysis_count": 0, "carbon_impact": 0, "carbon_saving": 0, "materials": {}}
+    async for row in cursor:
+        bucket = row["_id"]["bucket"]
+        material = row["_id"]["material"]
+        point = series.setdefault(bucket, {
+            "bucket": bucket.date().isoformat(),
+            "analysis_count": 0,
+            "carbon_impact": 0,
+            "carbon_saving": 0,
+            "materials": {}
+        })
+        values = {"count": row["count"], "carbon_impact": row["carbon_impact"], "carbon_saving": row["carbon_saving"]}
+
+        if material == ALL_MATERIALS:
+            point["analysis_count"] = row["count"]
+            point["carbon_impact"] = row["carbon_impact"]
+            point["carbon_saving"] = row["carbon_saving"]
+            totals["analysis_count"] += row["count"]
+            totals["carbon_impact"] += row["carbon_impact"]
+            totals["carbon_saving"] += row["carbon_saving"]
+        else:
+            point["materials"][material] = values
+            total_values = totals["materials"].setdefault(material, {"count": 0, "carbon_impact": 0, "carbon_saving": 0})
+            for field, value in values.items():
+                total_values[field] += value
+
+    return {
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "category": category,
+        "series": [series[bucket] for bucket in sorted(series)],
+        "totals": totals
+    }
+
+def rebuild_rollups(batch_size: int = 1000):
+    """
+    analyses 컬렉션에서 기간별 집계를 다시 계산합니다.
+    기존 데이터를 집계에 처음 반영하거나 분류 규칙이 바뀐 경우에 사용합니다.
+    집계 문서를 비우지 않고 덮어쓴 뒤 더 이상 해당하는 분석이 없는 집계만 삭제하므로 재계산 중에도 조회할 수 있지만,
+    재계산 중에 저장된 분석 결과는 누락될 수 있으므로 트래픽이 적을 때 실행합니다.
+
+    Args:
+        batch_size: 한 번에 기록할 집계 문서 수
+
+    Returns:
+        기록한 집계 문서 수
+    """
+    started = time.perf_counter()
+    # 재계산 시작 후 실시간 갱신으로 새로 생긴 집계 문서는 삭제 대상에서 제외
+    started_id = ObjectId.from_datetime(datetime.now(timezone.utc))
+
+    pipeline = [
+        # category가 없는 이전 분석 문서는 이미지 문서에서 카테고리를 가져옵니다
+        {
+            "$lookup": {
+                "from": database.images_collection.name,
+                "localField": "image_id",
+                "foreignField": "image_id",
+                "as": "image"
+            }
+        },
+        {"$set": {"category": {"$ifNull": ["$category", {"$arrayElemAt": ["$image.category", 0]}]}}},
+        {
+            "$project": {
+                "_id": 0,
+                "category": 1,
+                "created_at": 1,
+                "analysis_result.detected_materials": 1,
+                "analysis_result.carbon_impact": 1
+            }
+        }
+    ]
+
+    rollups = {}
+    analysis_total = 0
+    for analysis_doc in database.sync_db[database.analyses_collection.name].aggregate(pipeline, allowDiskUse=True):
+        if not analysis_doc.get("created_at"):
+            continue
+        increments = _rollup_increments(analysis_doc.get("analysis_result") or {})
+        for material, values in increments.items():
+            for key in _rollup_keys(analysis_doc.get("category"), analysis_doc["created_at"], material):
+                rollup_key = tuple(key[field] for field in ROLLUP_KEY_FIELDS)
+                rollup = rollups.setdefault(rollup_key, {**key, "count": 0, "carbon_impact": 0, "carbon_saving": 0})
+                for field, value in values.items():
+                    rollup[field] += value
+        analysis_total += 1
+
+    collection = database.sync_db[database.analytics_rollups_collection.name]
+    requests = [
+        ReplaceOne(dict(zip(ROLLUP_KEY_FIELDS, rollup_key)), rollup, upsert=True)
+        for rollup_key, rollup in rollups.items()
+    ]
+    for start in range(0, len(requests), batch_size):
+        collection.bulk_write(requests[start:start + batch_size], ordered=False)
+
+    # 분석 결과가 더 이상 없는 집계 문서 삭제
+    stale_ids = [
+        rollup_doc["_id"]
+        for rollup_doc in collection.find({"_id": {"$lt": started_id}}, {field: 1 for field in ROLLUP_KEY_FIELDS})
+        if tuple(rollup_doc.get(field) for field in ROLLUP_KEY_FIELDS) not in rollups
+    ]
+    for start in range(0, len(stale_ids), batch_size):
+        collection.delete_many({"_id": {"$in": stale_ids[start:start + batch_size]}})
+
+    elapsed = time.perf_counter() - started
+    print(f"기간별 집계 재계산 완료: 분석 {analysis_total}건, 집계 문서 {len(rollups)}개, {elapsed:.1f}초")
+
+    return len(rollups)
+
+def main():
+    parser = argparse.ArgumentParser(description="기간별 집계 관리")
+    parser.add_argument("--rebuild", action="store_true", help="analyses 컬렉션에서 집계 재계산")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_rollups()
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
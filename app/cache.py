@@ -0,0 +1,242 @@
+"""
+이미지 및 분석 결과 문서 캐시
+
+프로세스 내 TTL/LRU 캐시를 기본으로 사용하고, REDIS_URL이 설정되면
+Redis를 공유 캐시 계층으로 함께 사용합니다. 공유 계층에서는 쓰기 시
+무효화 메시지를 발행하여 다른 워커의 로컬 캐시(없음 캐시 포함)를 비웁니다.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+import bson
+from dotenv import load_dotenv
+from . import metrics
+
+# 환경 변수 로드
+load_dotenv()
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_NEGATIVE_TTL = float(os.getenv("CACHE_NEGATIVE_TTL", "10"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# 공유 계층 무효화 채널
+INVALIDATION_CHANNEL = "cache-invalidate"
+# 무효화 채널 구독이 끊긴 경우 다시 구독하기 전 대기 시간 (초, 실패할 때마다 두 배로 늘림)
+RESUBSCRIBE_MIN_DELAY = 1
+RESUBSCRIBE_MAX_DELAY = 30
+
+class TTLCache:
+    """
+    크기 제한이 있는 프로세스 내 TTL 캐시
+    가장 오래 사용되지 않은 항목부터 제거합니다.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        캐시 항목을 조회합니다.
+
+        Returns:
+            (적중 여부, 값) 튜플 (값이 None이면 없는 것으로 캐시된 항목)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key, value, ttl: float = None):
+        """
+        캐시 항목을 저장합니다. 값이 None이면 없음 캐시 TTL을 적용합니다.
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        캐시 항목을 삭제합니다.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        모든 캐시 항목을 삭제합니다.
+        """
+        self._entries.clear()
+
+class DocumentCache:
+    """
+    image_id로 조회하는 문서 캐시 (로컬 캐시 + 선택적 공유 계층)
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.local = TTLCache(CACHE_MAX_ENTRIES, CACHE_TTL, CACHE_NEGATIVE_TTL)
+
+    def _shared_key(self, key: str):
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str):
+        """
+        캐시에서 문서를 조회합니다. 로컬 캐시에 없으면 공유 계층을 확인합니다.
+
+        Returns:
+            (적중 여부, 문서) 튜플 (문서가 None이면 없는 것으로 캐시된 항목)
+        """
+        hit, value = self.local.get(key)
+        if hit or _redis is None:
+            metrics.record_cache_lookup(self.namespace, "local_hit" if hit else "miss")
+            return hit, value
+
+        try:
+            data = await _redis.get(self._shared_key(key))
+        except Exception as e:
+            print(f"공유 캐시 조회 실패: {e}")
+            data = None
+        if data is None:
+            metrics.record_cache_lookup(self.namespace, "miss")
+            return False, None
+
+        metrics.record_cache_lookup(self.namespace, "shared_hit")
+        value = bson.decode(data)
+        self.local.set(key, value)
+        return True, value
+
+    async def set(self, key: str, value: dict):
+        """
+        문서를 캐시에 저장하고, 공유 계층이 있으면 다른 워커에 알립니다.
+        """
+        self.local.set(key, value)
+        if _redis is not None:
+            try:
+                await _redis.set(self._shared_key(key), bson.encode(value), ex=int(CACHE_TTL))
+                await _redis.publish(INVALIDATION_CHANNEL, f"{_worker_id} {self._shared_key(key)}")
+            except Exception as e:
+                print(f"공유 캐시 저장 실패: {e}")
+
+    def set_missing(self, key: str):
+        """
+        문서가 없다는 사실을 로컬 캐시에 짧게 저장합니다.
+        """
+        self.local.set(key, None)
+
+    async def invalidate(self, key: str):
+        """
+        캐시 항목을 삭제하고, 공유 계층이 있으면 다른 워커에도 삭제를 알립니다.
+        """
+        self.local.invalidate(key)
+        if _redis is not None:
+            try:
+                await _redis.delete(self._shared_key(key))
+                await _redis.publish(INVALIDATION_CHANNEL, f"{_worker_id} {self._shared_key(key)}")
+            except Exception as e:
+                print(f"공유 캐시 무효화 실패: {e}")
+
+# 이미지 문서 캐시와 분석 결과 문서 캐시
+image_cache = DocumentCache("image")
+analysis_cache = DocumentCache("analysis")
+_caches = {cache.namespace: cache for cache in (image_cache, analysis_cache)}
+
+# 공유 계층 상태
+_redis = None
+_listener_task = None
+_worker_id = uuid.uuid4().hex
+
+async def start_shared_tier():
+    """
+    REDIS_URL이 설정된 경우 공유 캐시 계층에 연결하고 무효화 메시지 수신을 시작합니다.
+    """
+    global _redis, _listener_task
+    if not REDIS_URL or _redis is not None:
+        return
+
+    try:
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        print("redis 패키지가 설치되지 않아 공유 캐시 계층을 사용하지 않습니다")
+        return
+
+    _redis = redis_asyncio.from_url(REDIS_URL)
+    _listener_task = asyncio.create_task(_listen_invalidations())
+    print("공유 캐시 계층 연결 완료")
+
+async def stop_shared_tier():
+    """
+    공유 캐시 계층 연결을 종료합니다.
+    """
+    global _redis, _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        _listener_task = None
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+
+def _clear_local_caches():
+    for cache in _caches.values():
+        cache.local.clear()
+
+async def _listen_invalidations():
+    """
+    다른 워커가 발행한 무효화 메시지를 받아 로컬 캐시 항목을 삭제합니다.
+    구독이 끊기면 그동안 받지 못한 무효화가 있을 수 있으므로 로컬 캐시를 비우고 다시 구독합니다.
+    """
+    delay = RESUBSCRIBE_MIN_DELAY
+    subscribed_before = False
+    while True:
+        pubsub = _redis.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            if subscribed_before:
+                # 다시 구독하기 전까지 받지 못한 무효화 메시지 대신 로컬 캐시를 비움
+                _clear_local_caches()
+                print("캐시 무효화 채널을 다시 구독했습니다")
+            subscribed_before = True
+            delay = RESUBSCRIBE_MIN_DELAY
+
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode()
+                sender, _, shared_key = data.partition(" ")
+                if sender == _worker_id:
+                    continue
+                namespace, _, key = shared_key.partition(":")
+                if namespace in _caches:
+                    _caches[namespace].local.invalidate(key)
+            print(f"캐시 무효화 채널 구독이 종료되어 {delay}초 후 다시 구독합니다")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"캐시 무효화 메시지 수신 실패, {delay}초 후 다시 구독합니다: {e}")
+        finally:
+            try:
+                await pubsub.reset()
+            except Exception:
+                # 연결이 이미 끊긴 경우 정리 실패는 무시
+                pass
+
+        _clear_local_caches()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY)
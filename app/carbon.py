@@ -0,0 +1,66 @@
+"""
+탄소 발자국 추정
+
+Vision API 라벨/객체 결과에서 탄소 배출 지표 항목을 찾아 가중 점수와 평가를 계산합니다.
+"""
+
+# Simple carbon footprint estimation logic
+# This is a placeholder - in a real application, you would have a more sophisticated model
+CARBON_INDICATORS = {
+    "car": 120,  # Example CO2 value in g/km
+    "vehicle": 100,
+    "truck": 200,
+    "factory": 500,
+    "plastic": 80,
+    "paper": 30,
+    "tree": -20,  # Negative value for carbon-reducing items
+    "forest": -100,
+    "plant": -10,
+    "solar panel": -50,
+    "wind turbine": -80,
+}
+
+def _assessment(total_score: float):
+    if total_score < -50:
+        return "Very Positive - Carbon reducing"
+    if total_score < 0:
+        return "Positive - Slightly carbon reducing"
+    if total_score < 50:
+        return "Neutral - Limited carbon impact"
+    if total_score < 150:
+        return "Negative - Moderate carbon footprint"
+    return "Very Negative - High carbon footprint"
+
+def estimate_carbon_footprint(labels, objects):
+    """
+    감지된 라벨과 객체로 탄소 발자국을 추정합니다.
+
+    Args:
+        labels: 감지된 라벨 목록 (description, score)
+        objects: 감지된 객체 목록 (name, score)
+
+    Returns:
+        항목별 탄소 영향, 총점, 평가를 담은 딕셔너리
+    """
+    carbon_impact = []
+    total_score = 0
+
+    items = [(label.description, label.score) for label in labels] + [(obj.name, obj.score) for obj in objects]
+    for item_name, score in items:
+        lowered = item_name.lower()
+        for indicator, value in CARBON_INDICATORS.items():
+            if indicator in lowered:
+                impact = {
+                    "item": item_name,
+                    "carbon_value": value,
+                    "confidence": score,
+                    "weighted_impact": value * score
+                }
+                carbon_impact.append(impact)
+                total_score += impact["weighted_impact"]
+
+    return {
+        "carbon_impact_details": carbon_impact,
+        "total_carbon_score": total_score,
+        "assessment": _assessment(total_score)
+    }
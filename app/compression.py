@@ -0,0 +1,155 @@
+"""
+응답 압축 미들웨어
+
+Accept-Encoding에 따라 JSON 등 텍스트 응답을 brotli 또는 gzip으로 압축합니다.
+이미 압축된 이미지 데이터, 스트리밍 응답(SSE 등), 이미 인코딩된 응답,
+COMPRESSION_MIN_SIZE보다 작은 응답은 그대로 전송합니다.
+brotli 패키지가 없으면 gzip만 사용합니다.
+"""
+
+import gzip
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+# 이보다 작은 응답은 압축하지 않음 (바이트)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# 압축 대상 콘텐츠 유형
+COMPRESSIBLE_TYPES = ("application/json", "application/msgpack", "text/html", "text/plain", "text/css", "application/javascript")
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def _accepted_encodings(accept_encoding: str):
+    """
+    Accept-Encoding 헤더에서 허용된 인코딩 집합을 구합니다. (q=0은 제외)
+    """
+    encodings = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            encodings.add(name.lower())
+    return encodings
+
+def choose_encoding(accept_encoding: str):
+    """
+    클라이언트가 허용하는 인코딩 중 사용할 인코딩을 선택합니다.
+
+    Returns:
+        "br", "gzip" 또는 None
+    """
+    encodings = _accepted_encodings(accept_encoding)
+    if brotli is not None and ("br" in encodings or "*" in encodings):
+        return "br"
+    if "gzip" in encodings or "*" in encodings:
+        return "gzip"
+    return None
+
+def compress(body: bytes, encoding: str):
+    """
+    선택한 인코딩으로 응답 본문을 압축합니다.
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+def _is_compressible(headers: list):
+    content_type = b""
+    for name, value in headers:
+        name = name.lower()
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.decode("latin-1").split(";")[0].strip() in COMPRESSIBLE_TYPES
+
+def _vary_accept_encoding(headers: list):
+    """
+    Vary 헤더에 Accept-Encoding을 추가한 헤더 목록을 반환합니다.
+    """
+    vary = [value for name, value in headers if name.lower() == b"vary"]
+    if not any(token.strip().lower() == b"accept-encoding" for value in vary for token in value.split(b",")):
+        vary.append(b"Accept-Encoding")
+    return [(name, value) for name, value in headers if name.lower() != b"vary"] + [(b"vary", b", ".join(vary))]
+
+class CompressionMiddleware:
+    """
+    한 번에 전송되는 응답 본문을 협상된 인코딩으로 압축하는 ASGI 미들웨어
+    압축 대상 유형의 응답은 압축하지 않은 경우에도 Vary: Accept-Encoding을 지정하여
+    공유 캐시가 압축되지 않은 응답을 압축을 지원하는 클라이언트에 (또는 그 반대로) 전달하지 않도록 합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                if not _is_compressible(headers):
+                    passthrough = True
+                    await send(message)
+                    return
+
+                message = {**message, "headers": _vary_accept_encoding(headers)}
+                if encoding is None:
+                    passthrough = True
+                    await send(message)
+                else:
+                    # 본문을 보고 압축 여부를 정할 때까지 헤더 전송을 미룸
+                    start_message = message
+                return
+
+            body = message.get("body", b"")
+            passthrough = True
+            if message.get("more_body", False) or len(body) < COMPRESSION_MIN_SIZE:
+                # 스트리밍 응답이나 작은 응답은 그대로 전송
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = [
+                (name, value) for name, value in start_message.get("headers", [])
+                if name.lower() != b"content-length"
+            ]
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(compressed)).encode()))
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -2,12 +2,12 @@
 MongoDB 데이터베이스 연결 및 설정
 """
 
-import motor.motor_asyncio
 from pymongo import MongoClient
 import os
+import threading
 from dotenv import load_dotenv
-import gridfs
 import urllib.parse
+from . import mongo_monitoring, tracing
 
 # 환경 변수 로드
 load_dotenv()
@@ -16,6 +16,16 @@ load_dotenv()
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("MONGO_DB_NAME", "recycling_db")
 
+# 연결 풀 크기 (최소 크기만큼 연결을 미리 열어 둠, 운영 모드(run.py --production)의 기본값은 10)
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+
+# 비동기 분석 작업 문서 보관 기간 (초)
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "86400"))
+
+# Idempotency-Key 보관 기간 (초)
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
 # MongoDB Atlas 연결 옵션
 client_options = {
     "retryWrites": True,
@@ -25,18 +35,65 @@ client_options = {
     "serverSelectionTimeoutMS": 30000,
 }
 
-# 비동기 클라이언트 (FastAPI 엔드포인트용)
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URL)
-database = client[DB_NAME]
+# 클라이언트와 컬렉션은 처음 사용할 때 생성합니다 (모듈 속성 접근 시 __getattr__로 생성)
+# 컬렉션 속성 이름 → 컬렉션 이름
+COLLECTIONS = {
+    "images_collection": "images",
+    "analyses_collection": "analyses",
+    "user_stats_collection": "user_stats",
+    "analytics_rollups_collection": "analytics_rollups",
+    "jobs_collection": "jobs",
+    "idempotency_keys_collection": "idempotency_keys",
+}
+
+_lazy_lock = threading.RLock()
+
+def _event_listeners():
+    """
+    클라이언트에 등록할 명령 리스너 (처리 시간/느린 쿼리 기록, 추적 스팬)
+    """
+    return mongo_monitoring.event_listeners() + tracing.event_listeners()
+
+def _create(name: str):
+    if name == "client":
+        # 비동기 클라이언트 (FastAPI 엔드포인트용)
+        import motor.motor_asyncio
+        return motor.motor_asyncio.AsyncIOMotorClient(
+            MONGO_URL, minPoolSize=MONGO_MIN_POOL_SIZE, maxPoolSize=MONGO_MAX_POOL_SIZE,
+            event_listeners=_event_listeners()
+        )
+    if name == "database":
+        return _lazy("client")[DB_NAME]
+    if name == "sync_client":
+        # 동기 클라이언트 (GridFS 및 일부 작업용)
+        return MongoClient(
+            MONGO_URL, minPoolSize=MONGO_MIN_POOL_SIZE, maxPoolSize=MONGO_MAX_POOL_SIZE,
+            event_listeners=_event_listeners()
+        )
+    if name == "sync_db":
+        return _lazy("sync_client")[DB_NAME]
+    if name == "fs":
+        import gridfs
+        return gridfs.GridFS(_lazy("sync_db"))
+    return _lazy("database")[COLLECTIONS[name]]
 
-# 동기 클라이언트 (GridFS 및 일부 작업용)
-sync_client = MongoClient(MONGO_URL)
-sync_db = sync_client[DB_NAME]
-fs = gridfs.GridFS(sync_db)
+def _lazy(name: str):
+    """
+    지연 생성 객체를 반환합니다. 한 번 생성하면 모듈 속성으로 저장하여 이후에는 바로 접근합니다.
+    """
+    value = globals().get(name)
+    if value is None:
+        with _lazy_lock:
+            value = globals().get(name)
+            if value is None:
+                value = _create(name)
+                globals()[name] = value
+    return value
 
-# 컬렉션
-images_collection = database.images
-analyses_collection = database.analyses
+def __getattr__(name: str):
+    if name in ("client", "database", "sync_client", "sync_db", "fs") or name in COLLECTIONS:
+        return _lazy(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 데이터베이스 초기화 함수
 async def init_db():
@@ -44,17 +101,34 @@ async def init_db():
     데이터베이스 초기화 함수
     인덱스 생성 등의 초기 설정을 수행합니다.
     """
+    database = _lazy("database")
+
     # 이미지 ID에 인덱스 생성
     await database.images.create_index("image_id", unique=True)
 
     # 분석 결과에 이미지 ID 인덱스 생성
     await database.analyses.create_index("image_id")
 
-    # 생성 시간에 인덱스 생성 (최근 이미지 조회용)
-    await database.images.create_index("created_at")
+    # 사용자 통계는 사용자당 문서 하나 (통계 조회용)
+    await database.user_stats.create_index("user_id", unique=True)
+
+    # 기간별 집계 문서 (집계 단위, 구간, 카테고리, 재질)당 하나
+    await database.analytics_rollups.create_index(
+        [("granularity", 1), ("bucket", 1), ("category", 1), ("material", 1)],
+        unique=True
+    )
+
+    # 이미지 목록 조회용 복합 인덱스 (필터 + created_at 정렬 + image_id 타이브레이커)
+    # 키셋 페이지네이션이 인덱스 범위 스캔만으로 처리되도록 정렬 키까지 포함합니다.
+    await database.images.create_index([("created_at", -1), ("image_id", -1)])
+    await database.images.create_index([("user_id", 1), ("created_at", -1), ("image_id", -1)])
+    await database.images.create_index([("category", 1), ("created_at", -1), ("image_id", -1)])
+    await database.images.create_index([("category", 1), ("user_id", 1), ("created_at", -1), ("image_id", -1)])
 
-    # 사용자 ID에 인덱스 생성 (사용자별 이미지 조회용)
-    await database.images.create_index("user_id")
+    # 비동기 분석 작업 조회 및 만료
+    await database.jobs.create_index("job_id", unique=True)
+    await database.jobs.create_index("created_at", expireAfterSeconds=JOB_TTL_SECONDS)
 
-    # 카테고리에 인덱스 생성 (카테고리별 이미지 조회용)
-    await database.images.create_index("category")
+    # Idempotency-Key는 키당 문서 하나, 보관 기간이 지나면 자동 삭제
+    await database.idempotency_keys.create_index("key", unique=True)
+    await database.idempotency_keys.create_index("created_at", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS)
@@ -0,0 +1,117 @@
+"""
+Idempotency-Key 처리
+
+같은 키로 들어온 재시도 요청은 이미지 저장과 Vision 호출을 다시 하지 않고
+처음 요청의 응답을 그대로 돌려줍니다. 처음 요청이 아직 처리 중이면 완료를 기다립니다.
+키 문서는 고유 인덱스로 하나만 생성되며 TTL 인덱스로 만료됩니다.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+from . import database
+
+# 환경 변수 로드
+load_dotenv()
+
+# 처리 중인 요청의 완료를 기다리는 최대 시간 (초)
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+# 처리 중 표시가 유지되는 시간 (초) - 처리하던 워커가 죽은 경우 이후 요청이 이어받습니다
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+# 대기 중 상태 확인 간격 (초)
+IDEMPOTENCY_POLL_INTERVAL = 0.2
+
+# 키 최대 길이
+MAX_KEY_LENGTH = 255
+
+PROCESSING = "processing"
+COMPLETED = "completed"
+
+def request_fingerprint(content: bytes, **params):
+    """
+    요청 본문과 파라미터로 요청 지문을 계산합니다.
+    같은 키로 다른 요청을 보내는 실수를 감지하는 데 사용합니다.
+    """
+    digest = hashlib.sha256(content)
+    for name in sorted(params):
+        digest.update(f"\0{name}={params[name]}".encode())
+    return digest.hexdigest()
+
+async def begin(key: str, fingerprint: str, owner: str):
+    """
+    키에 대한 처리를 시작합니다.
+
+    Args:
+        key: Idempotency-Key 헤더 값
+        fingerprint: 요청 지문
+        owner: 이 요청의 소유자 토큰 (complete/release에 같은 값을 전달)
+
+    Returns:
+        이 요청이 처리해야 하면 None, 이미 완료된 요청이면 (상태 코드, 응답 본문) 튜플
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key는 1~{MAX_KEY_LENGTH}자여야 합니다")
+
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        now = datetime.now()
+        try:
+            await database.idempotency_keys_collection.insert_one({
+                "key": key,
+                "fingerprint": fingerprint,
+                "status": PROCESSING,
+                "owner": owner,
+                "created_at": now,
+                "lock_expires_at": now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        record = await database.idempotency_keys_collection.find_one({"key": key})
+        if record is None:
+            # 처음 요청이 실패하여 키가 해제된 경우 다시 시도
+            continue
+
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="같은 Idempotency-Key로 다른 요청이 이미 처리되었습니다")
+
+        if record["status"] == COMPLETED:
+            return record["status_code"], record["response"]
+
+        # 처리하던 워커가 응답 없이 사라진 경우 잠금을 이어받습니다
+        # (소유자를 바꾸므로 이전 워커가 뒤늦게 끝나도 이 요청의 키를 덮어쓰거나 해제하지 못함)
+        if record["lock_expires_at"] < now:
+            result = await database.idempotency_keys_collection.update_one(
+                {"_id": record["_id"], "status": PROCESSING, "lock_expires_at": record["lock_expires_at"]},
+                {"$set": {"owner": owner, "lock_expires_at": now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)}}
+            )
+            if result.modified_count:
+                return None
+
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="같은 Idempotency-Key의 요청이 아직 처리 중입니다")
+
+        await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+async def complete(key: str, owner: str, status_code: int, response: dict):
+    """
+    처리 결과를 저장하여 이후 같은 키의 요청이 재사용하도록 합니다.
+    다른 요청이 잠금을 이어받은 경우에는 저장하지 않습니다.
+    """
+    await database.idempotency_keys_collection.update_one(
+        {"key": key, "status": PROCESSING, "owner": owner},
+        {"$set": {"status": COMPLETED, "status_code": status_code, "response": response, "completed_at": datetime.now()}}
+    )
+
+async def release(key: str, owner: str):
+    """
+    처리에 실패한 키를 해제하여 재시도 요청이 처음부터 다시 처리되도록 합니다.
+    다른 요청이 잠금을 이어받은 경우에는 해제하지 않습니다.
+    """
+    await database.idempotency_keys_collection.delete_one({"key": key, "status": PROCESSING, "owner": owner})
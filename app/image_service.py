@@ -3,24 +3,73 @@
 """
 
 from fastapi import UploadFile, HTTPException
-from bson import ObjectId
 from datetime import datetime
 import uuid
-from google.cloud import vision
+import asyncio
+import base64
+import json
 import io
-from . import database
-from .recycling import RecyclingClassifier
+from . import analytics, cache, carbon, database, metrics, stats, storage, thumbnails, tracing, uploads, vision_api
+from .recycling import get_classifier, get_rules_version
 
-# Vision API 클라이언트
-vision_client = vision.ImageAnnotatorClient()
+async def _put_image_blob(blob_storage, file: UploadFile, content: bytes, content_type: str, image_id: str):
+    """
+    이미지 바이너리를 저장소 백엔드에 저장하고 저장소 키를 반환합니다.
+    """
+    with metrics.stage("storage_put"):
+        return await asyncio.to_thread(
+            blob_storage.put,
+            content,
+            filename=file.filename,
+            content_type=content_type,
+            image_id=image_id
+        )
 
-async def save_image_to_db(file: UploadFile, content: bytes, user_id: str = None, category: str = None):
+def _build_image_doc(image_id: str, blob_storage, file_id: str, file: UploadFile, content_type: str, user_id: str = None, category: str = None):
+    """
+    이미지 메타데이터 문서를 생성합니다.
+    """
+    # 현재 날짜 및 시간 정보
+    current_datetime = datetime.now()
+
+    return {
+        "image_id": image_id,
+        "storage": blob_storage.name,
+        "file_id": file_id,
+        "filename": file.filename,
+        "content_type": content_type,
+        "user_id": user_id,
+        "category": category,
+        "date": current_datetime.date().isoformat(),
+        "time": current_datetime.time().isoformat(),
+        "created_at": current_datetime
+    }
+
+async def _insert_image_doc(image_doc: dict):
+    with metrics.stage("db_insert_image"):
+        await database.images_collection.insert_one(image_doc)
+
+async def _image_doc_saved(image_doc: dict, content: bytes):
+    """
+    이미지 문서 저장 후 처리 (썸네일 예약, 캐시 저장)
+    """
+    # 썸네일은 응답을 지연시키지 않도록 워커 풀에서 생성
+    thumbnails.schedule_thumbnails(image_doc, content)
+
+    # _id 필드를 문자열로 변환
+    image_doc["_id"] = str(image_doc["_id"])
+
+    # 업로드 직후 조회에 대비해 캐시에 바로 저장
+    await cache.image_cache.set(image_doc["image_id"], image_doc)
+
+async def save_image_to_db(file: UploadFile, content: bytes, content_type: str, user_id: str = None, category: str = None):
     """
     이미지를 MongoDB에 저장합니다.
 
     Args:
         file: 업로드된 파일 객체
         content: 이미지 바이너리 데이터
+        content_type: 시그니처로 판별한 이미지 MIME 유형
         user_id: 사용자 ID (선택 사항)
         category: 이미지 카테고리 (선택 사항)
 
@@ -31,39 +80,38 @@ async def save_image_to_db(file: UploadFile, content: bytes, user_id: str = None
         # 고유 ID 생성
         image_id = str(uuid.uuid4())
 
-        # 이미지를 GridFS에 저장
-        file_id = database.fs.put(
-            content,
-            filename=file.filename,
-            content_type=file.content_type,
-            image_id=image_id
-        )
-
-        # 현재 날짜 및 시간 정보
-        current_datetime = datetime.now()
+        # 이미지를 저장소 백엔드에 저장
+        blob_storage = storage.get_storage()
+        file_id = await _put_image_blob(blob_storage, file, content, content_type, image_id)
 
         # 이미지 메타데이터 저장
-        image_doc = {
-            "image_id": image_id,
-            "file_id": str(file_id),
-            "filename": file.filename,
-            "content_type": file.content_type,
-            "user_id": user_id,
-            "category": category,
-            "date": current_datetime.date().isoformat(),
-            "time": current_datetime.time().isoformat(),
-            "created_at": current_datetime
-        }
-
-        await database.images_collection.insert_one(image_doc)
-
-        # _id 필드를 문자열로 변환
-        image_doc["_id"] = str(image_doc["_id"])
+        image_doc = _build_image_doc(image_id, blob_storage, file_id, file, content_type, user_id, category)
+        await _insert_image_doc(image_doc)
+        await _image_doc_saved(image_doc, content)
 
         return image_doc
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"이미지 저장 중 오류 발생: {str(e)}")
 
+async def discard_saved_image(image_doc: dict):
+    """
+    save_image_to_db로 저장한 이미지를 삭제합니다. (이어지는 단계가 실패한 경우)
+    생성 중인 썸네일은 끝나기를 기다린 뒤 함께 삭제합니다.
+
+    Args:
+        image_doc: 저장된 이미지 문서
+    """
+    image_id = image_doc["image_id"]
+    try:
+        blob_storage = storage.get_storage_for(image_doc)
+        thumbnail_ids = await thumbnails.wait_pending(image_id)
+        for key in [image_doc["file_id"], *thumbnail_ids.values()]:
+            await asyncio.to_thread(blob_storage.delete, key)
+        await database.images_collection.delete_one({"image_id": image_id})
+        await cache.image_cache.invalidate(image_id)
+    except Exception as e:
+        print(f"저장된 이미지 정리 중 오류 발생 ({image_id}): {str(e)}")
+
 async def analyze_image_with_vision(content: bytes):
     """
     Google Vision API를 사용하여 이미지를 분석합니다.
@@ -75,20 +123,108 @@ async def analyze_image_with_vision(content: bytes):
         라벨 및 객체 감지 결과
     """
     try:
-        # Vision API 이미지 생성
-        image = vision.Image(content=content)
+        # Vision API 이미지 생성 (클라이언트는 처음 사용할 때 생성되므로 스레드에서 가져옴)
+        image = vision_api.make_image(content)
+        vision_client = await asyncio.to_thread(vision_api.get_client)
 
-        # 라벨 및 객체 감지 수행
-        label_response = vision_client.label_detection(image=image)
-        object_response = vision_client.object_localization(image=image)
+        # 라벨 및 객체 감지 수행 (동기 RPC이므로 이벤트 루프를 막지 않도록 스레드에서 실행)
+        with metrics.vision_call("label_detection"):
+            label_response = await asyncio.to_thread(vision_client.label_detection, image=image)
+        with metrics.vision_call("object_localization"):
+            object_response = await asyncio.to_thread(vision_client.object_localization, image=image)
 
         labels = label_response.label_annotations
         objects = object_response.localized_object_annotations
+        tracing.set_attributes({
+            "vision.features": ["label_detection", "object_localization"],
+            "vision.label_count": len(labels),
+            "vision.object_count": len(objects)
+        })
 
         return labels, objects
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"이미지 분석 중 오류 발생: {str(e)}")
 
+# 통합 분석 이름 → 필요한 Vision 기능
+ANALYSIS_FEATURES = {
+    "labels": ("label_detection",),
+    "objects": ("object_localization",),
+    "text": ("text_detection",),
+    "carbon": ("label_detection", "object_localization"),
+    "recycling": ("label_detection", "object_localization"),
+}
+
+def parse_analyses(analyses: str):
+    """
+    쉼표로 구분한 분석 목록을 검증하고 순서를 유지한 채 중복을 제거합니다.
+    """
+    selected = list(dict.fromkeys(name.strip() for name in analyses.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in ANALYSIS_FEATURES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 분석입니다: {', '.join(unknown)} (사용 가능: {', '.join(ANALYSIS_FEATURES)})")
+    if not selected:
+        raise HTTPException(status_code=400, detail="분석을 하나 이상 지정해야 합니다")
+    return selected
+
+async def analyze_combined(content: bytes, analyses: list):
+    """
+    요청된 분석에 필요한 Vision 기능을 합쳐 한 번만 호출하고, 그 결과로 각 분석을 수행합니다.
+
+    Args:
+        content: 이미지 바이너리 데이터
+        analyses: parse_analyses로 검증한 분석 이름 목록
+
+    Returns:
+        분석별 결과를 담은 응답 문서
+    """
+    features = sorted({feature for name in analyses for feature in ANALYSIS_FEATURES[name]})
+    try:
+        image = vision_api.make_image(content)
+        await asyncio.to_thread(vision_api.get_client)
+        response = await asyncio.to_thread(vision_api.annotate_image, image, features)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"이미지 분석 중 오류 발생: {str(e)}")
+
+    labels = response.label_annotations
+    objects = response.localized_object_annotations
+    texts = response.text_annotations
+    tracing.set_attributes({
+        "vision.features": features,
+        "vision.label_count": len(labels),
+        "vision.object_count": len(objects)
+    })
+
+    result = {"analyses": analyses, "vision_features": features}
+    if "labels" in analyses:
+        result["labels"] = [
+            {"description": label.description, "score": label.score}
+            for label in labels
+        ]
+    if "objects" in analyses:
+        result["objects"] = [
+            {
+                "name": obj.name,
+                "score": obj.score,
+                "bounding_poly": [
+                    {"x": vertex.x, "y": vertex.y}
+                    for vertex in obj.bounding_poly.normalized_vertices
+                ]
+            }
+            for obj in objects
+        ]
+    if "text" in analyses:
+        result["text"] = texts[0].description if texts else ""
+        result["text_details"] = [
+            {"description": text.description, "locale": text.locale}
+            for text in texts[1:]
+        ]
+    if "carbon" in analyses:
+        result["carbon_footprint"] = carbon.estimate_carbon_footprint(labels, objects)
+    if "recycling" in analyses:
+        result["recycling_analysis"] = await analyze_recycling(labels, objects)
+
+    return result
+
 async def analyze_recycling(labels, objects):
     """
     재활용 분류기를 사용하여 이미지를 분석합니다.
@@ -101,71 +237,255 @@ async def analyze_recycling(labels, objects):
         재활용 분석 결과
     """
     try:
-        # 재활용 분류기 초기화
-        recycling_classifier = RecyclingClassifier()
+        # 공유 재활용 분류기
+        recycling_classifier = get_classifier()
 
         # 재활용 분석 수행
-        recycling_analysis = recycling_classifier.analyze_image_for_recycling(labels, objects)
+        with metrics.stage("classify"):
+            recycling_analysis = recycling_classifier.analyze_image_for_recycling(labels, objects)
+        tracing.set_attributes({"recycling.material_count": len(recycling_analysis["detected_materials"])})
 
         return recycling_analysis
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"재활용 분석 중 오류 발생: {str(e)}")
 
-async def save_analysis_result(image_id, recycling_analysis, labels, objects):
+def _build_analysis_doc(image_id, recycling_analysis, labels, objects, user_id: str = None, category: str = None):
+    """
+    분석 결과 문서를 생성합니다.
+    """
+    return {
+        "image_id": image_id,
+        "user_id": user_id,
+        "category": category,
+        "analysis_type": "recycling",
+        "analysis_result": recycling_analysis,
+        # 분류 규칙이 바뀐 뒤 다시 분류할 문서를 찾는 데 사용 (app.reclassify)
+        "rules_version": get_rules_version(),
+        "detected_labels": [
+            {"description": label.description, "score": label.score}
+            for label in labels
+        ],
+        "detected_objects": [
+            {"name": obj.name, "score": obj.score}
+            for obj in objects
+        ],
+        "created_at": datetime.now()
+    }
+
+async def _insert_analysis_doc(analysis_doc: dict):
+    with metrics.stage("db_insert_analysis"):
+        await database.analyses_collection.insert_one(analysis_doc)
+
+async def _analysis_doc_saved(analysis_doc: dict):
     """
-    분석 결과를 MongoDB에 저장합니다.
+    분석 결과 저장 후 처리 (사용자 통계와 기간별 집계 증분 갱신, 캐시 저장)
+    """
+    with metrics.stage("stats_update"):
+        await asyncio.gather(
+            stats.record_analysis(analysis_doc["user_id"], analysis_doc["analysis_result"], analysis_doc["created_at"]),
+            analytics.record_analysis(analysis_doc["category"], analysis_doc["analysis_result"], analysis_doc["created_at"])
+        )
+
+    # _id 필드를 문자열로 변환
+    analysis_doc["_id"] = str(analysis_doc["_id"])
+
+    await cache.analysis_cache.set(analysis_doc["image_id"], analysis_doc)
+
+async def save_analysis_result(image_id, recycling_analysis, labels, objects, user_id: str = None, category: str = None):
+    """
+    분석 결과를 MongoDB에 저장하고 사용자 통계와 기간별 집계에 반영합니다.
 
     Args:
         image_id: 이미지 ID
         recycling_analysis: 재활용 분석 결과
         labels: 감지된 라벨 목록
         objects: 감지된 객체 목록
+        user_id: 사용자 ID (선택 사항)
+        category: 이미지 카테고리 (선택 사항)
 
     Returns:
         저장된 분석 결과 문서
     """
     try:
-        # 분석 결과 저장
-        analysis_doc = {
-            "image_id": image_id,
-            "analysis_type": "recycling",
-            "analysis_result": recycling_analysis,
-            "detected_labels": [
-                {"description": label.description, "score": label.score}
-                for label in labels
-            ],
-            "detected_objects": [
-                {"name": obj.name, "score": obj.score}
-                for obj in objects
-            ],
-            "created_at": datetime.now()
-        }
-
-        await database.analyses_collection.insert_one(analysis_doc)
-
-        # _id 필드를 문자열로 변환
-        analysis_doc["_id"] = str(analysis_doc["_id"])
+        analysis_doc = _build_analysis_doc(image_id, recycling_analysis, labels, objects, user_id, category)
+        await _insert_analysis_doc(analysis_doc)
+        await _analysis_doc_saved(analysis_doc)
 
         return analysis_doc
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"분석 결과 저장 중 오류 발생: {str(e)}")
 
-async def get_image_by_id(image_id: str):
+async def _load_image_doc(image_id: str, use_cache: bool = True):
     """
-    이미지 ID로 이미지 정보를 조회합니다.
+    이미지 문서를 캐시 또는 DB에서 조회합니다.
 
     Args:
         image_id: 이미지 ID
+        use_cache: False이면 캐시를 건너뛰고 DB에서 다시 읽음
 
     Returns:
-        이미지 문서
+        (이미지 문서, 캐시 적중 여부) 튜플
     """
+    if use_cache:
+        hit, image_doc = await cache.image_cache.get(image_id)
+        if hit:
+            if image_doc is None:
+                raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+            return image_doc, True
+
     image_doc = await database.images_collection.find_one({"image_id": image_id})
     if not image_doc:
+        cache.image_cache.set_missing(image_id)
         raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
 
     # _id 필드를 문자열로 변환
     image_doc["_id"] = str(image_doc["_id"])
+    await cache.image_cache.set(image_id, image_doc)
+
+    return image_doc, False
+
+def _analysis_response(image_doc: dict, recycling_analysis, analysis_doc: dict):
+    return {
+        "image_id": image_doc["image_id"],
+        "filename": image_doc["filename"],
+        "content_type": image_doc["content_type"],
+        "user_id": image_doc["user_id"],
+        "category": image_doc["category"],
+        "date": image_doc["date"],
+        "time": image_doc["time"],
+        "recycling_analysis": recycling_analysis,
+        "detected_labels": analysis_doc["detected_labels"],
+        "detected_objects": analysis_doc["detected_objects"]
+    }
+
+async def _analyze_content(content: bytes):
+    """
+    Vision API 분석과 재활용 분석을 차례로 수행합니다.
+
+    Returns:
+        (labels, objects, recycling_analysis) 튜플
+    """
+    labels, objects = await analyze_image_with_vision(content)
+    recycling_analysis = await analyze_recycling(labels, objects)
+    return labels, objects, recycling_analysis
+
+async def analyze_stored_image(image_id: str):
+    """
+    저장된 이미지를 저장소에서 읽어 분석하고 분석 결과를 저장합니다.
+
+    Args:
+        image_id: save_image_to_db로 저장한 이미지 ID
+
+    Returns:
+        이미지 정보와 분석 결과를 담은 응답 문서
+    """
+    image_doc = await get_image_by_id(image_id)
+    content, _ = await get_image_data(image_id)
+
+    # 이미지 분석 및 재활용 분석
+    labels, objects, recycling_analysis = await _analyze_content(content)
+
+    # 분석 결과 저장
+    analysis_doc = await save_analysis_result(
+        image_doc["image_id"],
+        recycling_analysis,
+        labels,
+        objects,
+        image_doc["user_id"],
+        image_doc["category"]
+    )
+
+    return _analysis_response(image_doc, recycling_analysis, analysis_doc)
+
+async def _shielded(task: asyncio.Task):
+    return await asyncio.shield(task)
+
+async def _discard_orphans(blob_storage, put_task: asyncio.Task, image_id: str, documents_written: bool):
+    """
+    실패한 분석 및 저장 요청이 남긴 이미지 바이너리와 문서를 삭제합니다.
+    """
+    # 스레드에서 실행 중인 저장소 쓰기는 멈출 수 없으므로 끝나기를 기다린 뒤 삭제
+    await asyncio.wait({put_task})
+    try:
+        if not put_task.cancelled() and put_task.exception() is None:
+            await asyncio.to_thread(blob_storage.delete, put_task.result())
+        if documents_written:
+            await asyncio.gather(
+                database.images_collection.delete_one({"image_id": image_id}),
+                database.analyses_collection.delete_one({"image_id": image_id})
+            )
+    except Exception as e:
+        print(f"실패한 요청의 데이터 정리 중 오류 발생 ({image_id}): {str(e)}")
+
+async def analyze_and_save_image(file: UploadFile, content: bytes, content_type: str, user_id: str = None, category: str = None):
+    """
+    이미지를 저장하고 분석한 뒤 이미지와 분석 결과 문서를 함께 저장합니다.
+
+    저장소 쓰기와 Vision API 분석 → 재활용 분석은 서로 의존하지 않으므로 동시에 실행하고,
+    둘 다 끝나면 두 문서를 함께 기록합니다. 한 단계가 실패하면 나머지 단계를 취소하고
+    이미 저장된 바이너리와 문서를 삭제합니다.
+
+    Args:
+        file: 업로드된 파일 객체
+        content: 이미지 바이너리 데이터
+        content_type: 시그니처로 판별한 이미지 MIME 유형
+        user_id: 사용자 ID (선택 사항)
+        category: 이미지 카테고리 (선택 사항)
+
+    Returns:
+        이미지 정보와 분석 결과를 담은 응답 문서
+    """
+    image_id = str(uuid.uuid4())
+    blob_storage = storage.get_storage()
+    put_task = asyncio.create_task(_put_image_blob(blob_storage, file, content, content_type, image_id))
+    documents_written = False
+
+    try:
+        try:
+            async with asyncio.TaskGroup() as group:
+                # 저장소 쓰기는 취소되지 않도록 보호 (실패 시 끝난 뒤 삭제)
+                group.create_task(_shielded(put_task))
+                analysis_task = group.create_task(_analyze_content(content))
+
+            labels, objects, recycling_analysis = analysis_task.result()
+            image_doc = _build_image_doc(image_id, blob_storage, put_task.result(), file, content_type, user_id, category)
+            analysis_doc = _build_analysis_doc(image_id, recycling_analysis, labels, objects, user_id, category)
+
+            documents_written = True
+            async with asyncio.TaskGroup() as group:
+                group.create_task(_insert_image_doc(image_doc))
+                group.create_task(_insert_analysis_doc(analysis_doc))
+        except BaseExceptionGroup as error:
+            # 처음 실패한 단계의 예외를 그대로 전달 (HTTPException 상태 코드 유지)
+            raise error.exceptions[0]
+    except BaseException:
+        await _discard_orphans(blob_storage, put_task, image_id, documents_written)
+        raise
+
+    # 두 문서가 저장된 뒤의 후처리(썸네일, 통계, 캐시)는 실패해도 오류로 응답하지 않음
+    # (오류로 응답하면 Idempotency-Key가 해제되어 재시도가 이미지를 다시 저장함)
+    try:
+        await _image_doc_saved(image_doc, content)
+    except Exception as e:
+        print(f"이미지 저장 후처리 중 오류 발생 ({image_id}): {str(e)}")
+    try:
+        await _analysis_doc_saved(analysis_doc)
+    except Exception as e:
+        print(f"분석 결과 저장 후처리 중 오류 발생 ({image_id}): {str(e)}")
+
+    return _analysis_response(image_doc, recycling_analysis, analysis_doc)
+
+async def get_image_by_id(image_id: str):
+    """
+    이미지 ID로 이미지 정보를 조회합니다.
+
+    Args:
+        image_id: 이미지 ID
+
+    Returns:
+        이미지 문서
+    """
+    image_doc, _ = await _load_image_doc(image_id)
 
     return image_doc
 
@@ -179,15 +499,50 @@ async def get_analysis_by_image_id(image_id: str):
     Returns:
         분석 결과 문서
     """
+    hit, analysis_doc = await cache.analysis_cache.get(image_id)
+    if hit:
+        return analysis_doc
+
     analysis_doc = await database.analyses_collection.find_one({"image_id": image_id})
     if not analysis_doc:
+        cache.analysis_cache.set_missing(image_id)
         return None
 
     # _id 필드를 문자열로 변환
     analysis_doc["_id"] = str(analysis_doc["_id"])
+    await cache.analysis_cache.set(image_id, analysis_doc)
 
     return analysis_doc
 
+async def get_image_blob(image_id: str):
+    """
+    이미지 ID로 이미지 바이너리가 저장된 위치를 조회합니다.
+
+    Args:
+        image_id: 이미지 ID
+
+    Returns:
+        저장소 백엔드, 저장소 키, 콘텐츠 타입
+    """
+    # 이미지 정보 조회
+    image_doc, cached = await _load_image_doc(image_id)
+
+    blob_storage = storage.get_storage_for(image_doc)
+    if not await asyncio.to_thread(blob_storage.exists, image_doc["file_id"]):
+        if not cached:
+            raise HTTPException(status_code=404, detail="이미지 데이터를 찾을 수 없습니다")
+
+        # 저장소 마이그레이션 등으로 캐시된 위치가 바뀐 경우 DB에서 다시 조회
+        await cache.image_cache.invalidate(image_id)
+        return await get_image_blob(image_id)
+
+    # 클라이언트가 보낸 형식이 그대로 저장된 이전 문서는 브라우저가 해석하지 않도록 바이너리로 응답
+    content_type = image_doc["content_type"]
+    if content_type not in uploads.IMAGE_TYPES:
+        content_type = "application/octet-stream"
+
+    return blob_storage, image_doc["file_id"], content_type
+
 async def get_image_data(image_id: str):
     """
     이미지 ID로 이미지 바이너리 데이터를 조회합니다.
@@ -198,27 +553,303 @@ async def get_image_data(image_id: str):
     Returns:
         이미지 바이너리 데이터와 콘텐츠 타입
     """
-    # 이미지 정보 조회
-    image_doc = await database.images_collection.find_one({"image_id": image_id})
-    if not image_doc:
+    blob_storage, key, content_type = await get_image_blob(image_id)
+    content = await asyncio.to_thread(blob_storage.get, key)
+
+    return content, content_type
+
+async def get_thumbnail_data(image_id: str, size: int):
+    """
+    이미지 ID로 썸네일 데이터를 조회합니다.
+    썸네일이 아직 없으면 원본에서 생성하여 저장한 뒤 반환합니다.
+
+    Args:
+        image_id: 이미지 ID
+        size: 썸네일 크기 (긴 변 기준 픽셀)
+
+    Returns:
+        썸네일 바이너리 데이터와 콘텐츠 타입
+    """
+    if size not in thumbnails.THUMBNAIL_SIZES:
+        sizes = ", ".join(str(s) for s in thumbnails.THUMBNAIL_SIZES)
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 썸네일 크기입니다 (지원 크기: {sizes})")
+
+    image_doc, cached = await _load_image_doc(image_id)
+
+    try:
+        content = await thumbnails.get_thumbnail(image_doc, size)
+    except Exception:
+        if not cached:
+            raise
+
+        # 저장소 마이그레이션 등으로 캐시된 위치가 바뀐 경우 DB에서 다시 조회
+        await cache.image_cache.invalidate(image_id)
+        image_doc, _ = await _load_image_doc(image_id, use_cache=False)
+        content = await thumbnails.get_thumbnail(image_doc, size)
+
+    return content, thumbnails.THUMBNAIL_CONTENT_TYPE
+
+def _analysis_summary_expression(analysis):
+    """
+    분석 결과 문서에서 목록 조회용 요약 필드를 만드는 집계 표현식을 생성합니다.
+
+    Args:
+        analysis: 분석 결과 문서를 가리키는 집계 표현식
+
+    Returns:
+        요약 문서 집계 표현식
+    """
+    return {
+        "analysis_type": f"{analysis}.analysis_type",
+        "materials": {
+            "$map": {
+                "input": {"$objectToArray": {"$ifNull": [f"{analysis}.analysis_result.detected_materials", {}]}},
+                "as": "material",
+                "in": "$$material.k"
+            }
+        },
+        "total_carbon_impact": f"{analysis}.analysis_result.carbon_impact.total_carbon_impact",
+        "total_carbon_saving": f"{analysis}.analysis_result.carbon_impact.total_carbon_saving",
+        "impact_level": f"{analysis}.analysis_result.carbon_impact.impact_level",
+        "saving_level": f"{analysis}.analysis_result.carbon_impact.saving_level",
+        "created_at": f"{analysis}.created_at"
+    }
+
+def _analysis_lookup_stage(summary: bool = False):
+    """
+    이미지 문서에 분석 결과를 결합하는 $lookup 단계를 생성합니다.
+
+    Args:
+        summary: True이면 전체 분석 결과 대신 요약 필드만 결합
+
+    Returns:
+        집계 파이프라인 단계 목록
+    """
+    first_analysis = {"$arrayElemAt": ["$analysis", 0]}
+    if summary:
+        analysis = {
+            "$cond": [
+                {"$gt": [{"$size": "$analysis"}, 0]},
+                {"$let": {"vars": {"doc": first_analysis}, "in": _analysis_summary_expression("$$doc")}},
+                None
+            ]
+        }
+    else:
+        analysis = {"$ifNull": [first_analysis, None]}
+
+    return [
+        {
+            "$lookup": {
+                "from": database.analyses_collection.name,
+                "localField": "image_id",
+                "foreignField": "image_id",
+                "as": "analysis"
+            }
+        },
+        {"$set": {"analysis": analysis}}
+    ]
+
+async def get_image_with_analysis(image_id: str):
+    """
+    이미지 정보와 분석 결과를 한 번의 집계 쿼리로 조회합니다.
+
+    Args:
+        image_id: 이미지 ID
+
+    Returns:
+        (이미지 문서, 분석 결과 문서 또는 None) 튜플
+    """
+    image_hit, image_doc = await cache.image_cache.get(image_id)
+    analysis_hit, analysis_doc = await cache.analysis_cache.get(image_id)
+    if image_hit and image_doc is None:
         raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+    if image_hit and analysis_hit:
+        return image_doc, analysis_doc
+
+    pipeline = [
+        {"$match": {"image_id": image_id}},
+        {"$limit": 1},
+        *_analysis_lookup_stage()
+    ]
+    cursor = database.images_collection.aggregate(pipeline)
+    results = await cursor.to_list(length=1)
+    if not results:
+        cache.image_cache.set_missing(image_id)
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다")
+
+    image_doc = results[0]
+    analysis_doc = image_doc.pop("analysis", None)
+
+    # _id 필드를 문자열로 변환
+    image_doc["_id"] = str(image_doc["_id"])
+    await cache.image_cache.set(image_id, image_doc)
+    if analysis_doc:
+        analysis_doc["_id"] = str(analysis_doc["_id"])
+        await cache.analysis_cache.set(image_id, analysis_doc)
+    else:
+        cache.analysis_cache.set_missing(image_id)
+
+    return image_doc, analysis_doc
+
+# 이미지 목록 정렬 순서 (created_at이 같은 경우 image_id로 순서를 고정)
+IMAGE_LIST_SORT = [("created_at", -1), ("image_id", -1)]
+
+def encode_page_cursor(image_doc: dict):
+    """
+    이미지 문서의 정렬 키로 다음 페이지 커서를 생성합니다.
+
+    Args:
+        image_doc: 현재 페이지의 마지막 이미지 문서
+
+    Returns:
+        URL-safe 커서 문자열
+    """
+    payload = {
+        "created_at": image_doc["created_at"].isoformat(),
+        "image_id": image_doc["image_id"]
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def _decode_page_cursor(cursor: str):
+    """
+    커서 문자열을 다음 페이지 조회용 필터 조건으로 변환합니다.
+
+    Args:
+        cursor: encode_page_cursor로 생성한 커서 문자열
+
+    Returns:
+        MongoDB 필터 조건
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["created_at"])
+        image_id = str(payload["image_id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="잘못된 페이지 커서입니다")
+
+    # (created_at, image_id) 내림차순에서 커서 이후의 문서만 조회
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "image_id": {"$lt": image_id}}
+        ]
+    }
+
+def get_next_page_cursor(images: list, limit: int):
+    """
+    조회 결과로 다음 페이지 커서를 계산합니다.
 
-    # GridFS에서 이미지 데이터 조회
-    file_id = ObjectId(image_doc["file_id"])
-    if not database.fs.exists(file_id):
-        raise HTTPException(status_code=404, detail="이미지 데이터를 찾을 수 없습니다")
+    Args:
+        images: 조회된 이미지 목록
+        limit: 요청한 최대 이미지 수
+
+    Returns:
+        다음 페이지 커서 (마지막 페이지인 경우 None)
+    """
+    if limit <= 0 or len(images) < limit:
+        return None
+    return encode_page_cursor(images[-1])
+
+# 이미지 목록 조회에서 선택할 수 있는 필드
+IMAGE_LIST_FIELDS = (
+    "_id", "image_id", "file_id", "filename", "content_type",
+    "user_id", "category", "date", "time", "created_at", "thumbnails"
+)
+
+# 미리 정의된 목록 조회 뷰
+IMAGE_LIST_VIEWS = {
+    # 기존 응답과 동일한 전체 필드
+    "full": IMAGE_LIST_FIELDS,
+    # 히스토리 화면 카드 표시에 필요한 최소 필드
+    "card": ("image_id", "filename", "category", "date", "time", "created_at", "thumbnails")
+}
+
+# 페이지 커서 생성에 필요하므로 항상 포함되는 필드
+IMAGE_LIST_REQUIRED_FIELDS = ("image_id", "created_at")
+
+def _build_list_projection(view: str = "full", fields: str = None, include_analysis: bool = False):
+    """
+    목록 조회용 $project 단계를 생성합니다.
+
+    Args:
+        view: 미리 정의된 뷰 이름 (full, card)
+        fields: 쉼표로 구분한 필드 목록 (지정 시 view보다 우선)
+        include_analysis: 분석 요약 필드 포함 여부
+
+    Returns:
+        $project 단계 문서
+    """
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in IMAGE_LIST_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"조회할 수 없는 필드입니다: {', '.join(unknown)}")
+    elif view in IMAGE_LIST_VIEWS:
+        selected = IMAGE_LIST_VIEWS[view]
+    else:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 뷰입니다: {view}")
+
+    projection = {field: 1 for field in IMAGE_LIST_REQUIRED_FIELDS}
+    projection.update({field: 1 for field in selected})
+
+    # _id는 요청된 경우에만 문자열로 변환하여 반환
+    if "_id" in projection:
+        projection["_id"] = {"$toString": "$_id"}
+    else:
+        projection["_id"] = 0
+
+    if include_analysis:
+        projection["analysis"] = 1
+
+    return {"$project": projection}
+
+async def _find_images(filter_query: dict, limit: int, include_analysis: bool = False, cursor: str = None,
+                       view: str = "full", fields: str = None):
+    """
+    이미지 목록을 최신순으로 조회합니다.
+    필요한 필드만 서버에서 투영하므로 조회 결과를 그대로 응답으로 반환할 수 있습니다.
+
+    Args:
+        filter_query: MongoDB 필터 쿼리
+        limit: 조회할 최대 이미지 수
+        include_analysis: True이면 각 이미지에 분석 요약을 함께 결합
+        cursor: 이전 페이지에서 받은 페이지 커서 (선택 사항)
+        view: 미리 정의된 뷰 이름 (full, card)
+        fields: 쉼표로 구분한 필드 목록 (선택 사항)
+
+    Returns:
+        이미지 목록
+    """
+    projection_stage = _build_list_projection(view, fields, include_analysis)
 
-    grid_out = database.fs.get(file_id)
+    if cursor:
+        filter_query = {**filter_query, **_decode_page_cursor(cursor)}
 
-    return grid_out.read(), image_doc["content_type"]
+    pipeline = [
+        {"$match": filter_query},
+        {"$sort": dict(IMAGE_LIST_SORT)},
+        {"$limit": limit}
+    ]
+    if include_analysis:
+        pipeline.extend(_analysis_lookup_stage(summary=True))
+    pipeline.append(projection_stage)
 
-async def get_recent_images(limit: int = 10, user_id: str = None):
+    db_cursor = database.images_collection.aggregate(pipeline)
+    return await db_cursor.to_list(length=limit)
+
+async def get_recent_images(limit: int = 10, user_id: str = None, include_analysis: bool = False, cursor: str = None,
+                            view: str = "full", fields: str = None):
     """
     최근 이미지 목록을 조회합니다.
 
     Args:
         limit: 조회할 이미지 수
         user_id: 특정 사용자의 이미지만 조회할 경우 사용자 ID
+        include_analysis: True이면 각 이미지에 분석 요약을 함께 반환
+        cursor: 이전 페이지에서 받은 페이지 커서 (선택 사항)
+        view: 미리 정의된 뷰 이름 (full, card)
+        fields: 쉼표로 구분한 필드 목록 (선택 사항)
 
     Returns:
         최근 이미지 목록
@@ -228,22 +859,20 @@ async def get_recent_images(limit: int = 10, user_id: str = None):
     if user_id:
         filter_query["user_id"] = user_id
 
-    cursor = database.images_collection.find(filter_query).sort("created_at", -1).limit(limit)
-    images = await cursor.to_list(length=limit)
-
-    # _id 필드를 문자열로 변환
-    for image in images:
-        image["_id"] = str(image["_id"])
-
-    return images
+    return await _find_images(filter_query, limit, include_analysis, cursor, view, fields)
 
-async def get_images_by_user_id(user_id: str, limit: int = 50):
+async def get_images_by_user_id(user_id: str, limit: int = 50, include_analysis: bool = False, cursor: str = None,
+                                view: str = "full", fields: str = None):
     """
     특정 사용자의 이미지 목록을 조회합니다.
 
     Args:
         user_id: 사용자 ID
         limit: 조회할 최대 이미지 수
+        include_analysis: True이면 각 이미지에 분석 요약을 함께 반환
+        cursor: 이전 페이지에서 받은 페이지 커서 (선택 사항)
+        view: 미리 정의된 뷰 이름 (full, card)
+        fields: 쉼표로 구분한 필드 목록 (선택 사항)
 
     Returns:
         사용자의 이미지 목록
@@ -251,16 +880,10 @@ async def get_images_by_user_id(user_id: str, limit: int = 50):
     if not user_id:
         raise HTTPException(status_code=400, detail="사용자 ID가 필요합니다")
 
-    cursor = database.images_collection.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
-    images = await cursor.to_list(length=limit)
-
-    # _id 필드를 문자열로 변환
-    for image in images:
-        image["_id"] = str(image["_id"])
-
-    return images
+    return await _find_images({"user_id": user_id}, limit, include_analysis, cursor, view, fields)
 
-async def get_images_by_category(category: str, limit: int = 50, user_id: str = None):
+async def get_images_by_category(category: str, limit: int = 50, user_id: str = None, include_analysis: bool = False, cursor: str = None,
+                                 view: str = "full", fields: str = None):
     """
     특정 카테고리의 이미지 목록을 조회합니다.
 
@@ -268,6 +891,10 @@ async def get_images_by_category(category: str, limit: int = 50, user_id: str =
         category: 이미지 카테고리
         limit: 조회할 최대 이미지 수
         user_id: 특정 사용자의 이미지만 조회할 경우 사용자 ID
+        include_analysis: True이면 각 이미지에 분석 요약을 함께 반환
+        cursor: 이전 페이지에서 받은 페이지 커서 (선택 사항)
+        view: 미리 정의된 뷰 이름 (full, card)
+        fields: 쉼표로 구분한 필드 목록 (선택 사항)
 
     Returns:
         카테고리별 이미지 목록
@@ -280,11 +907,4 @@ async def get_images_by_category(category: str, limit: int = 50, user_id: str =
     if user_id:
         filter_query["user_id"] = user_id
 
-    cursor = database.images_collection.find(filter_query).sort("created_at", -1).limit(limit)
-    images = await cursor.to_list(length=limit)
-
-    # _id 필드를 문자열로 변환
-    for image in images:
-        image["_id"] = str(image["_id"])
-
-    return images
+    return await _find_images(filter_query, limit, include_analysis, cursor, view, fields)
@@ -0,0 +1,297 @@
+"""
+비동기 이미지 분석 작업
+
+업로드한 이미지를 저장한 뒤 바로 작업 ID를 반환하고,
+제한된 수의 워커가 큐에서 작업을 꺼내 Vision 분석과 결과 저장을 수행합니다.
+작업 상태는 MongoDB에 기록하므로 어느 워커 프로세스에서든 조회할 수 있습니다.
+
+분석이 실패한 작업의 이미지는 삭제하지 않습니다. 작업 문서의 image_id로 이미지를 조회할 수 있습니다.
+서버가 종료될 때 처리하지 못한 작업은 실패로 기록합니다.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile
+from . import database, image_service
+
+# 환경 변수 로드
+load_dotenv()
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+
+# 작업 상태
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+FINISHED_STATUSES = (COMPLETED, FAILED)
+
+QUEUE_FULL_DETAIL = "분석 작업 대기열이 가득 찼습니다. 잠시 후 다시 시도해 주세요"
+
+class JobQueue:
+    """
+    크기 제한이 있는 분석 작업 큐와 워커 풀
+    """
+
+    def __init__(self, workers: int, maxsize: int):
+        self.worker_count = workers
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.busy_workers = 0
+        # 이미지 저장 중인 요청이 예약한 큐 자리 수
+        self.reserved = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self._workers = []
+        # 이 프로세스에서 처리 중인 작업의 상태 변경 알림
+        self._events = {}
+        # 종료로 중단된 작업 ID
+        self._interrupted = []
+
+    def start(self):
+        """
+        워커 태스크를 시작합니다.
+        """
+        if self._workers:
+            return
+        self.started_at = time.monotonic()
+        self._workers = [asyncio.create_task(self._run_worker()) for _ in range(self.worker_count)]
+
+    async def stop(self):
+        """
+        워커 태스크를 중지하고, 처리 중이거나 큐에 남은 작업을 실패로 기록합니다.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        unfinished = self._interrupted
+        self._interrupted = []
+        while not self.queue.empty():
+            job_id, _ = self.queue.get_nowait()
+            unfinished.append(job_id)
+        if not unfinished:
+            return
+
+        now = datetime.now()
+        try:
+            await database.jobs_collection.update_many(
+                {"job_id": {"$in": unfinished}, "status": {"$in": [QUEUED, PROCESSING]}},
+                {"$set": {"status": FAILED, "error": "서버 종료로 작업을 처리하지 못했습니다", "finished_at": now, "updated_at": now}}
+            )
+        except Exception as e:
+            print(f"종료 시 미처리 작업 기록 중 오류 발생: {str(e)}")
+
+    def is_full(self):
+        return self.queue.maxsize > 0 and self.queue.qsize() + self.reserved >= self.queue.maxsize
+
+    def reserve(self):
+        """
+        큐 자리를 하나 예약합니다. 자리가 없으면 False를 반환합니다.
+        이미지 저장 등 await 전에 예약해야 동시에 들어온 요청이 큐 크기를 넘지 않습니다.
+        """
+        if self.is_full():
+            return False
+        self.reserved += 1
+        return True
+
+    def release(self):
+        """
+        예약한 큐 자리를 반납합니다. (작업을 넣지 못한 경우)
+        """
+        self.reserved -= 1
+
+    def enqueue(self, job_id: str, image_id: str):
+        """
+        예약한 자리에 작업을 넣습니다.
+        이미지 바이너리는 큐에 보관하지 않고, 워커가 처리할 때 저장소에서 다시 읽습니다.
+        """
+        self.queue.put_nowait((job_id, image_id))
+        self.reserved -= 1
+        self._events[job_id] = asyncio.Event()
+
+    def notify(self, job_id: str):
+        """
+        작업 상태가 바뀌었음을 대기 중인 요청에 알립니다.
+        """
+        event = self._events.get(job_id)
+        if event is not None:
+            event.set()
+            self._events[job_id] = asyncio.Event()
+
+    async def wait_for_update(self, job_id: str, timeout: float):
+        """
+        작업 상태가 바뀌거나 시간이 초과될 때까지 기다립니다.
+        다른 프로세스의 작업이면 시간 초과까지 기다린 뒤 반환합니다.
+        """
+        event = self._events.get(job_id)
+        try:
+            if event is None:
+                await asyncio.sleep(timeout)
+            else:
+                await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_worker(self):
+        while True:
+            job_id, image_id = await self.queue.get()
+            self.busy_workers += 1
+            started = time.monotonic()
+            try:
+                await _process_job(job_id, image_id)
+                self.processed += 1
+            except asyncio.CancelledError:
+                # 종료로 중단된 작업은 stop()에서 실패로 기록
+                self._interrupted.append(job_id)
+                raise
+            except Exception:
+                self.failed += 1
+            finally:
+                self.busy_workers -= 1
+                self.busy_seconds += time.monotonic() - started
+                self.queue.task_done()
+                self.notify(job_id)
+                self._events.pop(job_id, None)
+
+    def stats(self):
+        """
+        큐 깊이와 워커 사용률을 반환합니다.
+        """
+        uptime = time.monotonic() - self.started_at if self.started_at else 0
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "reserved": self.reserved,
+            "workers": self.worker_count,
+            "busy_workers": self.busy_workers,
+            "utilization": self.busy_workers / self.worker_count if self.worker_count else 0,
+            "average_utilization": self.busy_seconds / (uptime * self.worker_count) if uptime and self.worker_count else 0,
+            "processed": self.processed,
+            "failed": self.failed
+        }
+
+job_queue = JobQueue(JOB_WORKERS, JOB_QUEUE_SIZE)
+
+async def _update_job(job_id: str, **fields):
+    """
+    작업 문서를 갱신하고 상태 변경을 알립니다.
+    """
+    fields["updated_at"] = datetime.now()
+    await database.jobs_collection.update_one({"job_id": job_id}, {"$set": fields})
+    job_queue.notify(job_id)
+
+async def _process_job(job_id: str, image_id: str):
+    """
+    작업 하나를 처리합니다. (이미지 읽기 → 분석 → 분류 → 결과 저장)
+    """
+    await _update_job(job_id, status=PROCESSING, started_at=datetime.now())
+    try:
+        result = await image_service.analyze_stored_image(image_id)
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        await _update_job(job_id, status=FAILED, error=detail, finished_at=datetime.now())
+        raise
+    await _update_job(job_id, status=COMPLETED, result=result, finished_at=datetime.now())
+
+async def _discard_submission(image_doc: dict, job_doc: dict):
+    """
+    큐에 넣지 못한 작업의 작업 문서와 저장된 이미지를 삭제합니다.
+    """
+    if job_doc is not None:
+        try:
+            await database.jobs_collection.delete_one({"job_id": job_doc["job_id"]})
+        except Exception as e:
+            print(f"작업 문서 정리 중 오류 발생 ({job_doc['job_id']}): {str(e)}")
+    if image_doc is not None:
+        await image_service.discard_saved_image(image_doc)
+
+async def submit_analysis_job(file: UploadFile, content: bytes, content_type: str, user_id: str = None, category: str = None):
+    """
+    이미지를 저장하고 분석 작업을 생성해 큐에 넣습니다.
+    큐 자리를 이미지 저장 전에 예약하므로 대기열이 가득 차면 아무것도 저장하지 않고 503을 반환합니다.
+    작업을 큐에 넣지 못하면 저장한 이미지와 작업 문서를 삭제합니다.
+
+    Args:
+        file: 업로드된 파일 객체
+        content: 이미지 바이너리 데이터
+        content_type: 시그니처로 판별한 이미지 MIME 유형
+        user_id: 사용자 ID (선택 사항)
+        category: 이미지 카테고리 (선택 사항)
+
+    Returns:
+        (저장된 이미지 문서, 생성된 작업 문서) 튜플
+    """
+    if not job_queue.reserve():
+        raise HTTPException(status_code=503, detail=QUEUE_FULL_DETAIL)
+
+    image_doc = None
+    job_doc = None
+    try:
+        image_doc = await image_service.save_image_to_db(file, content, content_type, user_id, category)
+
+        now = datetime.now()
+        job_doc = {
+            "job_id": str(uuid.uuid4()),
+            "image_id": image_doc["image_id"],
+            "user_id": image_doc["user_id"],
+            "status": QUEUED,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        await database.jobs_collection.insert_one(job_doc)
+        job_doc.pop("_id", None)
+
+        job_queue.enqueue(job_doc["job_id"], image_doc["image_id"])
+    except BaseException as e:
+        job_queue.release()
+        await _discard_submission(image_doc, job_doc)
+        if isinstance(e, asyncio.QueueFull):
+            raise HTTPException(status_code=503, detail=QUEUE_FULL_DETAIL)
+        raise
+
+    return image_doc, job_doc
+
+async def get_job(job_id: str):
+    """
+    작업 상태를 조회합니다.
+
+    Args:
+        job_id: 작업 ID
+
+    Returns:
+        작업 문서
+    """
+    job_doc = await database.jobs_collection.find_one({"job_id": job_id}, {"_id": 0})
+    if not job_doc:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return job_doc
+
+async def watch_job(job_id: str, timeout: float = 300, poll_interval: float = 1.0):
+    """
+    작업이 끝날 때까지 상태가 바뀔 때마다 작업 문서를 내보냅니다.
+
+    Args:
+        job_id: 작업 ID
+        timeout: 최대 대기 시간 (초)
+        poll_interval: 다른 프로세스의 작업을 다시 조회하는 간격 (초)
+    """
+    deadline = time.monotonic() + timeout
+    last_status = None
+    while True:
+        job_doc = await get_job(job_id)
+        if (job_doc["status"], job_doc["updated_at"]) != last_status:
+            last_status = (job_doc["status"], job_doc["updated_at"])
+            yield job_doc
+        if job_doc["status"] in FINISHED_STATUSES or time.monotonic() >= deadline:
+            return
+        await job_queue.wait_for_update(job_id, poll_interval)
@@ -1,19 +1,20 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import HTMLResponse, Response, FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from google.cloud import vision
 import os
 from dotenv import load_dotenv
 from typing import List, Optional
 import io
 import asyncio
+import uuid
+from datetime import date, timedelta
 
 # 재활용 분류 모듈 가져오기
-from app.recycling import RecyclingClassifier, get_korean_material_name
+from app.recycling import get_classifier, get_korean_material_name
 # 데이터베이스 및 이미지 서비스 가져오기
-from app import database, image_service
+from app import analytics, cache, carbon, compression, database, idempotency, image_service, jobs, metrics, mongo_monitoring, profiling, responses, stats, timing, tracing, uploads, vision_api
 
 # Load environment variables from .env file if it exists
 load_dotenv()
@@ -25,17 +26,50 @@ credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 app = FastAPI(
     title="Carbon Neutral Vision API",
     description="API for analyzing images using Google Vision API",
-    version="1.0.0"
+    version="1.0.0",
+    # 반환값을 orjson으로 직렬화 (Response를 직접 반환하는 엔드포인트는 인코더 순회도 생략)
+    default_response_class=responses.FastJSONResponse
 )
 
 # Set up templates
 templates = Jinja2Templates(directory="app/templates")
 
+# 목록 조회 시 한 번에 반환하는 최대 항목 수
+MAX_PAGE_SIZE = 100
+
+# 준비 상태 확인 시 MongoDB 응답 대기 시간 (초)
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+# 시작 준비 완료 여부 (준비 상태 확인용)
+services_ready = False
+
 # 데이터베이스 초기화 이벤트 핸들러
 @app.on_event("startup")
 async def startup_db_client():
     await database.init_db()
     print("MongoDB 연결 및 초기화 완료")
+    await cache.start_shared_tier()
+    jobs.job_queue.start()
+    await warm_up_services()
+
+async def warm_up_services():
+    """
+    요청을 받기 전에 분류기와 연결 풀을 미리 준비합니다.
+    """
+    global services_ready
+    get_classifier()
+    # GridFS 저장소에서 사용하는 동기 클라이언트도 미리 연결
+    await asyncio.to_thread(database.sync_client.admin.command, "ping")
+    if vision_api.VISION_WARMUP:
+        await asyncio.to_thread(vision_api.warm_up)
+    services_ready = True
+
+@app.on_event("shutdown")
+async def shutdown_background_services():
+    await jobs.job_queue.stop()
+    await cache.stop_shared_tier()
+    metrics.mark_process_dead()
+    tracing.shutdown()
 
 # Get CORS settings from environment variables
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
@@ -49,21 +83,145 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed", "Server-Timing", "X-Profile-Id"],
 )
 
-# Initialize Vision client
-try:
-    vision_client = vision.ImageAnnotatorClient()
-except Exception as e:
-    print(f"Error initializing Vision API client: {e}")
-    # We'll continue and handle errors in the endpoints
+# 요청 프로파일링 (PROFILING_TOKEN 또는 PROFILING_SAMPLE_RATE를 설정한 경우에만 등록)
+if profiling.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+# 업로드 본문 크기 제한 및 동시 업로드 바이트 예산
+app.add_middleware(uploads.UploadLimitMiddleware)
+
+# 응답 압축 (JSON 등 텍스트 응답만, 이미지와 SSE 스트림은 제외)
+if compression.COMPRESSION_ENABLED:
+    app.add_middleware(compression.CompressionMiddleware)
+
+# 요청별 단계 시간 (Server-Timing 헤더)
+app.add_middleware(timing.ServerTimingMiddleware)
+
+# 요청 수 및 처리 시간 지표 (압축을 포함한 전체 처리 시간 측정)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# 분산 추적 (TRACING_EXPORTER를 설정한 경우에만 등록, 데이터베이스 클라이언트 생성 전에 설정)
+tracing.setup()
+if tracing.TRACING_ENABLED:
+    app.add_middleware(tracing.TracingMiddleware)
+
+def next_cursor_headers(images: list, limit: int):
+    """
+    목록 응답의 다음 페이지 커서 헤더를 생성합니다.
+    """
+    next_cursor = image_service.get_next_page_cursor(images, limit)
+    return {"X-Next-Cursor": next_cursor} if next_cursor else None
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+@app.get("/health/live")
+async def health_live():
+    """
+    프로세스가 요청을 처리할 수 있는지 확인합니다. (외부 의존성은 확인하지 않음)
+    """
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+async def health_ready():
+    """
+    시작 준비가 끝났고 MongoDB에 연결할 수 있는지 확인합니다.
+    준비되지 않았으면 503을 반환합니다.
+    """
+    if not services_ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+
+    try:
+        await asyncio.wait_for(database.client.admin.command("ping"), HEALTH_CHECK_TIMEOUT)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "detail": f"MongoDB 연결 실패: {str(e)}"})
+
+    return {"status": "ready", "queue_depth": jobs.job_queue.stats()["queue_depth"]}
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus 지표를 반환합니다.
+    """
+    return Response(content=metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/debug/mongo/slow-queries")
+async def get_slow_queries(limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """
+    느린 MongoDB 쿼리 형태를 누적 시간이 긴 순서로 조회합니다. (현재 프로세스 기준)
+
+    - **limit**: 조회할 최대 개수 (기본값: 20, 최대: 100)
+
+    명령, 컬렉션, 필터 형태(값 제거), 정렬, 횟수, 평균/최대 시간과
+    explain 표본이 있으면 실행 계획(전체 스캔 여부, 사용한 인덱스)을 반환합니다.
+    """
+    return {
+        "threshold_ms": mongo_monitoring.MONGO_SLOW_MS,
+        "queries": mongo_monitoring.slow_query_log.top(limit)
+    }
+
+@app.get("/debug/profiles")
+async def list_profiles(request: Request, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """
+    최근 저장된 요청 프로파일 목록을 조회합니다.
+
+    - **limit**: 조회할 최대 개수 (기본값: 20, 최대: 100)
+    - **X-Profile-Token** 헤더: PROFILING_TOKEN과 같은 값 (토큰이 설정되지 않은 경우 조회 불가)
+
+    프로파일 ID, 요청 경로, 상태 코드, 처리 시간 등의 목록을 최신순으로 반환합니다.
+    """
+    profiling.check_access(request)
+    return {"profiles": await asyncio.to_thread(profiling.list_profiles, limit)}
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(request: Request, profile_id: str):
+    """
+    저장된 요청 프로파일을 반환합니다. (HTML, speedscope JSON 또는 cProfile 통계 파일)
+
+    - **profile_id**: 응답의 X-Profile-Id 헤더 값
+    - **X-Profile-Token** 헤더: PROFILING_TOKEN과 같은 값 (토큰이 설정되지 않은 경우 조회 불가)
+    """
+    profiling.check_access(request)
+    profile_file = profiling.get_profile_file(profile_id)
+    if profile_file is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다")
+    path, media_type = profile_file
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path), content_disposition_type="inline")
+
+@app.post("/analyze/")
+async def analyze(request: Request, file: UploadFile = File(...), analyses: str = ",".join(image_service.ANALYSIS_FEATURES)):
+    """
+    한 번의 업로드와 한 번의 Vision API 호출로 여러 분석을 함께 수행합니다.
+
+    - **file**: 분석할 이미지 파일
+    - **analyses**: 쉼표로 구분한 분석 목록 (`labels`, `objects`, `text`, `carbon`, `recycling`, 기본값: 전체)
+
+    요청한 분석에 필요한 Vision 기능을 합쳐 한 번만 호출하고,
+    라벨/객체/텍스트 결과와 탄소 발자국 및 재활용 분석을 하나의 문서로 반환합니다.
+    """
+    try:
+        selected = image_service.parse_analyses(analyses)
+
+        # 이미지 콘텐츠 읽기 (크기 제한 및 형식 확인)
+        content, content_type = await uploads.read_image(file)
+
+        result = await image_service.analyze_combined(content, selected)
+        return responses.negotiated(request, {
+            "filename": file.filename,
+            "content_type": content_type,
+            **result
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"통합 분석 중 오류 발생: {str(e)}")
+
 @app.post("/analyze-image/")
-async def analyze_image(file: UploadFile = File(...)):
+async def analyze_image(request: Request, file: UploadFile = File(...)):
     """
     Analyze an image using Google Vision API to detect labels.
 
@@ -72,30 +230,34 @@ async def analyze_image(file: UploadFile = File(...)):
     Returns a list of labels detected in the image with confidence scores.
     """
     try:
-        # Read image content
-        content = await file.read()
+        # Read image content (크기 제한 및 형식 확인)
+        content, content_type = await uploads.read_image(file)
 
-        # Create Vision API image
-        image = vision.Image(content=content)
+        # Create Vision API image (the client is created on first use, so get it in a worker thread)
+        image = vision_api.make_image(content)
+        vision_client = await asyncio.to_thread(vision_api.get_client)
 
-        # Perform label detection
-        response = vision_client.label_detection(image=image)
+        # Perform label detection (blocking RPC, run in a worker thread to keep the event loop free)
+        with metrics.vision_call("label_detection"):
+            response = await asyncio.to_thread(vision_client.label_detection, image=image)
         labels = response.label_annotations
 
         # Return results
-        return {
+        return responses.negotiated(request, {
             "filename": file.filename,
-            "content_type": file.content_type,
+            "content_type": content_type,
             "labels": [
                 {"description": label.description, "score": label.score}
                 for label in labels
             ]
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing image: {str(e)}")
 
 @app.post("/detect-text/")
-async def detect_text(file: UploadFile = File(...)):
+async def detect_text(request: Request, file: UploadFile = File(...)):
     """
     Detect text in an image using Google Vision API.
 
@@ -104,39 +266,43 @@ async def detect_text(file: UploadFile = File(...)):
     Returns the text detected in the image.
     """
     try:
-        # Read image content
-        content = await file.read()
+        # Read image content (크기 제한 및 형식 확인)
+        content, content_type = await uploads.read_image(file)
 
-        # Create Vision API image
-        image = vision.Image(content=content)
+        # Create Vision API image (the client is created on first use, so get it in a worker thread)
+        image = vision_api.make_image(content)
+        vision_client = await asyncio.to_thread(vision_api.get_client)
 
-        # Perform text detection
-        response = vision_client.text_detection(image=image)
+        # Perform text detection (blocking RPC, run in a worker thread to keep the event loop free)
+        with metrics.vision_call("text_detection"):
+            response = await asyncio.to_thread(vision_client.text_detection, image=image)
         texts = response.text_annotations
 
         # Return results
         if texts:
-            return {
+            return responses.negotiated(request, {
                 "filename": file.filename,
-                "content_type": file.content_type,
+                "content_type": content_type,
                 "text": texts[0].description,
                 "text_details": [
                     {"description": text.description, "locale": text.locale}
                     for text in texts[1:]
                 ]
-            }
+            })
         else:
-            return {
+            return responses.negotiated(request, {
                 "filename": file.filename,
-                "content_type": file.content_type,
+                "content_type": content_type,
                 "text": "",
                 "text_details": []
-            }
+            })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting text: {str(e)}")
 
 @app.post("/detect-objects/")
-async def detect_objects(file: UploadFile = File(...)):
+async def detect_objects(request: Request, file: UploadFile = File(...)):
     """
     Detect objects in an image using Google Vision API.
 
@@ -145,20 +311,22 @@ async def detect_objects(file: UploadFile = File(...)):
     Returns a list of objects detected in the image with confidence scores.
     """
     try:
-        # Read image content
-        content = await file.read()
+        # Read image content (크기 제한 및 형식 확인)
+        content, content_type = await uploads.read_image(file)
 
-        # Create Vision API image
-        image = vision.Image(content=content)
+        # Create Vision API image (the client is created on first use, so get it in a worker thread)
+        image = vision_api.make_image(content)
+        vision_client = await asyncio.to_thread(vision_api.get_client)
 
-        # Perform object detection
-        response = vision_client.object_localization(image=image)
+        # Perform object detection (blocking RPC, run in a worker thread to keep the event loop free)
+        with metrics.vision_call("object_localization"):
+            response = await asyncio.to_thread(vision_client.object_localization, image=image)
         objects = response.localized_object_annotations
 
         # Return results
-        return {
+        return responses.negotiated(request, {
             "filename": file.filename,
-            "content_type": file.content_type,
+            "content_type": content_type,
             "objects": [
                 {
                     "name": obj.name,
@@ -170,12 +338,14 @@ async def detect_objects(file: UploadFile = File(...)):
                 }
                 for obj in objects
             ]
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting objects: {str(e)}")
 
 @app.post("/analyze-carbon-footprint/")
-async def analyze_carbon_footprint(file: UploadFile = File(...)):
+async def analyze_carbon_footprint(request: Request, file: UploadFile = File(...)):
     """
     Analyze an image to estimate carbon footprint based on detected objects.
 
@@ -184,85 +354,29 @@ async def analyze_carbon_footprint(file: UploadFile = File(...)):
     Returns an analysis of potential carbon impact based on objects detected in the image.
     """
     try:
-        # Read image content
-        content = await file.read()
+        # Read image content (크기 제한 및 형식 확인)
+        content, content_type = await uploads.read_image(file)
 
-        # Create Vision API image
-        image = vision.Image(content=content)
+        # Create Vision API image (the client is created on first use, so get it in a worker thread)
+        image = vision_api.make_image(content)
+        vision_client = await asyncio.to_thread(vision_api.get_client)
 
-        # Perform both label and object detection for better analysis
-        label_response = vision_client.label_detection(image=image)
-        object_response = vision_client.object_localization(image=image)
+        # Perform both label and object detection for better analysis (blocking RPCs, run in worker threads)
+        with metrics.vision_call("label_detection"):
+            label_response = await asyncio.to_thread(vision_client.label_detection, image=image)
+        with metrics.vision_call("object_localization"):
+            object_response = await asyncio.to_thread(vision_client.object_localization, image=image)
 
         labels = label_response.label_annotations
         objects = object_response.localized_object_annotations
 
-        # Simple carbon footprint estimation logic
-        # This is a placeholder - in a real application, you would have a more sophisticated model
-        carbon_indicators = {
-            "car": 120,  # Example CO2 value in g/km
-            "vehicle": 100,
-            "truck": 200,
-            "factory": 500,
-            "plastic": 80,
-            "paper": 30,
-            "tree": -20,  # Negative value for carbon-reducing items
-            "forest": -100,
-            "plant": -10,
-            "solar panel": -50,
-            "wind turbine": -80,
-        }
-
-        # Analyze detected items
-        carbon_impact = []
-        total_score = 0
-
-        # Check labels
-        for label in labels:
-            label_name = label.description.lower()
-            for indicator, value in carbon_indicators.items():
-                if indicator in label_name:
-                    impact = {
-                        "item": label.description,
-                        "carbon_value": value,
-                        "confidence": label.score,
-                        "weighted_impact": value * label.score
-                    }
-                    carbon_impact.append(impact)
-                    total_score += impact["weighted_impact"]
-
-        # Check objects
-        for obj in objects:
-            obj_name = obj.name.lower()
-            for indicator, value in carbon_indicators.items():
-                if indicator in obj_name:
-                    impact = {
-                        "item": obj.name,
-                        "carbon_value": value,
-                        "confidence": obj.score,
-                        "weighted_impact": value * obj.score
-                    }
-                    carbon_impact.append(impact)
-                    total_score += impact["weighted_impact"]
-
-        # Determine overall assessment
-        if total_score < -50:
-            assessment = "Very Positive - Carbon reducing"
-        elif total_score < 0:
-            assessment = "Positive - Slightly carbon reducing"
-        elif total_score < 50:
-            assessment = "Neutral - Limited carbon impact"
-        elif total_score < 150:
-            assessment = "Negative - Moderate carbon footprint"
-        else:
-            assessment = "Very Negative - High carbon footprint"
+        # 감지된 라벨과 객체로 탄소 발자국 추정
+        carbon_footprint = carbon.estimate_carbon_footprint(labels, objects)
 
-        return {
+        return responses.negotiated(request, {
             "filename": file.filename,
-            "content_type": file.content_type,
-            "carbon_impact_details": carbon_impact,
-            "total_carbon_score": total_score,
-            "assessment": assessment,
+            "content_type": content_type,
+            **carbon_footprint,
             "detected_labels": [
                 {"description": label.description, "score": label.score}
                 for label in labels
@@ -271,12 +385,14 @@ async def analyze_carbon_footprint(file: UploadFile = File(...)):
                 {"name": obj.name, "score": obj.score}
                 for obj in objects
             ]
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing carbon footprint: {str(e)}")
 
 @app.post("/analyze-recycling/")
-async def analyze_recycling(file: UploadFile = File(...)):
+async def analyze_recycling(request: Request, file: UploadFile = File(...)):
     """
     이미지를 분석하여 재활용 가능 여부와 분리수거 방법을 제공합니다.
 
@@ -285,29 +401,33 @@ async def analyze_recycling(file: UploadFile = File(...)):
     이미지에서 감지된 재질과 재활용 권장사항을 반환합니다.
     """
     try:
-        # 이미지 콘텐츠 읽기
-        content = await file.read()
+        # 이미지 콘텐츠 읽기 (크기 제한 및 형식 확인)
+        content, content_type = await uploads.read_image(file)
 
-        # Vision API 이미지 생성
-        image = vision.Image(content=content)
+        # Vision API 이미지 생성 (클라이언트는 처음 사용할 때 생성되므로 스레드에서 가져옴)
+        image = vision_api.make_image(content)
+        vision_client = await asyncio.to_thread(vision_api.get_client)
 
-        # 라벨 및 객체 감지 수행
-        label_response = vision_client.label_detection(image=image)
-        object_response = vision_client.object_localization(image=image)
+        # 라벨 및 객체 감지 수행 (동기 RPC이므로 이벤트 루프를 막지 않도록 스레드에서 실행)
+        with metrics.vision_call("label_detection"):
+            label_response = await asyncio.to_thread(vision_client.label_detection, image=image)
+        with metrics.vision_call("object_localization"):
+            object_response = await asyncio.to_thread(vision_client.object_localization, image=image)
 
         labels = label_response.label_annotations
         objects = object_response.localized_object_annotations
 
-        # 재활용 분류기 초기화
-        recycling_classifier = RecyclingClassifier()
+        # 공유 재활용 분류기
+        recycling_classifier = get_classifier()
 
         # 재활용 분석 수행
-        recycling_analysis = recycling_classifier.analyze_image_for_recycling(labels, objects)
+        with metrics.stage("classify"):
+            recycling_analysis = recycling_classifier.analyze_image_for_recycling(labels, objects)
 
         # 결과 반환
-        return {
+        return responses.negotiated(request, {
             "filename": file.filename,
-            "content_type": file.content_type,
+            "content_type": content_type,
             "recycling_analysis": recycling_analysis,
             "detected_labels": [
                 {"description": label.description, "score": label.score}
@@ -317,60 +437,204 @@ async def analyze_recycling(file: UploadFile = File(...)):
                 {"name": obj.name, "score": obj.score}
                 for obj in objects
             ]
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"재활용 분석 중 오류 발생: {str(e)}")
 
 @app.post("/analyze-and-save/")
-async def analyze_and_save(file: UploadFile = File(...), user_id: str = None, category: str = None):
+async def analyze_and_save(request: Request, file: UploadFile = File(...), user_id: str = None, category: str = None, async_mode: bool = False,
+                           idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """
     이미지를 분석하고 MongoDB에 저장합니다.
 
     - **file**: 분석할 이미지 파일
     - **user_id**: 사용자 ID (선택 사항)
     - **category**: 이미지 카테고리 (선택 사항)
+    - **async_mode**: true이면 이미지만 저장한 뒤 202와 작업 ID를 바로 반환 (기본값: false)
+    - **Idempotency-Key** 헤더: 재시도 시 같은 값을 보내면 처음 요청의 응답을 그대로 반환 (선택 사항)
 
     이미지 분석 결과와 저장된 이미지 정보를 반환합니다.
+    비동기 모드에서는 `/jobs/{job_id}`로 상태를 조회하거나 `/jobs/{job_id}/events`로 진행 상황을 구독합니다.
     """
     try:
-        # 이미지 콘텐츠 읽기
-        content = await file.read()
-
-        # 이미지를 MongoDB에 저장
-        image_doc = await image_service.save_image_to_db(file, content, user_id, category)
-
-        # 이미지 분석
-        labels, objects = await image_service.analyze_image_with_vision(content)
+        # 대기열이 가득 찬 경우 업로드를 읽기 전에 거절 (큐 자리 예약은 submit_analysis_job에서 수행)
+        if async_mode and jobs.job_queue.is_full():
+            raise HTTPException(status_code=503, detail=jobs.QUEUE_FULL_DETAIL)
+
+        # 이미지 콘텐츠 읽기 (크기 제한 및 형식 확인)
+        content, content_type = await uploads.read_image(file)
+
+        # 같은 키로 이미 처리된 요청이면 저장된 응답을 재사용
+        if idempotency_key is not None:
+            fingerprint = idempotency.request_fingerprint(
+                content, user_id=user_id, category=category, async_mode=async_mode
+            )
+            # 잠금을 이어받은 다른 요청의 키를 덮어쓰거나 해제하지 않도록 요청마다 소유자 토큰 사용
+            idempotency_owner = uuid.uuid4().hex
+            replay = await idempotency.begin(idempotency_key, fingerprint, idempotency_owner)
+            if replay is not None:
+                status_code, body = replay
+                return responses.negotiated(request, body, status_code, headers={
+                    **_analyze_and_save_headers(status_code, body), "Idempotent-Replayed": "true"
+                })
+
+        try:
+            status_code, body = await _analyze_and_save(file, content, content_type, user_id, category, async_mode)
+        except BaseException:
+            if idempotency_key is not None:
+                await idempotency.release(idempotency_key, idempotency_owner)
+            raise
+
+        if idempotency_key is not None:
+            await idempotency.complete(idempotency_key, idempotency_owner, status_code, body)
+
+        return responses.negotiated(request, body, status_code, headers=_analyze_and_save_headers(status_code, body))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"이미지 분석 및 저장 중 오류 발생: {str(e)}")
 
-        # 재활용 분석
-        recycling_analysis = await image_service.analyze_recycling(labels, objects)
+def _analyze_and_save_headers(status_code: int, body: dict):
+    """
+    /analyze-and-save/ 응답 헤더 (비동기 모드의 202 응답에는 작업 상태 URL을 Location으로 지정)
+    """
+    return {"Location": body["status_url"]} if status_code == 202 else {}
 
-        # 분석 결과 저장
-        analysis_doc = await image_service.save_analysis_result(
-            image_doc["image_id"],
-            recycling_analysis,
-            labels,
-            objects
-        )
+async def _analyze_and_save(file: UploadFile, content: bytes, content_type: str, user_id: str, category: str, async_mode: bool):
+    """
+    이미지를 저장하고 분석(동기 모드) 또는 분석 작업 등록(비동기 모드)을 수행합니다.
 
-        # 결과 반환
-        return {
+    Returns:
+        (상태 코드, 응답 본문) 튜플
+    """
+    if async_mode:
+        # 큐 자리를 예약하고 이미지를 MongoDB에 저장한 뒤 분석 작업 등록
+        image_doc, job_doc = await jobs.submit_analysis_job(file, content, content_type, user_id, category)
+        status_url = f"/jobs/{job_doc['job_id']}"
+        return 202, {
+            "job_id": job_doc["job_id"],
             "image_id": image_doc["image_id"],
-            "filename": image_doc["filename"],
-            "content_type": image_doc["content_type"],
-            "user_id": user_id,
-            "category": category,
-            "date": image_doc["date"],
-            "time": image_doc["time"],
-            "recycling_analysis": recycling_analysis,
-            "detected_labels": analysis_doc["detected_labels"],
-            "detected_objects": analysis_doc["detected_objects"]
+            "status": job_doc["status"],
+            "status_url": status_url,
+            "events_url": f"{status_url}/events"
         }
+
+    # 이미지 저장과 분석을 동시에 수행한 뒤 결과 저장
+    return 200, await image_service.analyze_and_save_image(file, content, content_type, user_id, category)
+
+@app.get("/jobs/stats")
+async def get_job_stats():
+    """
+    비동기 분석 작업 큐 상태를 조회합니다.
+
+    이 워커 프로세스의 큐 깊이, 처리 중인 워커 수, 워커 사용률, 처리/실패 건수를 반환합니다.
+    """
+    return jobs.job_queue.stats()
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(request: Request, job_id: str):
+    """
+    비동기 분석 작업 상태를 조회합니다.
+
+    - **job_id**: 작업 ID
+
+    작업 상태(queued, processing, completed, failed)와 완료 시 분석 결과를 반환합니다.
+    """
+    try:
+        return responses.negotiated(request, await jobs.get_job(job_id))
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"이미지 분석 및 저장 중 오류 발생: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"작업 상태 조회 중 오류 발생: {str(e)}")
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    비동기 분석 작업 진행 상황을 Server-Sent Events로 전송합니다.
+
+    - **job_id**: 작업 ID
+
+    상태가 바뀔 때마다 `status` 이벤트를 보내고, 작업이 끝나면 스트림을 닫습니다.
+    """
+    # 존재하지 않는 작업은 스트림을 열기 전에 404 반환
+    await jobs.get_job(job_id)
+
+    async def event_stream():
+        async for job_doc in jobs.watch_job(job_id):
+            yield f"event: status\ndata: {responses.dumps(job_doc).decode()}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/stats/user/{user_id}")
+async def get_user_stats(request: Request, user_id: str):
+    """
+    사용자의 재활용 및 탄소 절감 누적 통계를 조회합니다.
+
+    - **user_id**: 사용자 ID
+
+    분석 횟수, 재질별 집계, 총 탄소 영향 및 절감량을 반환합니다.
+    """
+    try:
+        return responses.negotiated(request, await stats.get_user_stats(user_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"사용자 통계 조회 중 오류 발생: {str(e)}")
+
+@app.get("/reports/carbon")
+async def get_carbon_report(request: Request, start: date = None, end: date = None, granularity: str = "day", category: str = None):
+    """
+    기간별 재활용 및 탄소 절감 추이를 조회합니다.
+
+    - **start**: 시작 날짜 (YYYY-MM-DD, 기본값: 종료 날짜 30일 전)
+    - **end**: 종료 날짜 (YYYY-MM-DD, 기본값: 오늘)
+    - **granularity**: 집계 단위 (`day` 또는 `week`, 기본값: day)
+    - **category**: 특정 카테고리만 조회할 경우 카테고리 (기본값: 전체)
+
+    구간별 분석 건수, 재질별 집계, 탄소 영향 및 절감량과 기간 합계를 반환합니다.
+    """
+    if granularity not in analytics.GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 집계 단위입니다: {granularity}")
+
+    end = end or date.today()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=400, detail="시작 날짜가 종료 날짜보다 늦습니다")
+
+    try:
+        return responses.negotiated(request, await analytics.get_carbon_report(start, end, granularity, category))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"기간별 통계 조회 중 오류 발생: {str(e)}")
+
+@app.get("/images/recent")
+async def get_recent_images(request: Request, limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), user_id: str = None, include_analysis: bool = False, cursor: str = None,
+                            view: str = "full", fields: str = None):
+    """
+    최근 분석된 이미지 목록을 조회합니다.
+
+    - **limit**: 조회할 이미지 수 (기본값: 10, 최대: 100)
+    - **user_id**: 특정 사용자의 이미지만 조회할 경우 사용자 ID (선택 사항)
+    - **include_analysis**: 각 이미지에 분석 요약을 함께 반환할지 여부 (기본값: false)
+    - **cursor**: 다음 페이지 조회용 커서 (이전 응답의 `X-Next-Cursor` 헤더 값)
+    - **view**: 응답 필드 구성 (`full`: 전체 필드, `card`: 목록 카드용 최소 필드, 기본값: full)
+    - **fields**: 쉼표로 구분한 반환 필드 목록 (지정 시 view보다 우선, 선택 사항)
+
+    최근 이미지 목록을 반환합니다. 다음 페이지가 있으면 `X-Next-Cursor` 헤더에 커서를 담습니다.
+    """
+    try:
+        images = await image_service.get_recent_images(limit, user_id, include_analysis, cursor, view, fields)
+        return responses.negotiated(request, images, headers=next_cursor_headers(images, limit))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"최근 이미지 조회 중 오류 발생: {str(e)}")
 
 @app.get("/images/{image_id}")
-async def get_image_info(image_id: str):
+async def get_image_info(request: Request, image_id: str):
     """
     저장된 이미지와 분석 결과를 조회합니다.
 
@@ -379,16 +643,13 @@ async def get_image_info(image_id: str):
     이미지 정보와 분석 결과를 반환합니다.
     """
     try:
-        # 이미지 정보 조회
-        image_doc = await image_service.get_image_by_id(image_id)
+        # 이미지 정보와 분석 결과를 한 번에 조회
+        image_doc, analysis_doc = await image_service.get_image_with_analysis(image_id)
 
-        # 분석 결과 조회
-        analysis_doc = await image_service.get_analysis_by_image_id(image_id)
-
-        return {
+        return responses.negotiated(request, {
             "image": image_doc,
             "analysis": analysis_doc
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -404,63 +665,94 @@ async def get_image_data(image_id: str):
     이미지 바이너리 데이터를 반환합니다.
     """
     try:
-        # 이미지 데이터 조회
-        content, content_type = await image_service.get_image_data(image_id)
+        # 이미지 저장 위치 조회
+        blob_storage, key, content_type = await image_service.get_image_blob(image_id)
 
-        return Response(content=content, media_type=content_type)
+        # 브라우저가 내용을 보고 다른 형식으로 해석하지 않도록 지정
+        headers = {"X-Content-Type-Options": "nosniff"}
+
+        # 로컬 파일이면 메모리에 올리지 않고 파일에서 바로 전송
+        path = blob_storage.local_path(key)
+        if path:
+            return FileResponse(path, media_type=content_type, headers=headers)
+
+        content = await asyncio.to_thread(blob_storage.get, key)
+
+        return Response(content=content, media_type=content_type, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"이미지 데이터 조회 중 오류 발생: {str(e)}")
 
-@app.get("/images/recent")
-async def get_recent_images(limit: int = 10, user_id: str = None):
+@app.get("/images/{image_id}/thumbnail")
+async def get_image_thumbnail(image_id: str, request: Request, size: int = 160):
     """
-    최근 분석된 이미지 목록을 조회합니다.
+    저장된 이미지의 썸네일을 조회합니다.
 
-    - **limit**: 조회할 이미지 수 (기본값: 10)
-    - **user_id**: 특정 사용자의 이미지만 조회할 경우 사용자 ID (선택 사항)
+    - **image_id**: 조회할 이미지 ID
+    - **size**: 썸네일 크기 (긴 변 기준 픽셀, 기본값: 160)
 
-    최근 이미지 목록을 반환합니다.
+    썸네일 JPEG 데이터를 반환합니다. 썸네일은 변경되지 않으므로 장기 캐시 헤더를 포함합니다.
     """
     try:
-        images = await image_service.get_recent_images(limit, user_id)
-        return images
+        etag = f'"{image_id}-{size}"'
+        cache_headers = {
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": etag
+        }
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=cache_headers)
+
+        content, content_type = await image_service.get_thumbnail_data(image_id, size)
+
+        return Response(content=content, media_type=content_type, headers=cache_headers)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"최근 이미지 조회 중 오류 발생: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"썸네일 조회 중 오류 발생: {str(e)}")
 
 @app.get("/images/user/{user_id}")
-async def get_user_images(user_id: str, limit: int = 50):
+async def get_user_images(request: Request, user_id: str, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), include_analysis: bool = False, cursor: str = None,
+                          view: str = "full", fields: str = None):
     """
     특정 사용자의 이미지 목록을 조회합니다.
 
     - **user_id**: 사용자 ID
-    - **limit**: 조회할 최대 이미지 수 (기본값: 50)
+    - **limit**: 조회할 최대 이미지 수 (기본값: 50, 최대: 100)
+    - **include_analysis**: 각 이미지에 분석 요약을 함께 반환할지 여부 (기본값: false)
+    - **cursor**: 다음 페이지 조회용 커서 (이전 응답의 `X-Next-Cursor` 헤더 값)
+    - **view**: 응답 필드 구성 (`full`: 전체 필드, `card`: 목록 카드용 최소 필드, 기본값: full)
+    - **fields**: 쉼표로 구분한 반환 필드 목록 (지정 시 view보다 우선, 선택 사항)
 
-    사용자의 이미지 목록을 반환합니다.
+    사용자의 이미지 목록을 반환합니다. 다음 페이지가 있으면 `X-Next-Cursor` 헤더에 커서를 담습니다.
     """
     try:
-        images = await image_service.get_images_by_user_id(user_id, limit)
-        return images
+        images = await image_service.get_images_by_user_id(user_id, limit, include_analysis, cursor, view, fields)
+        return responses.negotiated(request, images, headers=next_cursor_headers(images, limit))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"사용자 이미지 조회 중 오류 발생: {str(e)}")
 
 @app.get("/images/category/{category}")
-async def get_category_images(category: str, limit: int = 50, user_id: str = None):
+async def get_category_images(request: Request, category: str, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE), user_id: str = None, include_analysis: bool = False, cursor: str = None,
+                              view: str = "full", fields: str = None):
     """
     특정 카테고리의 이미지 목록을 조회합니다.
 
     - **category**: 이미지 카테고리
-    - **limit**: 조회할 최대 이미지 수 (기본값: 50)
+    - **limit**: 조회할 최대 이미지 수 (기본값: 50, 최대: 100)
     - **user_id**: 특정 사용자의 이미지만 조회할 경우 사용자 ID (선택 사항)
+    - **include_analysis**: 각 이미지에 분석 요약을 함께 반환할지 여부 (기본값: false)
+    - **cursor**: 다음 페이지 조회용 커서 (이전 응답의 `X-Next-Cursor` 헤더 값)
+    - **view**: 응답 필드 구성 (`full`: 전체 필드, `card`: 목록 카드용 최소 필드, 기본값: full)
+    - **fields**: 쉼표로 구분한 반환 필드 목록 (지정 시 view보다 우선, 선택 사항)
 
-    카테고리별 이미지 목록을 반환합니다.
+    카테고리별 이미지 목록을 반환합니다. 다음 페이지가 있으면 `X-Next-Cursor` 헤더에 커서를 담습니다.
     """
     try:
-        images = await image_service.get_images_by_category(category, limit, user_id)
-        return images
+        images = await image_service.get_images_by_category(category, limit, user_id, include_analysis, cursor, view, fields)
+        return responses.negotiated(request, images, headers=next_cursor_headers(images, limit))
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,196 @@
+"""
+Prometheus 지표
+
+요청 수/지연 시간, 처리 단계별 지연 시간과 오류, 기능별 Vision API 호출,
+업로드 바이트, 캐시 적중률, MongoDB 명령 처리 시간을 수집하고 `/metrics`에서 노출합니다.
+
+여러 워커 프로세스로 실행할 때는 PROMETHEUS_MULTIPROC_DIR에 빈 디렉터리를 지정하면
+모든 워커의 지표를 합쳐서 노출합니다.
+
+단계 측정:
+    with metrics.stage("storage_put"):
+        ...
+"""
+
+import os
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+from . import timing, tracing
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# 처리 단계 지연 시간 구간 (초) - Vision 호출은 수백 ms, DB/분류는 수 ms 단위
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP 요청 수",
+    ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간",
+    ["method", "route"], buckets=STAGE_BUCKETS
+)
+STAGE_DURATION = Histogram(
+    "pipeline_stage_duration_seconds", "처리 단계별 소요 시간",
+    ["stage"], buckets=STAGE_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "pipeline_stage_errors_total", "처리 단계별 오류 수",
+    ["stage"]
+)
+VISION_CALLS = Counter(
+    "vision_api_calls_total", "기능별 Vision API 호출 수",
+    ["feature"]
+)
+UPLOAD_BYTES = Counter(
+    "upload_bytes_total", "업로드된 이미지 바이트 수"
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "문서 캐시 조회 결과",
+    ["cache", "result"]
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "MongoDB 명령 처리 시간",
+    ["command", "collection"], buckets=STAGE_BUCKETS
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total", "실패한 MongoDB 명령 수",
+    ["command", "collection"]
+)
+
+class stage:
+    """
+    처리 단계 소요 시간을 측정하는 컨텍스트 관리자
+    예외가 발생하면 해당 단계의 오류 수를 증가시킵니다.
+    측정한 시간은 요청의 Server-Timing 기록에도 더해지고, 추적이 켜져 있으면 같은 이름의 스팬으로 기록됩니다.
+    """
+    __slots__ = ("name", "started", "span")
+
+    # 레이블 조회 비용을 줄이기 위해 단계별 지표 객체를 재사용
+    _histograms = {}
+    _errors = {}
+
+    def __init__(self, name: str, attributes: dict = None):
+        self.name = name
+        self.span = tracing.span(name, attributes)
+
+    def __enter__(self):
+        self.span.__enter__()
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ns = time.perf_counter_ns() - self.started
+        histogram = self._histograms.get(self.name)
+        if histogram is None:
+            histogram = self._histograms[self.name] = STAGE_DURATION.labels(self.name)
+        histogram.observe(elapsed_ns / 1e9)
+        timing.record(self.name, elapsed_ns)
+        if exc_type is not None:
+            errors = self._errors.get(self.name)
+            if errors is None:
+                errors = self._errors[self.name] = STAGE_ERRORS.labels(self.name)
+            errors.inc()
+        self.span.__exit__(exc_type, exc, tb)
+        return False
+
+def vision_call(*features: str):
+    """
+    Vision API 호출 한 건을 기록하고 소요 시간을 측정합니다.
+    여러 기능을 한 요청으로 실행하면(annotate_image) 호출 수는 기능마다 증가시키고,
+    소요 시간은 vision_annotate_image 단계로 한 번 기록합니다.
+
+    Args:
+        features: Vision 기능 이름 (label_detection, object_localization 등)
+    """
+    for feature in features:
+        VISION_CALLS.labels(feature).inc()
+    if len(features) == 1:
+        return stage(f"vision_{features[0]}", {"vision.feature": features[0]})
+    return stage("vision_annotate_image", {"vision.feature": list(features)})
+
+def record_upload(size: int):
+    """
+    업로드된 이미지 크기를 기록합니다.
+    """
+    UPLOAD_BYTES.inc(size)
+
+def record_cache_lookup(cache: str, result: str):
+    """
+    문서 캐시 조회 결과를 기록합니다.
+
+    Args:
+        cache: 캐시 이름 (image, analysis)
+        result: local_hit, shared_hit, miss 중 하나
+    """
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+# (명령, 컬렉션)별 지표 객체 (명령 리스너는 모든 명령마다 호출되므로 레이블 조회 생략)
+_mongo_histograms = {}
+
+def record_mongo_command(command: str, collection: str, seconds: float, failed: bool = False):
+    """
+    MongoDB 명령 처리 시간을 기록합니다.
+
+    Args:
+        command: 명령 이름 (find, insert, aggregate 등)
+        collection: 컬렉션 이름 (컬렉션이 없는 명령은 빈 문자열)
+        seconds: 처리 시간 (초)
+        failed: 명령 실패 여부
+    """
+    key = (command, collection)
+    histogram = _mongo_histograms.get(key)
+    if histogram is None:
+        histogram = _mongo_histograms[key] = MONGO_COMMAND_DURATION.labels(command, collection)
+    histogram.observe(seconds)
+    if failed:
+        MONGO_COMMAND_FAILURES.labels(command, collection).inc()
+
+class MetricsMiddleware:
+    """
+    요청 수와 처리 시간을 라우트 경로 템플릿 단위로 기록하는 ASGI 미들웨어
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # 경로 매개변수별로 시계열이 늘어나지 않도록 라우트 템플릿 사용
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_DURATION.labels(scope["method"], path).observe(time.perf_counter() - started)
+            REQUESTS.labels(scope["method"], path, str(status_code)).inc()
+
+def mark_process_dead():
+    """
+    다중 프로세스 모드에서 종료하는 워커의 지표 파일을 정리합니다.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+def render_latest():
+    """
+    현재 지표를 Prometheus 텍스트 형식으로 반환합니다.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
@@ -0,0 +1,173 @@
+"""
+이미지 바이너리 저장소 마이그레이션 도구
+
+기존 이미지(원본 및 썸네일)를 다른 저장소 백엔드로 복사하고
+이미지 문서의 저장소 정보를 갱신합니다.
+
+사용 예:
+    python -m app.migrate_storage --source gridfs --target filesystem
+    python -m app.migrate_storage --source gridfs --target filesystem --delete-source
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from . import database, storage
+
+def _source_filter(source: str):
+    """
+    원본 백엔드에 저장된 이미지 문서를 찾는 필터를 생성합니다.
+    """
+    if source == storage.GridFSStorage.name:
+        # storage 필드가 없는 기존 문서는 GridFS에 저장되어 있습니다
+        return {"$or": [{"storage": source}, {"storage": {"$exists": False}}]}
+    return {"storage": source}
+
+def migrate_image(image_doc: dict, source, target, delete_source: bool = False):
+    """
+    이미지 한 건의 원본과 썸네일을 대상 백엔드로 복사합니다.
+
+    Args:
+        image_doc: 이미지 문서
+        source: 원본 저장소 백엔드
+        target: 대상 저장소 백엔드
+        delete_source: 복사 후 원본 저장소의 데이터를 삭제할지 여부
+
+    Returns:
+        복사한 바이트 수
+    """
+    copied_bytes = 0
+    new_keys = []
+
+    try:
+        data = source.get(image_doc["file_id"])
+        file_id = target.put(
+            data,
+            filename=image_doc.get("filename"),
+            content_type=image_doc.get("content_type"),
+            image_id=image_doc["image_id"]
+        )
+        new_keys.append(file_id)
+        copied_bytes += len(data)
+
+        new_thumbnails = {}
+        for size, key in image_doc.get("thumbnails", {}).items():
+            data = source.get(key)
+            new_thumbnails[size] = target.put(
+                data,
+                filename=f"{image_doc['image_id']}_{size}.jpg",
+                content_type="image/jpeg",
+                image_id=image_doc["image_id"],
+                thumbnail_size=int(size)
+            )
+            new_keys.append(new_thumbnails[size])
+            copied_bytes += len(data)
+
+        update = {"storage": target.name, "file_id": file_id}
+        if new_thumbnails:
+            update["thumbnails"] = new_thumbnails
+
+        # 다른 프로세스가 먼저 옮긴 경우를 대비해 원래 위치 그대로일 때만 갱신
+        result = database.sync_db.images.update_one(
+            {"_id": image_doc["_id"], "file_id": image_doc["file_id"]},
+            {"$set": update}
+        )
+        if result.matched_count == 0:
+            raise RuntimeError("이미지 문서가 마이그레이션 중 변경되었습니다")
+    except Exception:
+        # 실패한 경우 대상 백엔드에 복사한 데이터를 정리합니다
+        for key in new_keys:
+            target.delete(key)
+        raise
+
+    if delete_source:
+        source.delete(image_doc["file_id"])
+        for key in image_doc.get("thumbnails", {}).values():
+            source.delete(key)
+
+    return copied_bytes
+
+def migrate(source_name: str, target_name: str, delete_source: bool = False,
+            workers: int = 4, limit: int = None, dry_run: bool = False):
+    """
+    원본 백엔드의 모든 이미지를 대상 백엔드로 마이그레이션합니다.
+
+    Args:
+        source_name: 원본 백엔드 이름
+        target_name: 대상 백엔드 이름
+        delete_source: 복사 후 원본 데이터 삭제 여부
+        workers: 동시에 복사할 작업 수
+        limit: 최대 처리 이미지 수 (선택 사항)
+        dry_run: True이면 대상 이미지 수만 확인
+
+    Returns:
+        (성공 건수, 실패 건수, 복사한 바이트 수) 튜플
+    """
+    if source_name == target_name:
+        raise ValueError("원본과 대상 백엔드가 같습니다")
+
+    source = storage.get_storage(source_name)
+    target = storage.get_storage(target_name)
+
+    filter_query = _source_filter(source_name)
+    total = database.sync_db.images.count_documents(filter_query)
+    if limit:
+        total = min(total, limit)
+    print(f"마이그레이션 대상 이미지: {total}건 ({source_name} -> {target_name})")
+    if dry_run:
+        return 0, 0, 0
+
+    cursor = database.sync_db.images.find(
+        filter_query,
+        {"_id": 1, "image_id": 1, "file_id": 1, "filename": 1, "content_type": 1, "thumbnails": 1}
+    ).sort("_id", 1)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    succeeded = failed = copied_bytes = 0
+    started = time.perf_counter()
+
+    def collect(done_futures):
+        nonlocal succeeded, failed, copied_bytes
+        for future in done_futures:
+            try:
+                copied_bytes += future.result()
+                succeeded += 1
+            except Exception as e:
+                failed += 1
+                print(f"마이그레이션 실패: {e}")
+
+            done = succeeded + failed
+            if done % 100 == 0 or done == total:
+                elapsed = time.perf_counter() - started
+                print(f"진행: {done}/{total}건, {copied_bytes / 1024 / 1024:.1f}MB, {done / elapsed:.1f}건/초")
+
+    # 커서 전체를 메모리에 올리지 않도록 진행 중인 작업 수를 제한합니다
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for image_doc in cursor:
+            pending.add(executor.submit(migrate_image, image_doc, source, target, delete_source))
+            if len(pending) >= workers * 4:
+                done_futures, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done_futures)
+        collect(wait(pending).done)
+
+    return succeeded, failed, copied_bytes
+
+def main():
+    parser = argparse.ArgumentParser(description="이미지 저장소 백엔드 마이그레이션")
+    parser.add_argument("--source", default=storage.GridFSStorage.name, help="원본 백엔드 (기본값: gridfs)")
+    parser.add_argument("--target", default=storage.FileSystemStorage.name, help="대상 백엔드 (기본값: filesystem)")
+    parser.add_argument("--delete-source", action="store_true", help="복사 후 원본 데이터 삭제")
+    parser.add_argument("--workers", type=int, default=4, help="동시 복사 작업 수 (기본값: 4)")
+    parser.add_argument("--limit", type=int, default=None, help="최대 처리 이미지 수")
+    parser.add_argument("--dry-run", action="store_true", help="대상 이미지 수만 확인")
+    args = parser.parse_args()
+
+    succeeded, failed, copied_bytes = migrate(
+        args.source, args.target, args.delete_source, args.workers, args.limit, args.dry_run
+    )
+    print(f"완료: 성공 {succeeded}건, 실패 {failed}건, {copied_bytes / 1024 / 1024:.1f}MB 복사")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+MongoDB 명령 모니터링
+
+pymongo 명령 리스너로 모든 명령의 처리 시간을 명령/컬렉션별로 기록하고 (`/metrics`),
+MONGO_SLOW_MS보다 오래 걸린 명령은 필터 형태(값을 제거한 조건)와 함께 로그에 남깁니다.
+느린 쿼리 형태는 실행 계획이 저장될 때까지 느린 명령마다 표본 비율에 따라 explain을 실행해
+컬렉션 전체 스캔(COLLSCAN)인지, 어떤 인덱스를 사용했는지 저장합니다.
+`/debug/mongo/slow-queries`에서 누적 시간이 긴 순서로 조회할 수 있습니다. (프로세스별 집계)
+"""
+
+import json
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from pymongo import monitoring
+from . import metrics
+
+# 환경 변수 로드
+load_dotenv()
+
+MONGO_MONITORING_ENABLED = os.getenv("MONGO_MONITORING_ENABLED", "true").lower() == "true"
+# 느린 명령 기준 (밀리초)
+MONGO_SLOW_MS = float(os.getenv("MONGO_SLOW_MS", "100"))
+# 실행 계획이 없는 느린 쿼리 형태에 explain을 실행할 비율 (0~1, 느린 명령마다 적용)
+MONGO_EXPLAIN_SAMPLE_RATE = float(os.getenv("MONGO_EXPLAIN_SAMPLE_RATE", "0.1"))
+# 보관할 최대 느린 쿼리 형태 수
+MONGO_SLOW_SHAPES_MAX = int(os.getenv("MONGO_SLOW_SHAPES_MAX", "200"))
+
+# 조건 위치 (명령 이름 → 명령 문서에서 조건을 꺼내는 함수)
+FILTER_GETTERS = {
+    "find": lambda command: command.get("filter", {}),
+    "count": lambda command: command.get("query", {}),
+    "distinct": lambda command: command.get("query", {}),
+    "findAndModify": lambda command: command.get("query", {}),
+    "update": lambda command: (command.get("updates") or [{}])[0].get("q", {}),
+    "delete": lambda command: (command.get("deletes") or [{}])[0].get("q", {}),
+    "aggregate": lambda command: command.get("pipeline", []),
+}
+
+# explain을 실행할 읽기 명령
+EXPLAINABLE_COMMANDS = ("find", "aggregate", "count", "distinct")
+
+# explain 요청에 넣지 않는 드라이버 내부 필드
+DRIVER_FIELDS = ("$db", "lsid", "$clusterTime", "txnNumber", "$readPreference", "readConcern", "cursor")
+
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mongo-explain")
+
+def query_shape(value):
+    """
+    조건의 값을 "?"로 바꾼 형태를 반환합니다. 같은 형태의 쿼리를 하나로 묶는 데 사용합니다.
+    """
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        # $in 등의 값 목록은 길이와 관계없이 같은 형태, $or/$and 조건과 파이프라인은 항목별 형태
+        if any(isinstance(item, (dict, list)) for item in value):
+            return [query_shape(item) for item in value]
+        return ["?"]
+    return "?"
+
+def _collection_name(command: dict, command_name: str):
+    # 대부분의 명령은 명령 이름 필드에 컬렉션 이름이 있고, getMore는 collection 필드에 있음
+    for field in (command_name, "collection"):
+        if isinstance(command.get(field), str):
+            return command[field]
+    return ""
+
+def _plan_summary(explain_result: dict):
+    """
+    explain 결과의 최종 실행 계획(winningPlan)에서 단계, 사용한 인덱스, 전체 스캔 여부를 추립니다.
+    aggregate는 파이프라인 단계 안에 실행 계획이 있으므로 결과 전체에서 winningPlan을 찾습니다.
+    """
+    stages = []
+    indexes = []
+
+    def walk_plan(plan):
+        if isinstance(plan, dict):
+            if "stage" in plan:
+                stages.append(plan["stage"])
+            if "indexName" in plan:
+                indexes.append(plan["indexName"])
+            for value in plan.values():
+                walk_plan(value)
+        elif isinstance(plan, list):
+            for item in plan:
+                walk_plan(item)
+
+    def find_winning_plans(document):
+        if isinstance(document, dict):
+            for key, value in document.items():
+                if key == "winningPlan":
+                    walk_plan(value)
+                elif key != "rejectedPlans":
+                    find_winning_plans(value)
+        elif isinstance(document, list):
+            for item in document:
+                find_winning_plans(item)
+
+    find_winning_plans(explain_result)
+    return {"stages": stages, "indexes": indexes, "collection_scan": "COLLSCAN" in stages}
+
+class SlowQueryLog:
+    """
+    느린 쿼리를 (명령, 컬렉션, 형태)별로 집계합니다.
+    """
+
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self.entries = {}
+        # explain이 진행 중인 형태 키 (같은 형태를 동시에 여러 번 explain하지 않음)
+        self.explaining = set()
+        self.lock = threading.Lock()
+
+    def record(self, command_name: str, collection: str, shape, sort_spec, duration_ms: float):
+        """
+        느린 쿼리를 기록하고 형태 키를 반환합니다.
+        """
+        key = (command_name, collection, json.dumps(shape, sort_keys=True), json.dumps(sort_spec))
+        now = datetime.now(timezone.utc).isoformat()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= self.max_shapes:
+                    # 누적 시간이 가장 짧은 형태를 제거
+                    del self.entries[min(self.entries, key=lambda item: self.entries[item]["total_ms"])]
+                entry = self.entries[key] = {
+                    "command": command_name,
+                    "collection": collection,
+                    "filter": shape,
+                    "sort": sort_spec,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "plan": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_ms"] = duration_ms
+            entry["last_seen"] = now
+            return key
+
+    def start_explain(self, key):
+        """
+        실행 계획이 아직 없고 explain이 진행 중이 아닌 형태이면 진행 중으로 표시하고 True를 반환합니다.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry["plan"] is not None or key in self.explaining:
+                return False
+            self.explaining.add(key)
+            return True
+
+    def set_plan(self, key, plan: dict):
+        with self.lock:
+            self.explaining.discard(key)
+            if key in self.entries:
+                self.entries[key]["plan"] = plan
+
+    def top(self, limit: int = 20):
+        """
+        누적 시간이 긴 순서로 느린 쿼리 형태를 반환합니다.
+        """
+        with self.lock:
+            entries = [dict(entry) for entry in self.entries.values()]
+        for entry in entries:
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 3)
+            entry["total_ms"] = round(entry["total_ms"], 3)
+        entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return entries[:limit]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.explaining.clear()
+
+slow_query_log = SlowQueryLog(MONGO_SLOW_SHAPES_MAX)
+
+def _explain(database_name: str, command_name: str, command: dict, key):
+    """
+    느린 쿼리의 실행 계획을 조회해 저장합니다. (explain 전용 스레드에서 실행)
+    """
+    from . import database
+    try:
+        explain_command = {name: value for name, value in command.items() if name not in DRIVER_FIELDS}
+        if command_name == "aggregate":
+            explain_command["cursor"] = {}
+        result = database.sync_client[database_name].command("explain", explain_command, verbosity="queryPlanner")
+        slow_query_log.set_plan(key, _plan_summary(result))
+    except Exception as e:
+        slow_query_log.set_plan(key, {"error": str(e)})
+
+class CommandMonitor(monitoring.CommandListener):
+    """
+    명령 처리 시간을 기록하고 느린 명령을 집계하는 pymongo 명령 리스너
+    """
+
+    def __init__(self):
+        self.pending = {}
+
+    def started(self, event):
+        # explain 명령은 느린 쿼리 분석이 만든 것이므로 기록하지 않음
+        if event.command_name == "explain":
+            return
+        self.pending[(event.request_id, event.connection_id)] = (
+            event.command_name, _collection_name(event.command, event.command_name), event.command
+        )
+
+    def succeeded(self, event):
+        started = self.pending.pop((event.request_id, event.connection_id), None)
+        if started is None:
+            return
+        command_name, collection, command = started
+        metrics.record_mongo_command(command_name, collection, event.duration_micros / 1e6)
+
+        duration_ms = event.duration_micros / 1000
+        if duration_ms >= MONGO_SLOW_MS:
+            self._record_slow(event.database_name, command_name, collection, command, duration_ms)
+
+    def failed(self, event):
+        started = self.pending.pop((event.request_id, event.connection_id), None)
+        if started is None:
+            return
+        command_name, collection, _ = started
+        metrics.record_mongo_command(command_name, collection, event.duration_micros / 1e6, failed=True)
+
+    def _record_slow(self, database_name: str, command_name: str, collection: str, command: dict, duration_ms: float):
+        getter = FILTER_GETTERS.get(command_name)
+        shape = query_shape(getter(command)) if getter else None
+        # 정렬은 방향이 인덱스 사용 여부에 영향을 주므로 그대로 보관
+        sort_spec = dict(command["sort"]) if isinstance(command.get("sort"), dict) else None
+        print(f"느린 MongoDB 명령 ({duration_ms:.1f}ms): {command_name} {collection} filter={json.dumps(shape, ensure_ascii=False)}"
+              + (f" sort={json.dumps(sort_spec)}" if sort_spec else ""))
+
+        key = slow_query_log.record(command_name, collection, shape, sort_spec, duration_ms)
+        if (command_name in EXPLAINABLE_COMMANDS and random.random() < MONGO_EXPLAIN_SAMPLE_RATE
+                and slow_query_log.start_explain(key)):
+            _explain_executor.submit(_explain, database_name, command_name, command, key)
+
+def event_listeners():
+    """
+    MongoDB 클라이언트에 등록할 명령 리스너 목록을 반환합니다.
+    """
+    return [CommandMonitor()] if MONGO_MONITORING_ENABLED else []
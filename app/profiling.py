@@ -0,0 +1,256 @@
+"""
+요청 단위 프로파일링
+
+특정 이미지나 라벨 조합에서만 느려지는 요청을 재현하지 않고 분석할 수 있도록,
+선택된 요청의 처리 과정을 프로파일러로 기록해 PROFILE_DIR에 저장합니다.
+
+- PROFILING_TOKEN: 요청에 같은 값의 X-Profile-Token 헤더가 있으면 해당 요청을 프로파일링
+- PROFILING_SAMPLE_RATE: 무작위로 프로파일링할 요청 비율 (0~1, 기본값: 0)
+
+둘 다 설정하지 않으면 미들웨어를 등록하지 않으므로 추가 비용이 없습니다.
+pyinstrument가 설치되어 있으면 HTML(또는 speedscope JSON)로, 없으면 cProfile 통계 파일(.prof)로 저장합니다.
+프로파일 ID는 X-Profile-Id 응답 헤더로 전달되고, /debug/profiles에서 조회할 수 있습니다.
+프로파일에는 코드 경로와 요청 정보가 포함되므로 조회에는 항상 X-Profile-Token 헤더가 필요합니다.
+PROFILING_TOKEN 없이 표본 프로파일링만 설정한 경우에는 PROFILE_DIR의 파일을 직접 확인합니다.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+# 환경 변수 로드
+load_dotenv()
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_ENABLED = bool(PROFILING_TOKEN) or PROFILING_SAMPLE_RATE > 0
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./data/profiles")
+# 보관할 최대 프로파일 수 (초과 시 오래된 것부터 삭제)
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+# pyinstrument 출력 형식 (html, speedscope)
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "html")
+# pyinstrument 샘플링 간격 (초)
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+
+# 프로파일링하지 않는 경로 (상태 확인, 지표, 프로파일 조회)
+EXCLUDED_PREFIXES = ("/health", "/metrics", "/debug/")
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# 프로파일 형식: (파일 확장자, 미디어 유형)
+FORMATS = {
+    "html": (".html", "text/html"),
+    "speedscope": (".speedscope.json", "application/json"),
+    "cprofile": (".prof", "application/octet-stream"),
+}
+
+def _format_name():
+    if pyinstrument is None:
+        return "cprofile"
+    return PROFILE_FORMAT if PROFILE_FORMAT in ("html", "speedscope") else "html"
+
+class _PyinstrumentSession:
+    """
+    pyinstrument 프로파일러 (async_mode로 현재 요청의 코루틴에 걸린 시간만 기록)
+    """
+
+    def __init__(self):
+        self.profiler = pyinstrument.Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def render(self, format_name: str) -> bytes:
+        if format_name == "speedscope":
+            from pyinstrument.renderers import SpeedscopeRenderer
+            return self.profiler.output(SpeedscopeRenderer()).encode("utf-8")
+        return self.profiler.output_html().encode("utf-8")
+
+class _CProfileSession:
+    """
+    cProfile 프로파일러 (이벤트 루프 스레드 전체를 기록하므로 동시에 처리된 다른 요청도 포함됨)
+    """
+
+    def __init__(self):
+        import cProfile
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def render(self, format_name: str) -> bytes:
+        import marshal
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+def _new_session():
+    return _CProfileSession() if pyinstrument is None else _PyinstrumentSession()
+
+def _metadata_path(profile_id: str):
+    return os.path.join(PROFILE_DIR, f"{profile_id}.json")
+
+def _prune():
+    """
+    PROFILE_MAX_FILES를 넘는 오래된 프로파일을 삭제합니다.
+    """
+    metadata_files = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".json") and not entry.name.endswith(".speedscope.json")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in metadata_files[:max(0, len(metadata_files) - PROFILE_MAX_FILES)]:
+        profile_id = entry.name[:-len(".json")]
+        for extension, _ in FORMATS.values():
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile_id + extension))
+            except FileNotFoundError:
+                pass
+        os.remove(entry.path)
+
+def _save(profile_id: str, data: bytes, metadata: dict):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    extension, _ = FORMATS[metadata["format"]]
+    with open(os.path.join(PROFILE_DIR, profile_id + extension), "wb") as profile_file:
+        profile_file.write(data)
+    # 메타데이터를 마지막에 기록 (목록에는 프로파일 파일이 있는 항목만 표시)
+    with open(_metadata_path(profile_id), "w") as metadata_file:
+        json.dump(metadata, metadata_file, ensure_ascii=False)
+    _prune()
+
+def _load_metadata(profile_id: str):
+    try:
+        with open(_metadata_path(profile_id)) as metadata_file:
+            return json.load(metadata_file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def list_profiles(limit: int = 20):
+    """
+    최근 프로파일 메타데이터 목록을 반환합니다. (최신순)
+
+    Args:
+        limit: 조회할 최대 개수
+
+    Returns:
+        메타데이터 목록
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profile_ids = [
+        entry.name[:-len(".json")] for entry in os.scandir(PROFILE_DIR)
+        if entry.name.endswith(".json") and not entry.name.endswith(".speedscope.json")
+    ]
+    profiles = [metadata for metadata in map(_load_metadata, profile_ids) if metadata is not None]
+    profiles.sort(key=lambda metadata: metadata["created_at"], reverse=True)
+    return profiles[:limit]
+
+def get_profile_file(profile_id: str):
+    """
+    프로파일 파일 경로와 미디어 유형을 반환합니다. 없으면 None을 반환합니다.
+    """
+    if not profile_id.isalnum():
+        return None
+    metadata = _load_metadata(profile_id)
+    if metadata is None:
+        return None
+    extension, media_type = FORMATS[metadata["format"]]
+    path = os.path.join(PROFILE_DIR, profile_id + extension)
+    return (path, media_type) if os.path.exists(path) else None
+
+def _token_matches(value: str):
+    return bool(PROFILING_TOKEN) and value is not None and hmac.compare_digest(value, PROFILING_TOKEN)
+
+def check_access(request: Request):
+    """
+    프로파일 조회 권한을 확인합니다.
+    프로파일링이 꺼져 있으면 404, 토큰이 설정되어 있지 않거나 헤더가 다르면 403을 발생시킵니다.
+    """
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="프로파일링이 활성화되어 있지 않습니다")
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=403, detail="PROFILING_TOKEN이 설정되어 있지 않아 프로파일을 조회할 수 없습니다")
+    if not _token_matches(request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=403, detail="프로파일 조회 권한이 없습니다")
+
+class ProfilingMiddleware:
+    """
+    토큰 헤더가 일치하거나 표본으로 선택된 요청을 프로파일링하는 ASGI 미들웨어
+    프로세스당 한 번에 한 요청만 프로파일링합니다. (프로파일러는 스레드당 하나만 동작)
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.active = False
+
+    def _selected(self, scope):
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PREFIXES):
+            return None
+        for name, value in scope["headers"]:
+            if name == b"x-profile-token":
+                return "token" if _token_matches(value.decode("latin-1")) else None
+        if PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._selected(scope)
+        if trigger is None or self.active:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        response_status = None
+
+        async def send_with_profile_id(message):
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        self.active = True
+        session = _new_session()
+        started = time.perf_counter()
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session.stop()
+            self.active = False
+            duration_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            format_name = _format_name()
+            metadata = {
+                "profile_id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": response_status,
+                "duration_ms": round(duration_ms, 3),
+                "trigger": trigger,
+                "format": format_name,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+            try:
+                # 렌더링과 파일 기록은 이벤트 루프 밖에서 처리
+                data = await asyncio.to_thread(session.render, format_name)
+                await asyncio.to_thread(_save, profile_id, data, metadata)
+            except Exception as e:
+                print(f"프로파일 저장 실패 ({profile_id}): {str(e)}")
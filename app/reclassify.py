@@ -0,0 +1,197 @@
+"""
+저장된 Vision 결과로 재활용 분석 재계산
+
+재질 키워드나 탄소 계수 등 app/recycling.py의 분류 규칙이 바뀌면, 분석 문서에 저장된
+detected_labels/detected_objects를 Vision API 호출 없이 다시 분류해 analysis_result를 갱신합니다.
+
+- 분류 규칙 버전(get_rules_version)이 현재와 다른 문서만 _id 순서로 커서에서 읽습니다.
+- 문서 묶음을 프로세스 풀에서 분류하고, 결과는 bulk_write로 한 번에 기록합니다.
+- 묶음을 기록할 때마다 마지막 _id를 체크포인트 파일에 저장하므로 중단된 뒤 이어서 실행할 수 있습니다.
+- 완료 후 사용자 통계와 기간별 집계를 재계산합니다. (--skip-rebuild로 생략)
+- 실행 중인 서버의 분석 결과 캐시는 CACHE_TTL이 지나면 갱신됩니다.
+
+사용 예:
+    python -m app.reclassify --dry-run
+    python -m app.reclassify
+    python -m app.reclassify --workers 8 --batch-size 2000
+    python -m app.reclassify --restart
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from bson import ObjectId
+from pymongo import UpdateOne
+from . import analytics, database, stats
+from .recycling import get_classifier, get_rules_version
+
+CHECKPOINT_PATH = "./data/reclassify-checkpoint.json"
+
+# 진행 상황 출력 간격 (초)
+REPORT_INTERVAL = 5
+
+def _reclassify_batch(batch):
+    """
+    분석 문서 묶음을 다시 분류합니다. (워커 프로세스에서 실행)
+
+    Args:
+        batch: (_id, detected_labels, detected_objects) 목록
+
+    Returns:
+        (_id, analysis_result) 목록
+    """
+    classifier = get_classifier()
+    results = []
+    for analysis_id, detected_labels, detected_objects in batch:
+        labels = [SimpleNamespace(description=label["description"], score=label["score"]) for label in detected_labels or []]
+        objects = [SimpleNamespace(name=obj["name"], score=obj["score"]) for obj in detected_objects or []]
+        results.append((analysis_id, classifier.analyze_image_for_recycling(labels, objects)))
+    return results
+
+def _batches(cursor, batch_size: int):
+    batch = []
+    for analysis_doc in cursor:
+        batch.append((analysis_doc["_id"], analysis_doc.get("detected_labels"), analysis_doc.get("detected_objects")))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _load_checkpoint(path: str):
+    try:
+        with open(path) as checkpoint_file:
+            return json.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+
+def _save_checkpoint(path: str, checkpoint: dict):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 임시 파일에 쓴 뒤 교체하여 중단되더라도 이전 체크포인트가 남도록 합니다
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+    os.replace(temp_path, path)
+
+def reclassify(workers: int = None, batch_size: int = 1000, limit: int = None, dry_run: bool = False,
+               checkpoint_path: str = CHECKPOINT_PATH, restart: bool = False, rebuild: bool = True):
+    """
+    분류 규칙 버전이 다른 분석 문서를 다시 분류합니다.
+
+    Args:
+        workers: 분류 프로세스 수 (기본값: CPU 수)
+        batch_size: 프로세스에 넘기고 bulk_write로 기록하는 문서 수
+        limit: 최대 처리 문서 수 (선택 사항)
+        dry_run: True이면 대상 문서 수만 확인
+        checkpoint_path: 체크포인트 파일 경로
+        restart: True이면 체크포인트를 무시하고 처음부터 실행
+        rebuild: 완료 후 사용자 통계와 기간별 집계 재계산 여부
+
+    Returns:
+        갱신한 문서 수
+    """
+    workers = workers or os.cpu_count() or 1
+    rules_version = get_rules_version()
+
+    checkpoint = None if restart else _load_checkpoint(checkpoint_path)
+    if checkpoint and checkpoint["rules_version"] != rules_version:
+        print(f"체크포인트의 규칙 버전({checkpoint['rules_version']})이 현재와 달라 처음부터 실행합니다")
+        checkpoint = None
+    if checkpoint is None:
+        checkpoint = {"rules_version": rules_version, "last_id": None, "updated": 0}
+
+    filter_query = {"analysis_type": "recycling", "rules_version": {"$ne": rules_version}}
+    if checkpoint["last_id"]:
+        filter_query["_id"] = {"$gt": ObjectId(checkpoint["last_id"])}
+
+    collection = database.sync_db[database.analyses_collection.name]
+    total = collection.count_documents(filter_query)
+    if limit:
+        total = min(total, limit)
+    resumed = f", 이전 실행에서 {checkpoint['updated']}건 완료" if checkpoint["last_id"] else ""
+    print(f"다시 분류할 분석: {total}건 (규칙 버전 {rules_version}{resumed})")
+    if dry_run or total == 0:
+        return 0
+
+    cursor = collection.find(
+        filter_query,
+        {"_id": 1, "detected_labels": 1, "detected_objects": 1}
+    ).sort("_id", 1).batch_size(batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    updated = 0
+    started = last_report = time.perf_counter()
+
+    def write(results):
+        nonlocal updated, last_report
+        reclassified_at = datetime.now()
+        collection.bulk_write([
+            UpdateOne(
+                {"_id": analysis_id},
+                {"$set": {"analysis_result": analysis_result, "rules_version": rules_version, "reclassified_at": reclassified_at}}
+            )
+            for analysis_id, analysis_result in results
+        ], ordered=False)
+
+        updated += len(results)
+        checkpoint["last_id"] = str(results[-1][0])
+        checkpoint["updated"] += len(results)
+        _save_checkpoint(checkpoint_path, checkpoint)
+
+        now = time.perf_counter()
+        if now - last_report >= REPORT_INTERVAL or updated == total:
+            last_report = now
+            rate = updated / (now - started)
+            remaining = (total - updated) / rate if rate else 0
+            print(f"진행: {updated}/{total}건, {rate:.0f}건/초, 남은 시간 약 {remaining:.0f}초")
+
+    # 워커 프로세스가 부모의 MongoDB 연결 스레드를 복제하지 않도록 spawn으로 시작
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        # 체크포인트가 순서대로 진행되도록 제출한 순서대로 기록하고, 진행 중인 묶음 수를 제한합니다
+        pending = deque()
+        for batch in _batches(cursor, batch_size):
+            pending.append(executor.submit(_reclassify_batch, batch))
+            if len(pending) >= workers * 2:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+    elapsed = time.perf_counter() - started
+    print(f"재분류 완료: {updated}건, {elapsed:.1f}초 ({updated / elapsed:.0f}건/초)")
+
+    if rebuild:
+        stats.rebuild_user_stats()
+        analytics.rebuild_rollups()
+
+    # 완료된 실행의 체크포인트는 삭제 (같은 규칙 버전으로 다시 실행하면 남은 문서만 처리)
+    os.remove(checkpoint_path)
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 Vision 결과로 재활용 분석 재계산")
+    parser.add_argument("--workers", type=int, default=None, help="분류 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="묶음당 문서 수 (기본값: 1000)")
+    parser.add_argument("--limit", type=int, default=None, help="최대 처리 문서 수")
+    parser.add_argument("--dry-run", action="store_true", help="대상 문서 수만 확인")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help=f"체크포인트 파일 (기본값: {CHECKPOINT_PATH})")
+    parser.add_argument("--restart", action="store_true", help="체크포인트를 무시하고 처음부터 실행")
+    parser.add_argument("--skip-rebuild", action="store_true", help="사용자 통계와 기간별 집계 재계산 생략")
+    args = parser.parse_args()
+
+    reclassify(
+        args.workers, args.batch_size, args.limit, args.dry_run,
+        args.checkpoint, args.restart, not args.skip_rebuild
+    )
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 재활용 분류 및 분리수거 추천 시스템
 """
 
+import hashlib
+import inspect
+
 class RecyclingClassifier:
     def __init__(self):
         # 재질별 분류 데이터베이스
@@ -13,6 +16,12 @@ class RecyclingClassifier:
         # 복합 재질 처리 규칙
         self.composite_rules = self._initialize_composite_rules()
 
+        # 소문자로 미리 변환한 재질별 키워드 (분류할 때마다 변환하지 않도록)
+        self.material_keywords = [
+            (material_key, material_info, [keyword.lower() for keyword in material_info["keywords"]])
+            for material_key, material_info in self.material_database.items()
+        ]
+
     def _initialize_material_database(self):
         """
         재질별 분류 데이터베이스 초기화
@@ -307,9 +316,9 @@ class RecyclingClassifier:
             label_text = label.description.lower()
 
             # 각 재질 카테고리 확인
-            for material_key, material_info in self.material_database.items():
-                for keyword in material_info["keywords"]:
-                    if keyword.lower() in label_text:
+            for material_key, material_info, keywords in self.material_keywords:
+                for keyword in keywords:
+                    if keyword in label_text:
                         if material_key not in detected_materials:
                             detected_materials[material_key] = {
                                 "confidence": label.score,
@@ -330,9 +339,9 @@ class RecyclingClassifier:
             obj_name = obj.name.lower()
 
             # 각 재질 카테고리 확인
-            for material_key, material_info in self.material_database.items():
-                for keyword in material_info["keywords"]:
-                    if keyword.lower() in obj_name:
+            for material_key, material_info, keywords in self.material_keywords:
+                for keyword in keywords:
+                    if keyword in obj_name:
                         if material_key not in detected_materials:
                             detected_materials[material_key] = {
                                 "confidence": obj.score,
@@ -567,6 +576,31 @@ class RecyclingClassifier:
             "carbon_impact": carbon_impact
         }
 
+_shared_classifier = None
+
+def get_classifier():
+    """
+    프로세스에서 공유하는 분류기를 반환합니다.
+    분류기는 상태를 변경하지 않으므로 요청마다 새로 만들 필요가 없습니다.
+    """
+    global _shared_classifier
+    if _shared_classifier is None:
+        _shared_classifier = RecyclingClassifier()
+    return _shared_classifier
+
+_rules_version = None
+
+def get_rules_version():
+    """
+    분류 규칙 버전을 반환합니다. (RecyclingClassifier 소스 코드의 해시)
+    재질 키워드, 재활용 규칙, 탄소 계수가 모두 클래스 안에 정의되어 있으므로
+    어느 것을 바꿔도 버전이 바뀌고, 저장된 분석 결과를 다시 분류할 대상으로 판단합니다.
+    """
+    global _rules_version
+    if _rules_version is None:
+        _rules_version = hashlib.sha256(inspect.getsource(RecyclingClassifier).encode("utf-8")).hexdigest()[:16]
+    return _rules_version
+
 # 한국어 재질 이름 변환 함수
 def get_korean_material_name(material_type):
     """
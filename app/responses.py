@@ -0,0 +1,86 @@
+"""
+빠른 응답 직렬화
+
+분석 결과와 MongoDB 문서를 jsonable_encoder를 거치지 않고 orjson으로 바로 직렬화합니다.
+엔드포인트가 Response 객체를 반환하면 FastAPI의 범용 인코더 순회를 건너뜁니다.
+클라이언트가 `Accept: application/msgpack`을 보내면 MessagePack으로 응답합니다.
+"""
+
+import time
+from datetime import date, datetime
+from bson import ObjectId
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+import orjson
+from . import timing
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+def _default(value):
+    """
+    orjson이 직접 처리하지 못하는 값을 변환합니다. (MongoDB ObjectId 등)
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"직렬화할 수 없는 값입니다: {type(value).__name__}")
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime, date)):
+        # JSON 응답과 같은 ISO 8601 문자열로 전달
+        return value.isoformat()
+    return _default(value)
+
+def dumps(content) -> bytes:
+    """
+    응답 본문을 JSON 바이트로 직렬화합니다. datetime은 ISO 8601 문자열이 됩니다.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson으로 직렬화하는 JSON 응답
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+class MsgPackResponse(Response):
+    """
+    MessagePack 응답
+    """
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        import msgpack
+        return msgpack.packb(content, default=_msgpack_default, datetime=False)
+
+def wants_msgpack(request: Request):
+    """
+    클라이언트가 MessagePack 응답을 요청했는지 확인합니다.
+    """
+    return MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+def negotiated(request: Request, content, status_code: int = 200, headers: dict = None):
+    """
+    Accept 헤더에 따라 JSON 또는 MessagePack 응답을 생성합니다.
+    시간 기록 디버그가 요청된 경우 dict 본문에 단계별 소요 시간을 추가합니다.
+
+    Args:
+        request: 요청 객체
+        content: 응답 본문 (dict, list, datetime, ObjectId 포함 가능)
+        status_code: 상태 코드
+        headers: 추가 응답 헤더
+
+    Returns:
+        Response 객체
+    """
+    request_timing = timing.current()
+    if request_timing is not None and request_timing.debug and isinstance(content, dict):
+        content = {**content, "server_timing": request_timing.breakdown()}
+
+    response_class = MsgPackResponse if wants_msgpack(request) else FastJSONResponse
+    started = time.perf_counter_ns()
+    response = response_class(content, status_code=status_code, headers=headers)
+    timing.record("serialize", time.perf_counter_ns() - started)
+    response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,193 @@
+"""
+사용자별 재활용 및 탄소 절감 통계
+
+분석 결과가 저장될 때마다 user_stats 컬렉션의 사용자 문서를 $inc로 갱신하고,
+조회 시에는 user_id 인덱스로 문서 하나만 읽습니다.
+
+통계 재계산:
+    python -m app.stats --rebuild
+    python -m app.stats --rebuild --user-id <사용자 ID>
+"""
+
+import argparse
+import time
+from datetime import datetime
+from pymongo import ReplaceOne
+from . import database
+
+def _stats_increments(recycling_analysis: dict):
+    """
+    분석 결과 한 건이 사용자 통계에 더하는 값을 계산합니다.
+
+    Args:
+        recycling_analysis: RecyclingClassifier.analyze_image_for_recycling 결과
+
+    Returns:
+        {필드 경로: 증가량} 딕셔너리
+    """
+    detected_materials = recycling_analysis.get("detected_materials") or {}
+    carbon_impact = recycling_analysis.get("carbon_impact") or {}
+
+    increments = {
+        "analysis_count": 1,
+        "material_count": len(detected_materials),
+        "recyclable_count": sum(
+            1 for material in detected_materials.values()
+            if material.get("info", {}).get("recyclable")
+        ),
+        "total_carbon_impact": carbon_impact.get("total_carbon_impact", 0),
+        "total_carbon_saving": carbon_impact.get("total_carbon_saving", 0)
+    }
+
+    for material_key in detected_materials:
+        increments[f"materials.{material_key}.count"] = 1
+
+    for detail in carbon_impact.get("carbon_details", []):
+        material_key = detail["material"]
+        increments[f"materials.{material_key}.carbon_impact"] = detail.get("weighted_impact", 0)
+        increments[f"materials.{material_key}.carbon_saving"] = detail.get("carbon_saving", 0)
+
+    return increments
+
+async def record_analysis(user_id: str, recycling_analysis: dict, analyzed_at: datetime):
+    """
+    분석 결과를 사용자 통계에 반영합니다.
+
+    Args:
+        user_id: 사용자 ID (없으면 반영하지 않음)
+        recycling_analysis: 재활용 분석 결과
+        analyzed_at: 분석 시각
+    """
+    if not user_id:
+        return
+
+    await database.user_stats_collection.update_one(
+        {"user_id": user_id},
+        {
+            "$inc": _stats_increments(recycling_analysis),
+            "$min": {"first_analysis_at": analyzed_at},
+            "$max": {"last_analysis_at": analyzed_at}
+        },
+        upsert=True
+    )
+
+async def get_user_stats(user_id: str):
+    """
+    사용자 통계를 조회합니다.
+
+    Args:
+        user_id: 사용자 ID
+
+    Returns:
+        사용자 통계 문서 (분석 기록이 없으면 0으로 채운 문서)
+    """
+    stats_doc = await database.user_stats_collection.find_one({"user_id": user_id}, {"_id": 0})
+    if stats_doc:
+        return stats_doc
+
+    return {
+        "user_id": user_id,
+        "analysis_count": 0,
+        "material_count": 0,
+        "recyclable_count": 0,
+        "total_carbon_impact": 0,
+        "total_carbon_saving": 0,
+        "materials": {},
+        "first_analysis_at": None,
+        "last_analysis_at": None
+    }
+
+def _apply_increments(stats_doc: dict, increments: dict):
+    """
+    $inc와 같은 방식으로 통계 문서에 증가량을 더합니다.
+    """
+    for path, value in increments.items():
+        target = stats_doc
+        *parents, field = path.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[field] = target.get(field, 0) + value
+
+def rebuild_user_stats(user_id: str = None, batch_size: int = 1000):
+    """
+    analyses 컬렉션에서 사용자 통계를 다시 계산합니다.
+    증분 갱신이 누락되었거나 분류 규칙이 바뀐 경우에 사용합니다.
+    재계산 중에 저장된 분석 결과는 누락될 수 있으므로 트래픽이 적을 때 실행합니다.
+
+    Args:
+        user_id: 특정 사용자만 재계산할 경우 사용자 ID
+        batch_size: 한 번에 기록할 통계 문서 수
+
+    Returns:
+        재계산한 사용자 수
+    """
+    started = time.perf_counter()
+
+    pipeline = [
+        # user_id가 없는 이전 분석 문서는 이미지 문서에서 사용자 ID를 가져옵니다
+        {
+            "$lookup": {
+                "from": database.images_collection.name,
+                "localField": "image_id",
+                "foreignField": "image_id",
+                "as": "image"
+            }
+        },
+        {"$set": {"user_id": {"$ifNull": ["$user_id", {"$arrayElemAt": ["$image.user_id", 0]}]}}},
+        {"$match": {"user_id": user_id} if user_id else {"user_id": {"$ne": None}}},
+        {
+            "$project": {
+                "_id": 0,
+                "user_id": 1,
+                "created_at": 1,
+                "analysis_result.detected_materials": 1,
+                "analysis_result.carbon_impact": 1
+            }
+        }
+    ]
+
+    user_stats = {}
+    analysis_total = 0
+    for analysis_doc in database.sync_db[database.analyses_collection.name].aggregate(pipeline, allowDiskUse=True):
+        stats_doc = user_stats.setdefault(analysis_doc["user_id"], {"user_id": analysis_doc["user_id"]})
+        _apply_increments(stats_doc, _stats_increments(analysis_doc.get("analysis_result") or {}))
+
+        created_at = analysis_doc.get("created_at")
+        if created_at:
+            stats_doc["first_analysis_at"] = min(stats_doc.get("first_analysis_at", created_at), created_at)
+            stats_doc["last_analysis_at"] = max(stats_doc.get("last_analysis_at", created_at), created_at)
+        analysis_total += 1
+
+    collection = database.sync_db[database.user_stats_collection.name]
+    requests = [
+        ReplaceOne({"user_id": stats_user_id}, stats_doc, upsert=True)
+        for stats_user_id, stats_doc in user_stats.items()
+    ]
+    for start in range(0, len(requests), batch_size):
+        collection.bulk_write(requests[start:start + batch_size], ordered=False)
+
+    # 분석 결과가 더 이상 없는 사용자 통계 삭제
+    if user_id:
+        if user_id not in user_stats:
+            collection.delete_one({"user_id": user_id})
+    else:
+        collection.delete_many({"user_id": {"$nin": list(user_stats)}})
+
+    elapsed = time.perf_counter() - started
+    print(f"사용자 통계 재계산 완료: 사용자 {len(user_stats)}명, 분석 {analysis_total}건, {elapsed:.1f}초")
+
+    return len(user_stats)
+
+def main():
+    parser = argparse.ArgumentParser(description="사용자 통계 관리")
+    parser.add_argument("--rebuild", action="store_true", help="analyses 컬렉션에서 통계 재계산")
+    parser.add_argument("--user-id", default=None, help="특정 사용자만 재계산")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_user_stats(args.user_id)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
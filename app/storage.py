@@ -0,0 +1,174 @@
+"""
+이미지 바이너리 저장소 백엔드
+
+이미지 메타데이터는 MongoDB에 두고, 원본 및 썸네일 바이너리는
+설정된 저장소 백엔드(GridFS 또는 파일 시스템)에 저장합니다.
+"""
+
+import mmap
+import os
+import tempfile
+import uuid
+from bson import ObjectId
+from dotenv import load_dotenv
+from . import database, tracing
+
+# 환경 변수 로드
+load_dotenv()
+
+# 새 이미지를 저장할 백엔드 (gridfs, filesystem)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gridfs")
+
+# 파일 시스템 백엔드 루트 디렉토리 (로컬 디스크 또는 마운트된 볼륨)
+STORAGE_PATH = os.getenv("STORAGE_PATH", "./data/images")
+
+class BlobStorage:
+    """
+    바이너리 저장소 백엔드 기본 클래스
+    모든 메서드는 동기 I/O이므로 비동기 코드에서는 스레드에서 호출합니다.
+    """
+
+    name = None
+
+    def put(self, data: bytes, filename: str = None, content_type: str = None, **metadata):
+        """
+        데이터를 저장하고 저장소 키를 반환합니다.
+        """
+        raise NotImplementedError
+
+    def get(self, key: str):
+        """
+        저장소 키로 데이터를 읽습니다.
+        """
+        raise NotImplementedError
+
+    def exists(self, key: str):
+        """
+        저장소 키에 해당하는 데이터가 있는지 확인합니다.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """
+        저장소 키에 해당하는 데이터를 삭제합니다.
+        """
+        raise NotImplementedError
+
+    def local_path(self, key: str):
+        """
+        데이터가 로컬 파일로 존재하면 파일 경로를, 아니면 None을 반환합니다.
+        """
+        return None
+
+class GridFSStorage(BlobStorage):
+    """
+    MongoDB GridFS 저장소
+    """
+
+    name = "gridfs"
+
+    def put(self, data: bytes, filename: str = None, content_type: str = None, **metadata):
+        with tracing.span("gridfs.put", {"gridfs.size_bytes": len(data)}):
+            file_id = database.fs.put(data, filename=filename, content_type=content_type, **metadata)
+        return str(file_id)
+
+    def get(self, key: str):
+        with tracing.span("gridfs.get", {"gridfs.file_id": key}):
+            return database.fs.get(ObjectId(key)).read()
+
+    def exists(self, key: str):
+        with tracing.span("gridfs.exists", {"gridfs.file_id": key}):
+            return database.fs.exists(ObjectId(key))
+
+    def delete(self, key: str):
+        with tracing.span("gridfs.delete", {"gridfs.file_id": key}):
+            database.fs.delete(ObjectId(key))
+
+class FileSystemStorage(BlobStorage):
+    """
+    디렉토리 기반 저장소
+    키 앞부분으로 하위 디렉토리를 나누어 한 디렉토리에 파일이 몰리지 않도록 합니다.
+    """
+
+    name = "filesystem"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str):
+        # 키는 uuid hex와 확장자로만 구성되므로 경로 탈출 문자를 허용하지 않습니다
+        if not key or "/" in key or "\\" in key or key.startswith("."):
+            raise ValueError(f"잘못된 저장소 키입니다: {key}")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data: bytes, filename: str = None, content_type: str = None, **metadata):
+        extension = os.path.splitext(filename or "")[1].lower()
+        if not extension.isascii() or not extension[1:].isalnum():
+            extension = ""
+        key = f"{uuid.uuid4().hex}{extension}"
+
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # 임시 파일에 쓴 뒤 이름을 바꿔 읽는 쪽에서 쓰다 만 파일을 보지 않도록 합니다
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        return key
+
+    def get(self, key: str):
+        with open(self._path(key), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            # 메모리 맵으로 페이지 캐시에서 직접 읽습니다
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[:]
+
+    def exists(self, key: str):
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str):
+        path = self._path(key)
+        return path if os.path.isfile(path) else None
+
+_backends = {}
+
+def get_storage(name: str = None):
+    """
+    이름으로 저장소 백엔드를 반환합니다.
+
+    Args:
+        name: 백엔드 이름 (기본값: STORAGE_BACKEND 설정)
+
+    Returns:
+        BlobStorage 인스턴스
+    """
+    name = name or STORAGE_BACKEND
+    if name not in _backends:
+        if name == GridFSStorage.name:
+            _backends[name] = GridFSStorage()
+        elif name == FileSystemStorage.name:
+            _backends[name] = FileSystemStorage(STORAGE_PATH)
+        else:
+            raise ValueError(f"지원하지 않는 저장소 백엔드입니다: {name}")
+    return _backends[name]
+
+def get_storage_for(image_doc: dict):
+    """
+    이미지 문서가 저장된 저장소 백엔드를 반환합니다.
+    storage 필드가 없는 기존 문서는 GridFS에 저장된 것으로 간주합니다.
+    """
+    return get_storage(image_doc.get("storage", GridFSStorage.name))
@@ -0,0 +1,193 @@
+"""
+이미지 썸네일 생성 및 저장
+"""
+
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from . import cache, database, storage
+
+# 환경 변수 로드
+load_dotenv()
+
+# 생성할 썸네일 크기 (긴 변 기준 픽셀)
+THUMBNAIL_SIZES = tuple(
+    sorted(int(size) for size in os.getenv("THUMBNAIL_SIZES", "160,480").split(",") if size.strip())
+)
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+THUMBNAIL_CONTENT_TYPE = "image/jpeg"
+
+# 썸네일 생성 작업용 워커 풀 (Pillow는 디코딩/리사이즈 중 GIL을 해제합니다)
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("THUMBNAIL_WORKERS", "2")),
+    thread_name_prefix="thumbnail"
+)
+
+# 진행 중인 썸네일 생성 작업 (같은 이미지에 대한 중복 생성 방지)
+_pending_tasks = {}
+
+def render_thumbnails(content: bytes, sizes):
+    """
+    원본 이미지를 한 번만 디코딩하여 여러 크기의 썸네일을 생성합니다.
+
+    Args:
+        content: 원본 이미지 바이너리 데이터
+        sizes: 생성할 썸네일 크기 목록
+
+    Returns:
+        {크기: JPEG 바이너리 데이터} 딕셔너리
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(content)) as image:
+        # JPEG는 디코딩 단계에서 바로 축소하여 디코딩 비용을 줄입니다
+        largest = max(sizes)
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        thumbnails = {}
+        # 큰 크기부터 생성하여 다음 크기의 축소 원본으로 재사용
+        for size in sorted(sizes, reverse=True):
+            image.thumbnail((size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+            thumbnails[size] = buffer.getvalue()
+
+    return thumbnails
+
+def _render_and_store(image_doc: dict, content: bytes, sizes):
+    """
+    썸네일을 생성하여 원본과 같은 저장소 백엔드에 저장합니다. (워커 스레드에서 실행)
+
+    Returns:
+        {크기: 저장소 키} 딕셔너리
+    """
+    image_id = image_doc["image_id"]
+    blob_storage = storage.get_storage_for(image_doc)
+    file_ids = {}
+    for size, data in render_thumbnails(content, sizes).items():
+        file_ids[size] = blob_storage.put(
+            data,
+            filename=f"{image_id}_{size}.jpg",
+            content_type=THUMBNAIL_CONTENT_TYPE,
+            image_id=image_id,
+            thumbnail_size=size
+        )
+    return file_ids
+
+async def generate_thumbnails(image_doc: dict, content: bytes, sizes=THUMBNAIL_SIZES):
+    """
+    썸네일을 워커 풀에서 생성하고 이미지 문서에 저장소 키를 기록합니다.
+    다른 서버가 먼저 같은 크기의 썸네일을 기록한 경우 생성한 썸네일을 삭제하고 기록된 썸네일을 사용합니다.
+
+    Args:
+        image_doc: 이미지 문서
+        content: 원본 이미지 바이너리 데이터
+        sizes: 생성할 썸네일 크기 목록
+
+    Returns:
+        {크기: 저장소 키} 딕셔너리
+    """
+    loop = asyncio.get_running_loop()
+    image_id = image_doc["image_id"]
+    file_ids = await loop.run_in_executor(_executor, _render_and_store, image_doc, content, tuple(sizes))
+
+    # 아직 썸네일이 기록되지 않은 경우에만 기록 (여러 서버가 동시에 생성한 경우 하나만 남김)
+    result = await database.images_collection.update_one(
+        {"image_id": image_id, **{f"thumbnails.{size}": {"$exists": False} for size in file_ids}},
+        {"$set": {f"thumbnails.{size}": file_id for size, file_id in file_ids.items()}}
+    )
+    await cache.image_cache.invalidate(image_id)
+
+    if result.matched_count == 0:
+        blob_storage = storage.get_storage_for(image_doc)
+        for file_id in file_ids.values():
+            await loop.run_in_executor(_executor, blob_storage.delete, file_id)
+        saved_doc = await database.images_collection.find_one({"image_id": image_id}, {"_id": 0, "thumbnails": 1})
+        return {int(size): file_id for size, file_id in ((saved_doc or {}).get("thumbnails") or {}).items()}
+
+    return file_ids
+
+def schedule_thumbnails(image_doc: dict, content: bytes, sizes=THUMBNAIL_SIZES):
+    """
+    이미지 저장 직후 썸네일 생성을 백그라운드에서 시작합니다.
+    생성 중에 들어온 썸네일 요청은 같은 작업의 완료를 기다립니다.
+
+    Args:
+        image_doc: 이미지 문서
+        content: 원본 이미지 바이너리 데이터
+        sizes: 생성할 썸네일 크기 목록
+
+    Returns:
+        썸네일 생성 작업
+    """
+    image_id = image_doc["image_id"]
+    task = _pending_tasks.get(image_id)
+    if task is None:
+        task = asyncio.create_task(generate_thumbnails(image_doc, content, sizes))
+        _pending_tasks[image_id] = task
+        task.add_done_callback(lambda done: _finish_task(image_id, done))
+    return task
+
+async def wait_pending(image_id: str):
+    """
+    진행 중인 썸네일 생성 작업이 있으면 끝나기를 기다립니다.
+
+    Returns:
+        생성된 {크기: 저장소 키} 딕셔너리 (작업이 없거나 실패한 경우 빈 딕셔너리)
+    """
+    task = _pending_tasks.get(image_id)
+    if task is None:
+        return {}
+    await asyncio.wait({task})
+    if task.cancelled() or task.exception() is not None:
+        return {}
+    return task.result()
+
+def _finish_task(image_id: str, task: asyncio.Task):
+    """
+    완료된 썸네일 생성 작업을 정리합니다.
+    """
+    _pending_tasks.pop(image_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"썸네일 생성 실패 ({image_id}): {task.exception()}")
+
+async def get_thumbnail(image_doc: dict, size: int):
+    """
+    썸네일 데이터를 조회합니다. 아직 생성되지 않은 경우 원본에서 생성합니다.
+
+    Args:
+        image_doc: 이미지 문서
+        size: 썸네일 크기 (THUMBNAIL_SIZES 중 하나)
+
+    Returns:
+        썸네일 JPEG 바이너리 데이터
+    """
+    loop = asyncio.get_running_loop()
+    blob_storage = storage.get_storage_for(image_doc)
+    image_id = image_doc["image_id"]
+    file_id = image_doc.get("thumbnails", {}).get(str(size))
+
+    if file_id is None:
+        # 저장 직후 생성 중인 작업이 있으면 완료를 기다리고, 없으면 원본에서 생성합니다
+        task = _pending_tasks.get(image_id)
+        if task is None:
+            # 캐시된 문서가 오래되었을 수 있으므로 다른 서버가 이미 생성했는지 DB에서 다시 확인
+            saved_doc = await database.images_collection.find_one({"image_id": image_id}, {"_id": 0, "thumbnails": 1})
+            saved = (saved_doc or {}).get("thumbnails") or {}
+            file_id = saved.get(str(size))
+            if file_id is not None:
+                await cache.image_cache.invalidate(image_id)
+            else:
+                original = await loop.run_in_executor(_executor, blob_storage.get, image_doc["file_id"])
+                missing = [thumbnail_size for thumbnail_size in THUMBNAIL_SIZES if str(thumbnail_size) not in saved]
+                task = schedule_thumbnails(image_doc, original, missing)
+        if file_id is None:
+            file_ids = await asyncio.shield(task)
+            file_id = file_ids[size]
+
+    return await loop.run_in_executor(_executor, blob_storage.get, file_id)
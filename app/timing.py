@@ -0,0 +1,117 @@
+"""
+요청별 처리 단계 시간 (Server-Timing)
+
+요청마다 contextvar로 시간 기록을 만들고, metrics.stage로 측정한 단계 시간을
+read, preprocess, vision, classify, db-write, serialize 항목으로 합산하여
+응답의 `Server-Timing` 헤더에 담습니다.
+`?debug_timing=true` 또는 `X-Debug-Timing: 1` 헤더를 보내면 JSON 응답 본문에도
+`server_timing` 필드로 같은 내용을 추가합니다. (serialize 시간은 본문 생성 후 측정되므로 헤더에만 포함)
+"""
+
+import contextvars
+import time
+from urllib.parse import parse_qs
+
+# 단계 이름 → Server-Timing 항목
+STAGE_CATEGORIES = {
+    "upload_read": "read",
+    "preprocess": "preprocess",
+    "classify": "classify",
+    "storage_put": "db-write",
+    "db_insert_image": "db-write",
+    "db_insert_analysis": "db-write",
+    "stats_update": "db-write",
+    "serialize": "serialize",
+}
+
+# 헤더에 표시하는 항목 순서
+CATEGORY_ORDER = ("read", "preprocess", "vision", "classify", "db-write", "serialize")
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+class RequestTiming:
+    """
+    요청 하나의 단계별 소요 시간 (나노초)
+    """
+    __slots__ = ("started_ns", "durations", "debug")
+
+    def __init__(self, debug: bool = False):
+        self.started_ns = time.perf_counter_ns()
+        self.durations = {}
+        self.debug = debug
+
+    def add(self, category: str, duration_ns: int):
+        self.durations[category] = self.durations.get(category, 0) + duration_ns
+
+    def breakdown(self):
+        """
+        항목별 소요 시간을 밀리초 단위로 반환합니다.
+        """
+        names = [name for name in CATEGORY_ORDER if name in self.durations]
+        names += [name for name in self.durations if name not in CATEGORY_ORDER]
+        result = {name: round(self.durations[name] / 1e6, 3) for name in names}
+        result["total"] = round((time.perf_counter_ns() - self.started_ns) / 1e6, 3)
+        return result
+
+    def header_value(self):
+        return ", ".join(f"{name};dur={duration}" for name, duration in self.breakdown().items())
+
+def current():
+    """
+    현재 요청의 시간 기록을 반환합니다. (요청 밖에서는 None)
+    """
+    return _current.get()
+
+def category(stage_name: str):
+    if stage_name.startswith("vision_"):
+        return "vision"
+    return STAGE_CATEGORIES.get(stage_name)
+
+def record(stage_name: str, duration_ns: int):
+    """
+    현재 요청의 시간 기록에 단계 소요 시간을 더합니다.
+    """
+    timing = _current.get()
+    if timing is None:
+        return
+    name = category(stage_name)
+    if name is not None:
+        timing.add(name, duration_ns)
+
+def _debug_requested(scope):
+    for name, value in scope["headers"]:
+        if name == b"x-debug-timing":
+            return value.lower() in (b"1", b"true")
+    query_string = scope.get("query_string", b"")
+    if b"debug_timing" not in query_string:
+        return False
+    values = parse_qs(query_string.decode("latin-1")).get("debug_timing", [])
+    return any(value.lower() in ("1", "true") for value in values)
+
+class ServerTimingMiddleware:
+    """
+    요청별 시간 기록을 만들고, 기록된 단계가 있으면 응답에 Server-Timing 헤더를 추가하는 ASGI 미들웨어
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(debug=_debug_requested(scope))
+        token = _current.set(timing)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and timing.durations:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header_value().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,181 @@
+"""
+OpenTelemetry 분산 추적
+
+요청(핸들러)마다 서버 스팬을 만들고, 그 아래에 처리 단계(metrics.stage), Vision API 호출,
+GridFS 작업, MongoDB 명령 스팬을 기록합니다. `/analyze-and-save/`의 단계가 순차로 실행되는지
+병렬로 실행되는지 트레이스 뷰어의 폭포(waterfall) 차트로 확인할 수 있습니다.
+
+- TRACING_EXPORTER: none(기본값), console, file, otlp
+- TRACE_FILE: file 내보내기 경로 (스팬당 JSON 한 줄, 기본값: ./data/traces.jsonl)
+- OTLP 수집기 주소와 샘플링은 OpenTelemetry 표준 환경 변수를 사용합니다.
+  (OTEL_EXPORTER_OTLP_ENDPOINT, OTEL_TRACES_SAMPLER, OTEL_TRACES_SAMPLER_ARG)
+
+none이면 OpenTelemetry를 가져오지 않고 미들웨어와 명령 리스너도 등록하지 않습니다.
+"""
+
+import contextlib
+import os
+from dotenv import load_dotenv
+from pymongo import monitoring
+
+# 환경 변수 로드
+load_dotenv()
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_ENABLED = TRACING_EXPORTER != "none"
+TRACE_FILE = os.getenv("TRACE_FILE", "./data/traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "carbon-neutral-vision-api")
+
+# 추적이 꺼져 있을 때 반환하는 재사용 가능한 빈 컨텍스트 관리자
+_NOOP = contextlib.nullcontext()
+
+_tracer = None
+_provider = None
+
+def _create_exporter():
+    if TRACING_EXPORTER == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    if TRACING_EXPORTER == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        directory = os.path.dirname(TRACE_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return ConsoleSpanExporter(
+            out=open(TRACE_FILE, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"지원하지 않는 TRACING_EXPORTER입니다: {TRACING_EXPORTER}")
+
+def setup():
+    """
+    추적 공급자와 내보내기를 설정합니다. 추적이 꺼져 있으면 아무것도 하지 않습니다.
+    """
+    global _tracer, _provider
+    if not TRACING_ENABLED or _tracer is not None:
+        return
+
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    _provider.add_span_processor(BatchSpanProcessor(_create_exporter()))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer(__name__)
+    print(f"추적 활성화 (내보내기: {TRACING_EXPORTER})")
+
+def shutdown():
+    """
+    남은 스팬을 내보내고 공급자를 종료합니다.
+    """
+    if _provider is not None:
+        _provider.shutdown()
+
+def span(name: str, attributes: dict = None):
+    """
+    현재 스팬의 하위 스팬을 여는 컨텍스트 관리자를 반환합니다.
+    예외가 발생하면 스팬에 기록하고 오류 상태로 표시합니다.
+
+    Args:
+        name: 스팬 이름
+        attributes: 스팬 속성
+
+    Returns:
+        컨텍스트 관리자 (추적이 꺼져 있으면 빈 컨텍스트 관리자)
+    """
+    if _tracer is None:
+        return _NOOP
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+def set_attributes(attributes: dict):
+    """
+    현재 스팬에 속성을 추가합니다. (이미지 크기, 라벨 수, 재질 수 등)
+    """
+    if _tracer is None:
+        return
+    from opentelemetry import trace
+    trace.get_current_span().set_attributes(attributes)
+
+class CommandTracer(monitoring.CommandListener):
+    """
+    MongoDB 명령마다 클라이언트 스팬을 기록하는 pymongo 명령 리스너
+    Motor와 asyncio.to_thread는 컨텍스트를 복사해 스레드에서 실행하므로 요청 스팬 아래에 기록됩니다.
+    """
+
+    def __init__(self):
+        self.spans = {}
+
+    def started(self, event):
+        from opentelemetry.trace import SpanKind
+        collection = event.command.get(event.command_name)
+        attributes = {
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+        }
+        if isinstance(collection, str):
+            attributes["db.mongodb.collection"] = collection
+        name = f"mongodb.{event.command_name}" + (f" {collection}" if isinstance(collection, str) else "")
+        self.spans[(event.request_id, event.connection_id)] = _tracer.start_span(name, kind=SpanKind.CLIENT, attributes=attributes)
+
+    def succeeded(self, event):
+        command_span = self.spans.pop((event.request_id, event.connection_id), None)
+        if command_span is not None:
+            command_span.end()
+
+    def failed(self, event):
+        from opentelemetry.trace import Status, StatusCode
+        command_span = self.spans.pop((event.request_id, event.connection_id), None)
+        if command_span is not None:
+            command_span.set_status(Status(StatusCode.ERROR, str(event.failure.get("errmsg", ""))))
+            command_span.end()
+
+def event_listeners():
+    """
+    MongoDB 클라이언트에 등록할 명령 리스너 목록을 반환합니다.
+    """
+    return [CommandTracer()] if _tracer is not None else []
+
+class TracingMiddleware:
+    """
+    요청마다 서버 스팬을 만드는 ASGI 미들웨어
+    요청의 traceparent 헤더를 이어받고, 스팬 이름은 라우트 경로 템플릿을 사용합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        from opentelemetry import propagate
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+
+        carrier = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        attributes = {"http.request.method": scope["method"], "url.path": scope["path"]}
+
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}", context=propagate.extract(carrier),
+            kind=SpanKind.SERVER, attributes=attributes
+        ) as server_span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    server_span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        server_span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    server_span.set_attribute("http.route", route.path)
+                    server_span.update_name(f"{scope['method']} {route.path}")
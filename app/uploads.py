@@ -0,0 +1,211 @@
+"""
+이미지 업로드 제한
+
+- 요청 본문 크기: Content-Length가 한도를 넘으면 본문을 읽기 전에 413으로 거절하고,
+  길이를 알 수 없는 요청은 받는 도중 한도를 넘으면 413으로 거절합니다.
+- 동시 업로드 바이트 예산: 처리 중인 업로드 본문의 합이 UPLOAD_INFLIGHT_BYTES를 넘으면
+  본문을 읽기 전에 예산이 생길 때까지 기다리고, 시간이 초과되면 503을 반환합니다.
+- 이미지 형식: 파일 앞부분의 시그니처로 이미지가 아닌 파일을 Vision/저장소 작업 전에 415로 거절합니다.
+
+읽은 이미지는 bytes 객체 하나로 Vision 요청, 저장소, 썸네일 생성이 함께 사용합니다.
+(Vision API 요청 protobuf가 bytes만 받으므로 memoryview를 넘겨도 복사가 일어납니다)
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from . import metrics, tracing
+
+# 환경 변수 로드
+load_dotenv()
+
+# 이미지 파일 최대 크기 (바이트, 기본값 10MB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# 동시에 처리 중인 업로드 본문 합계 한도 (바이트, 기본값 256MB)
+UPLOAD_INFLIGHT_BYTES = int(os.getenv("UPLOAD_INFLIGHT_BYTES", str(256 * 1024 * 1024)))
+# 예산을 기다리는 최대 시간 (초)
+UPLOAD_BUDGET_TIMEOUT = float(os.getenv("UPLOAD_BUDGET_TIMEOUT", "10"))
+
+# multipart 경계와 다른 폼 필드를 위한 여유분
+MULTIPART_OVERHEAD = 64 * 1024
+MAX_REQUEST_BYTES = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD
+
+# 형식 판별에 읽는 앞부분 크기
+SNIFF_BYTES = 32
+
+# sniff_image_type이 판별하는 MIME 유형
+IMAGE_TYPES = frozenset({
+    "image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp",
+    "image/tiff", "image/x-icon", "image/heic", "image/avif"
+})
+
+def sniff_image_type(header: bytes):
+    """
+    파일 앞부분의 시그니처로 이미지 형식을 판별합니다.
+
+    Args:
+        header: 파일 앞부분 (SNIFF_BYTES 이상 권장)
+
+    Returns:
+        이미지 MIME 유형 (이미지가 아니면 None)
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header.startswith(b"BM"):
+        return "image/bmp"
+    if header.startswith((b"II*\x00", b"MM\x00*")):
+        return "image/tiff"
+    if header.startswith(b"\x00\x00\x01\x00"):
+        return "image/x-icon"
+    if header[4:8] == b"ftyp":
+        brand = header[8:12]
+        if brand in (b"heic", b"heix", b"hevc", b"mif1", b"msf1"):
+            return "image/heic"
+        if brand in (b"avif", b"avis"):
+            return "image/avif"
+    return None
+
+async def read_image(file: UploadFile):
+    """
+    업로드된 이미지를 크기 한도 안에서 읽습니다.
+
+    Args:
+        file: 업로드된 파일 객체
+
+    Returns:
+        이미지 바이너리 데이터와 시그니처로 판별한 MIME 유형
+        (클라이언트가 보낸 file.content_type은 신뢰하지 않음)
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"이미지 크기는 {MAX_UPLOAD_BYTES}바이트 이하여야 합니다")
+
+    # 전체를 읽기 전에 앞부분으로 형식 확인
+    header = await file.read(SNIFF_BYTES)
+    image_type = sniff_image_type(header)
+    if image_type is None:
+        raise HTTPException(status_code=415, detail="지원하지 않는 파일 형식입니다. 이미지 파일을 업로드해 주세요")
+    await file.seek(0)
+
+    # 한도보다 1바이트 더 읽어 크기 초과 여부 확인 (한도 이상은 메모리에 올리지 않음)
+    with metrics.stage("upload_read"):
+        content = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(content) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"이미지 크기는 {MAX_UPLOAD_BYTES}바이트 이하여야 합니다")
+    metrics.record_upload(len(content))
+    tracing.set_attributes({"image.size_bytes": len(content), "image.type": image_type})
+    return content, image_type
+
+class BudgetTimeout(Exception):
+    """
+    시간 안에 예산을 예약하지 못한 경우
+    """
+
+class ByteBudget:
+    """
+    동시에 처리 중인 바이트 수 한도
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, size: int, timeout: float):
+        """
+        size 바이트를 예약합니다. 예산이 부족하면 반환될 때까지 기다립니다.
+
+        Raises:
+            BudgetTimeout: timeout 안에 예약하지 못한 경우
+        """
+        size = min(size, self.limit)
+        async with self._condition:
+            try:
+                await asyncio.wait_for(self._condition.wait_for(lambda: self.in_use + size <= self.limit), timeout)
+            except asyncio.TimeoutError:
+                raise BudgetTimeout() from None
+            self.in_use += size
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_use -= size
+                self._condition.notify_all()
+
+upload_budget = ByteBudget(UPLOAD_INFLIGHT_BYTES)
+
+class UploadLimitMiddleware:
+    """
+    multipart 업로드 요청의 본문 크기를 제한하고 동시 업로드 바이트 예산을 적용하는 ASGI 미들웨어
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and not content_length.isdigit():
+            await self._reject(send, 400, "Content-Length 헤더가 올바르지 않습니다")
+            return
+        if content_length is not None and int(content_length) > MAX_REQUEST_BYTES:
+            await self._reject(send, 413, "요청 본문이 너무 큽니다")
+            return
+        reserved = int(content_length) if content_length is not None else MAX_REQUEST_BYTES
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > MAX_REQUEST_BYTES:
+                    # 나머지 본문은 받지 않고 파서가 중단되도록 연결 종료로 알림
+                    too_large = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def checked_send(message):
+            nonlocal response_started
+            if too_large:
+                # 본문 파싱 실패 응답 대신 413을 한 번만 전송
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await self._reject(send, 413, "요청 본문이 너무 큽니다")
+                return
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            async with upload_budget.reserve(reserved, UPLOAD_BUDGET_TIMEOUT):
+                await self.app(scope, limited_receive, checked_send)
+        except BudgetTimeout:
+            if not response_started:
+                await self._reject(send, 503, "업로드 처리 중인 요청이 많습니다. 잠시 후 다시 시도해 주세요",
+                                   {"Retry-After": str(max(1, round(UPLOAD_BUDGET_TIMEOUT)))})
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, headers: dict = None):
+        response = JSONResponse(status_code=status_code, content={"detail": detail}, headers=headers)
+        await send({"type": "http.response.start", "status": response.status_code, "headers": response.raw_headers})
+        await send({"type": "http.response.body", "body": response.body})
@@ -0,0 +1,93 @@
+"""
+Google Vision API 클라이언트
+
+google.cloud.vision 모듈은 가져오는 데만 수백 ms가 걸리므로 처음 사용할 때 불러오고,
+클라이언트는 프로세스 전체에서 하나만 생성하여 공유합니다.
+VISION_CLIENT_FACTORY에 "모듈:함수" 경로를 지정하면 해당 함수가 만든 클라이언트를 사용합니다.
+(예: Vision API 없이 실행하는 부하 테스트)
+"""
+
+import importlib
+import os
+import threading
+from dotenv import load_dotenv
+from . import metrics
+
+# 환경 변수 로드
+load_dotenv()
+
+VISION_CLIENT_FACTORY = os.getenv("VISION_CLIENT_FACTORY")
+# true이면 서버 시작 시 클라이언트를 미리 생성 (첫 요청 지연 대신 시작 시간 증가)
+VISION_WARMUP = os.getenv("VISION_WARMUP", "false").lower() == "true"
+
+_client = None
+_client_lock = threading.Lock()
+
+def vision_module():
+    """
+    google.cloud.vision 모듈을 반환합니다. (처음 호출할 때 가져옵니다)
+    """
+    from google.cloud import vision
+    return vision
+
+def make_image(content: bytes):
+    """
+    이미지 바이너리로 Vision API 이미지 객체를 생성합니다.
+    """
+    with metrics.stage("preprocess"):
+        return vision_module().Image(content=content)
+
+def _create_client():
+    if VISION_CLIENT_FACTORY:
+        module_name, _, factory_name = VISION_CLIENT_FACTORY.partition(":")
+        factory = getattr(importlib.import_module(module_name), factory_name)
+        return factory()
+    return vision_module().ImageAnnotatorClient()
+
+def get_client():
+    """
+    공유 Vision API 클라이언트를 반환합니다. 처음 호출할 때 생성합니다.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+def warm_up():
+    """
+    Vision API 클라이언트를 미리 생성합니다.
+    생성에 실패해도 서버는 시작하고, 각 요청에서 다시 시도합니다.
+
+    Returns:
+        생성 성공 여부
+    """
+    try:
+        get_client()
+        return True
+    except Exception as e:
+        print(f"Error initializing Vision API client: {e}")
+        return False
+
+def annotate_image(image, features):
+    """
+    여러 Vision 기능을 한 번의 annotate_image 요청으로 실행합니다. (동기 RPC)
+
+    Args:
+        image: make_image로 만든 이미지 객체
+        features: 기능 이름 목록 (label_detection, object_localization, text_detection 등)
+
+    Returns:
+        AnnotateImageResponse (요청한 기능의 결과 필드가 채워짐)
+    """
+    feature_type = vision_module().Feature.Type
+    request = {
+        "image": image,
+        "features": [{"type_": getattr(feature_type, feature.upper())} for feature in features]
+    }
+    with metrics.vision_call(*features):
+        response = get_client().annotate_image(request)
+    if response.error.message:
+        raise RuntimeError(f"Vision API 오류: {response.error.message}")
+    return response
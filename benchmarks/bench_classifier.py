@@ -0,0 +1,52 @@
+"""
+RecyclingClassifier 마이크로 벤치마크
+
+    python -m pytest benchmarks
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:25%
+"""
+
+import pytest
+from app.recycling import RecyclingClassifier
+from corpus import DENSITIES, SIZES, ScaledClassifier, make_annotations, make_detected_materials
+
+classifier = RecyclingClassifier()
+
+@pytest.mark.parametrize("density", DENSITIES)
+@pytest.mark.parametrize("size", SIZES)
+def bench_classify_materials(benchmark, size, density):
+    labels, objects = make_annotations(classifier, size, density)
+    benchmark(classifier.classify_materials_from_vision_results, labels, objects)
+
+@pytest.mark.parametrize("extra_materials", [0, 32, 128])
+def bench_classify_materials_scaled_rules(benchmark, extra_materials):
+    scaled = ScaledClassifier(extra_materials)
+    labels, objects = make_annotations(scaled, "medium", "sparse")
+    benchmark(scaled.classify_materials_from_vision_results, labels, objects)
+
+@pytest.mark.parametrize("material_count", [2, 4, 8])
+def bench_identify_composite_materials(benchmark, material_count):
+    detected = make_detected_materials(classifier, material_count)
+    benchmark(classifier.identify_composite_materials, detected)
+
+@pytest.mark.parametrize("material_count", [1, 4, 8])
+def bench_generate_recycling_recommendations(benchmark, material_count):
+    detected = make_detected_materials(classifier, material_count)
+    composites = classifier.identify_composite_materials(detected)
+    benchmark(classifier.generate_recycling_recommendations, detected, composites)
+
+@pytest.mark.parametrize("material_count", [1, 4, 8])
+def bench_calculate_carbon_impact(benchmark, material_count):
+    detected = make_detected_materials(classifier, material_count)
+    benchmark(classifier.calculate_carbon_impact, detected)
+
+@pytest.mark.parametrize("density", DENSITIES)
+@pytest.mark.parametrize("size", SIZES)
+def bench_analyze_image_for_recycling(benchmark, size, density):
+    labels, objects = make_annotations(classifier, size, density)
+    benchmark(classifier.analyze_image_for_recycling, labels, objects)
+
+@pytest.mark.parametrize("extra_materials", [0, 32, 128])
+def bench_analyze_image_for_recycling_scaled_rules(benchmark, extra_materials):
+    scaled = ScaledClassifier(extra_materials)
+    labels, objects = make_annotations(scaled, "medium", "dense")
+    benchmark(scaled.analyze_image_for_recycling, labels, objects)
@@ -0,0 +1,91 @@
+"""
+콜드 스타트 측정
+
+새 프로세스에서 app.main을 가져오는 데 걸리는 시간과,
+서버 프로세스를 시작한 뒤 첫 요청이 성공할 때까지 걸리는 시간을 측정합니다.
+서버 측정에는 MongoDB가 필요합니다. (시작 시 인덱스를 생성합니다)
+
+사용법:
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 5 --path /images/recent?limit=1
+    python benchmarks/cold_start.py --import-only
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started)"
+)
+
+def measure_import():
+    """
+    새 인터프리터에서 app.main 가져오기 시간을 측정합니다. (초)
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_first_request(path: str, timeout: float):
+    """
+    uvicorn 프로세스를 시작한 뒤 첫 요청이 200을 반환할 때까지의 시간을 측정합니다. (초)
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("서버 프로세스가 종료되었습니다 (MongoDB 연결을 확인하세요)")
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError(f"{timeout}초 안에 첫 요청이 성공하지 못했습니다")
+    finally:
+        server.terminate()
+        server.wait()
+
+def _summary(values):
+    return f"평균 {statistics.mean(values) * 1000:.0f}ms, 최소 {min(values) * 1000:.0f}ms, 최대 {max(values) * 1000:.0f}ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="콜드 스타트 측정")
+    parser.add_argument("--runs", type=int, default=3, help="측정 반복 횟수")
+    parser.add_argument("--path", default="/", help="첫 요청 경로")
+    parser.add_argument("--timeout", type=float, default=60, help="첫 요청 대기 시간 (초)")
+    parser.add_argument("--import-only", action="store_true", help="가져오기 시간만 측정")
+    args = parser.parse_args()
+
+    import_times = [measure_import() for _ in range(args.runs)]
+    print(f"app.main 가져오기: {_summary(import_times)}")
+
+    if not args.import_only:
+        request_times = [measure_first_request(args.path, args.timeout) for _ in range(args.runs)]
+        print(f"프로세스 시작 → 첫 요청 성공 ({args.path}): {_summary(request_times)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+응답 압축 비용 측정
+
+대표 응답(재활용 분석 결과, 이미지 목록, 이미지 상세)을 인코딩/레벨별로 압축하여
+압축 후 크기와 응답 한 건당 CPU 시간을 마크다운 표로 출력합니다.
+MongoDB나 Vision API 없이 분류기와 합성 문서로 응답을 만듭니다.
+
+사용법:
+    python benchmarks/compression.py
+    python benchmarks/compression.py --iterations 500
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import responses
+from app.recycling import get_classifier
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LABELS = [
+    ("Plastic bottle", 0.95), ("Bottle", 0.93), ("Drinking water", 0.88), ("Paper", 0.81),
+    ("Cardboard", 0.77), ("Tin can", 0.74), ("Glass bottle", 0.7), ("Food", 0.66),
+    ("Packaging and labeling", 0.61), ("Aluminium", 0.58)
+]
+OBJECTS = [("Bottle", 0.91), ("Tin can", 0.83), ("Box", 0.72), ("Packaged goods", 0.64)]
+
+def recycling_response():
+    """
+    /analyze-and-save/ 응답과 같은 구조의 재활용 분석 결과
+    """
+    labels = [SimpleNamespace(description=name, score=score) for name, score in LABELS]
+    objects = [SimpleNamespace(name=name, score=score) for name, score in OBJECTS]
+    now = datetime.now()
+    return {
+        "image_id": str(uuid.uuid4()),
+        "filename": "photo.jpg",
+        "content_type": "image/jpeg",
+        "user_id": "user-1",
+        "category": "household",
+        "date": now.strftime("%Y-%m-%d"),
+        "time": now.strftime("%H:%M:%S.%f"),
+        "recycling_analysis": get_classifier().analyze_image_for_recycling(labels, objects),
+        "detected_labels": [{"description": name, "score": score} for name, score in LABELS],
+        "detected_objects": [{"name": name, "score": score} for name, score in OBJECTS]
+    }
+
+def image_list_response(count: int = 50):
+    """
+    /images/recent?include_analysis=true 응답과 같은 구조의 이미지 목록
+    """
+    now = datetime.now()
+    images = []
+    for index in range(count):
+        created_at = now - timedelta(minutes=index)
+        images.append({
+            "_id": uuid.uuid4().hex[:24],
+            "image_id": str(uuid.uuid4()),
+            "file_id": uuid.uuid4().hex[:24],
+            "filename": f"photo_{index}.jpg",
+            "content_type": "image/jpeg",
+            "user_id": f"user-{index % 5}",
+            "category": "household",
+            "date": created_at.strftime("%Y-%m-%d"),
+            "time": created_at.strftime("%H:%M:%S.%f"),
+            "created_at": created_at,
+            "thumbnails": {"160": uuid.uuid4().hex[:24], "480": uuid.uuid4().hex[:24]},
+            "analysis": {
+                "materials": ["plastic", "metal"],
+                "total_carbon_impact": 4.2,
+                "total_carbon_saving": 2.9,
+                "analyzed_at": created_at
+            }
+        })
+    return images
+
+def image_detail_response():
+    """
+    /images/{image_id} 응답과 같은 구조의 이미지 상세
+    """
+    result = recycling_response()
+    image_doc = image_list_response(1)[0]
+    image_doc.pop("analysis")
+    return {
+        "image": image_doc,
+        "analysis": {
+            "image_id": image_doc["image_id"],
+            "analysis_result": result["recycling_analysis"],
+            "labels": result["detected_labels"],
+            "objects": result["detected_objects"],
+            "created_at": datetime.now()
+        }
+    }
+
+def encoders():
+    yield "gzip-1", lambda body: gzip.compress(body, compresslevel=1, mtime=0)
+    yield "gzip-6", lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+    yield "gzip-9", lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield "br-1", lambda body: brotli.compress(body, quality=1)
+        yield "br-4", lambda body: brotli.compress(body, quality=4)
+        yield "br-11", lambda body: brotli.compress(body, quality=11)
+
+def measure(body: bytes, encode, iterations: int):
+    """
+    Returns:
+        (압축 후 크기, 한 건당 압축 시간 (마이크로초))
+    """
+    compressed = encode(body)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        encode(body)
+    return len(compressed), (time.perf_counter() - started) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="응답 압축 비용 측정")
+    parser.add_argument("--iterations", type=int, default=200, help="인코딩별 반복 횟수")
+    args = parser.parse_args()
+
+    payloads = {
+        "재활용 분석": responses.dumps(recycling_response()),
+        "이미지 목록 (50건)": responses.dumps(image_list_response()),
+        "이미지 상세": responses.dumps(image_detail_response())
+    }
+
+    print("| 응답 | 원본 (B) | 인코딩 | 압축 후 (B) | 절감률 | CPU (µs/건) |")
+    print("|---|---:|---|---:|---:|---:|")
+    for name, body in payloads.items():
+        for encoding, encode in encoders():
+            size, micros = measure(body, encode, args.iterations)
+            print(f"| {name} | {len(body)} | {encoding} | {size} | {1 - size / len(body):.0%} | {micros:.0f} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 저장소 루트(app 패키지)와 벤치마크 디렉터리(corpus)를 가져올 수 있도록 경로 추가
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
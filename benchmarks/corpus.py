@@ -0,0 +1,107 @@
+"""
+분류기 벤치마크용 합성 데이터
+
+Vision API 라벨/객체 결과와 같은 속성(description/name, score)을 가진 객체 목록을
+크기와 키워드 적중 비율별로 생성하고, 재질/규칙 데이터베이스를 늘린 분류기를 만듭니다.
+같은 시드로 항상 같은 데이터를 생성하므로 기준 결과와 비교할 수 있습니다.
+"""
+
+import random
+from types import SimpleNamespace
+from app.recycling import RecyclingClassifier
+
+# 키워드와 겹치지 않는 일반 라벨
+FILLER_WORDS = [
+    "table", "person", "sky", "tree", "hand", "floor", "wall", "light", "shadow", "window",
+    "street", "car", "grass", "building", "cloud", "smile", "font", "rectangle", "circle", "pattern"
+]
+
+# 라벨 수, 객체 수 (Vision API 기본 결과 수부터 max_results를 늘린 경우까지)
+SIZES = {
+    "small": (10, 3),
+    "medium": (25, 8),
+    "large": (50, 20),
+}
+
+# 라벨 중 재질 키워드를 포함하는 비율
+DENSITIES = {
+    "none": 0.0,
+    "sparse": 0.2,
+    "dense": 0.8,
+}
+
+class ScaledClassifier(RecyclingClassifier):
+    """
+    합성 재질과 재활용 규칙을 추가하여 데이터베이스를 늘린 분류기
+    """
+
+    def __init__(self, extra_materials: int, keywords_per_material: int = 12):
+        self.extra_materials = extra_materials
+        self.keywords_per_material = keywords_per_material
+        super().__init__()
+
+    def _initialize_material_database(self):
+        database = super()._initialize_material_database()
+        for index in range(self.extra_materials):
+            database[f"synthetic_{index}"] = {
+                "category": f"synthetic_{index}",
+                "keywords": [f"synthetic{index} item{keyword}" for keyword in range(self.keywords_per_material)],
+                "recyclable": index % 2 == 0,
+                "preparation": "합성 재질 배출 방법"
+            }
+        return database
+
+    def _initialize_recycling_rules(self):
+        rules = super()._initialize_recycling_rules()
+        for index in range(self.extra_materials):
+            rules[f"synthetic_{index}"] = {
+                "recyclable": index % 2 == 0,
+                "bin_color": "회색",
+                "preparation_steps": [f"합성 재질 {index} 준비 단계 {step}" for step in range(3)]
+            }
+        return rules
+
+def all_keywords(classifier: RecyclingClassifier):
+    return [keyword for info in classifier.material_database.values() for keyword in info["keywords"]]
+
+def make_annotations(classifier: RecyclingClassifier, size: str, density: str, seed: int = 0):
+    """
+    Vision API 결과 형태의 라벨과 객체 목록을 생성합니다.
+
+    Args:
+        classifier: 키워드를 가져올 분류기
+        size: SIZES 키
+        density: DENSITIES 키
+        seed: 난수 시드
+
+    Returns:
+        (labels, objects) 튜플
+    """
+    rng = random.Random(seed)
+    keywords = all_keywords(classifier)
+    label_count, object_count = SIZES[size]
+    hit_ratio = DENSITIES[density]
+
+    def text():
+        if rng.random() < hit_ratio:
+            return f"{rng.choice(keywords)} {rng.choice(FILLER_WORDS)}".title()
+        return f"{rng.choice(FILLER_WORDS)} {rng.choice(FILLER_WORDS)}".title()
+
+    labels = [SimpleNamespace(description=text(), score=rng.uniform(0.5, 1.0)) for _ in range(label_count)]
+    objects = [SimpleNamespace(name=text(), score=rng.uniform(0.5, 1.0)) for _ in range(object_count)]
+    return labels, objects
+
+def make_detected_materials(classifier: RecyclingClassifier, material_count: int, seed: int = 0):
+    """
+    재질 material_count개가 감지된 classify_materials_from_vision_results 결과를 생성합니다.
+    """
+    rng = random.Random(seed)
+    material_keys = list(classifier.material_database)[:material_count]
+    return {
+        material_key: {
+            "confidence": rng.uniform(0.5, 1.0),
+            "items": [classifier.material_database[material_key]["keywords"][0]],
+            "info": classifier.material_database[material_key]
+        }
+        for material_key in material_keys
+    }
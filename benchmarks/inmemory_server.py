@@ -0,0 +1,92 @@
+"""
+메모리 MongoDB로 API 서버 실행
+
+mongod 없이 부하 테스트를 실행할 때 사용합니다. mongomock-motor로 만든 메모리 데이터베이스를
+app.database에 연결한 뒤 uvicorn으로 서버를 실행합니다. 프로세스 간에 데이터를 공유할 수 없으므로
+워커는 1개만 사용하고, 이미지는 파일 시스템 저장소에 저장합니다.
+
+사용법:
+    pip install mongomock-motor
+    python benchmarks/inmemory_server.py --port 8000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class InMemorySyncClient:
+    """
+    mongomock 동기 클라이언트에 준비 상태 확인용 admin.command("ping")을 추가합니다.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.admin = SimpleNamespace(command=lambda *args, **kwargs: {"ok": 1.0})
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def __getitem__(self, name):
+        return self._client[name]
+
+def _accept_bulk_sort_argument():
+    """
+    pymongo 4.9 이상의 UpdateOne/ReplaceOne이 전달하는 sort 인자를 mongomock 대량 쓰기에서 무시합니다.
+    """
+    from mongomock.collection import BulkOperationBuilder
+
+    for method_name in ("add_update", "add_replace"):
+        method = getattr(BulkOperationBuilder, method_name)
+        if getattr(method, "accepts_sort", False):
+            continue
+
+        def patched(self, *args, _method=method, sort=None, **kwargs):
+            return _method(self, *args, **kwargs)
+
+        patched.accepts_sort = True
+        setattr(BulkOperationBuilder, method_name, patched)
+
+def connect_in_memory_database():
+    """
+    app.database의 클라이언트와 컬렉션을 메모리 데이터베이스로 교체합니다.
+    """
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("메모리 데이터베이스에는 mongomock-motor가 필요합니다: pip install mongomock-motor")
+
+    from app import database
+
+    _accept_bulk_sort_argument()
+    client = AsyncMongoMockClient()
+    db = client[database.DB_NAME]
+    database.client = client
+    database.database = db
+    database.sync_client = InMemorySyncClient(client.delegate)
+    database.sync_db = db.delegate
+    for attribute, collection_name in database.COLLECTIONS.items():
+        setattr(database, attribute, db[collection_name])
+
+def main():
+    parser = argparse.ArgumentParser(description="메모리 MongoDB로 API 서버 실행")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    # app 모듈을 가져오기 전에 설정 (모듈 로드 시 환경 변수를 읽음)
+    os.environ["STORAGE_BACKEND"] = "filesystem"
+    os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="loadtest-images-"))
+    sys.path.insert(0, ROOT)
+
+    connect_in_memory_database()
+
+    import uvicorn
+    from app.main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+if __name__ == "__main__":
+    main()
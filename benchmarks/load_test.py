@@ -0,0 +1,416 @@
+"""
+오프라인 부하 테스트
+
+Vision API를 대체 클라이언트(stub_vision.py)로 바꾸고 로컬 MongoDB 또는 메모리 데이터베이스로
+API 서버를 실행한 뒤, 이미지 업로드와 분석, 조회, 이미지/썸네일 다운로드 요청을 섞어
+동시 요청 수를 단계별로 늘려 가며 보냅니다.
+단계마다 엔드포인트별 처리량(rps), p50/p99 지연 시간, 오류 수와 서버 워커 메모리(RSS)를 출력합니다.
+
+데이터베이스 선택 (--mongo):
+    auto    PATH에 mongod가 있으면 임시 디렉터리로 실행, 없으면 memory (기본값)
+    mongod  임시 mongod 실행
+    memory  mongomock-motor 메모리 데이터베이스 (워커 1개, inmemory_server.py)
+--mongo-url을 지정하면 해당 서버에 임시 데이터베이스를 만들고 끝난 뒤 삭제합니다.
+
+사용법:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --levels 1,8,32,128 --duration 30 --workers 4
+    python benchmarks/load_test.py --vision-latency-ms 400 --vision-error-rate 0.02 --json result.json
+    python benchmarks/load_test.py --url http://127.0.0.1:8000   # 이미 실행 중인 서버
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 시나리오 이름: 기본 가중치 (분석 요청 1건당 조회/다운로드 약 3건)
+DEFAULT_MIX = "upload=2,analyze=1,labels=1,text=1,objects=1,recent=3,user=3,detail=2,data=2,thumbnail=3"
+
+# 저장 없이 분석만 하는 시나리오: (엔드포인트, 요청 매개변수)
+ANALYSIS_SCENARIOS = {
+    "analyze": ("/analyze/", None),
+    "labels": ("/analyze-image/", None),
+    "text": ("/detect-text/", None),
+    "objects": ("/detect-objects/", None),
+}
+SCENARIOS = ("upload", *ANALYSIS_SCENARIOS, "recent", "user", "detail", "data", "thumbnail", "stats")
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def parse_mix(value: str):
+    """
+    "upload=2,recent=3" 형식의 요청 구성을 (시나리오 목록, 가중치 목록)으로 변환합니다.
+    """
+    weights = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"알 수 없는 시나리오입니다: {name} (사용 가능: {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return list(weights), list(weights.values())
+
+def percentile(sorted_values, ratio: float):
+    """
+    정렬된 값에서 백분위수를 반환합니다. (nearest-rank)
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(ratio * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+class ProcessMemory:
+    """
+    /proc에서 서버 프로세스와 하위 프로세스(uvicorn 워커)의 RSS를 읽습니다. (Linux 전용)
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+
+    @staticmethod
+    def _rss_bytes(pid: int):
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+    def _children(self, pid: int):
+        children = []
+        try:
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as handle:
+                    children.extend(int(child) for child in handle.read().split())
+        except OSError:
+            pass
+        return children
+
+    def sample(self):
+        """
+        워커별 RSS(바이트)를 반환합니다. 하위 프로세스가 없으면 서버 프로세스 자신이 워커입니다.
+        """
+        # 멀티프로세싱 자원 추적기 등 uvicorn 워커가 아닌 프로세스는 크기가 작아 그대로 포함
+        workers = self._children(self.pid) or [self.pid]
+        return {pid: rss for pid in workers if (rss := self._rss_bytes(pid)) is not None}
+
+class Backend:
+    """
+    부하 테스트 대상 서버 (데이터베이스와 API 서버 프로세스)
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.processes = []
+        self.temp_dirs = []
+        self.mongo_url = None
+        self.db_name = f"loadtest_{uuid.uuid4().hex[:8]}"
+        self.url = args.url
+        self.server = None
+        self.mode = "external" if args.url else None
+
+    def _temp_dir(self, prefix: str):
+        path = tempfile.mkdtemp(prefix=prefix)
+        self.temp_dirs.append(path)
+        return path
+
+    def _start_mongod(self):
+        port = _free_port()
+        mongod = subprocess.Popen(
+            ["mongod", "--dbpath", self._temp_dir("loadtest-mongod-"), "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.processes.append(mongod)
+        self.mongo_url = f"mongodb://127.0.0.1:{port}"
+
+    def _server_env(self):
+        env = dict(os.environ)
+        env.update({
+            "VISION_CLIENT_FACTORY": "benchmarks.stub_vision:create_client",
+            "STUB_VISION_LATENCY_MS": str(self.args.vision_latency_ms),
+            "STUB_VISION_JITTER_MS": str(self.args.vision_jitter_ms),
+            "STUB_VISION_ERROR_RATE": str(self.args.vision_error_rate),
+            "MONGO_DB_NAME": self.db_name,
+            "STORAGE_PATH": self._temp_dir("loadtest-images-"),
+            "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")])),
+        })
+        if self.mongo_url:
+            env["MONGO_URL"] = self.mongo_url
+        env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+        if self.args.workers > 1:
+            env["PROMETHEUS_MULTIPROC_DIR"] = self._temp_dir("loadtest-prometheus-")
+        return env
+
+    def start(self):
+        if self.url:
+            return
+        mode = self.args.mongo
+        if self.args.mongo_url:
+            mode = "url"
+            self.mongo_url = self.args.mongo_url
+        elif mode == "auto":
+            mode = "mongod" if shutil.which("mongod") else "memory"
+
+        port = _free_port()
+        if mode == "memory":
+            if self.args.workers > 1:
+                print("메모리 데이터베이스는 워커 간에 공유할 수 없어 워커 1개로 실행합니다")
+            command = [sys.executable, os.path.join(ROOT, "benchmarks", "inmemory_server.py"), "--port", str(port)]
+        else:
+            if mode == "mongod":
+                self._start_mongod()
+            command = [
+                sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(self.args.workers), "--log-level", "warning", "--no-access-log"
+            ]
+
+        self.mode = mode
+        self.server = subprocess.Popen(command, cwd=ROOT, env=self._server_env())
+        self.processes.append(self.server)
+        self.url = f"http://127.0.0.1:{port}"
+
+    def wait_ready(self, timeout: float):
+        started = time.perf_counter()
+        while time.perf_counter() - started < timeout:
+            if self.server is not None and self.server.poll() is not None:
+                raise RuntimeError("서버 프로세스가 종료되었습니다")
+            try:
+                if httpx.get(f"{self.url}/health/ready", timeout=2).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"{timeout}초 안에 서버가 준비되지 않았습니다")
+
+    def memory(self):
+        return ProcessMemory(self.server.pid).sample() if self.server is not None else {}
+
+    def stop(self):
+        for process in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.mode == "url":
+            from pymongo import MongoClient
+            with MongoClient(self.mongo_url) as client:
+                client.drop_database(self.db_name)
+        for path in self.temp_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+
+class LoadRunner:
+    """
+    정해진 동시 요청 수만큼 가상 사용자를 실행하고 요청별 결과를 기록합니다.
+    """
+
+    def __init__(self, url: str, image: bytes, scenarios, weights, users: int, seed: int):
+        self.url = url
+        self.image = image
+        self.scenarios = scenarios
+        self.weights = weights
+        self.user_ids = [f"loadtest-user-{index}" for index in range(users)]
+        self.image_ids = []
+        self.seed = seed
+
+    async def _request(self, client: httpx.AsyncClient, scenario: str, rng: random.Random):
+        """
+        시나리오 하나를 실행하고 (엔드포인트, 성공 여부)를 반환합니다.
+        """
+        user_id = rng.choice(self.user_ids)
+        if scenario == "upload" or not self.image_ids:
+            response = await client.post(
+                "/analyze-and-save/",
+                params={"user_id": user_id, "category": "loadtest"},
+                files={"file": ("loadtest.jpg", self.image, "image/jpeg")}
+            )
+            if response.status_code == 200:
+                self.image_ids.append(response.json()["image_id"])
+            return "POST /analyze-and-save/", response.status_code == 200
+        if scenario in ANALYSIS_SCENARIOS:
+            path, params = ANALYSIS_SCENARIOS[scenario]
+            response = await client.post(path, params=params, files={"file": ("loadtest.jpg", self.image, "image/jpeg")})
+            return f"POST {path}", response.status_code == 200
+        if scenario == "recent":
+            response = await client.get("/images/recent", params={"limit": 20, "view": "card"})
+            return "GET /images/recent", response.status_code == 200
+        if scenario == "user":
+            response = await client.get(f"/images/user/{user_id}", params={"limit": 20, "view": "card"})
+            return "GET /images/user/{user_id}", response.status_code == 200
+        if scenario == "stats":
+            response = await client.get(f"/stats/user/{user_id}")
+            return "GET /stats/user/{user_id}", response.status_code in (200, 404)
+        if scenario == "data":
+            response = await client.get(f"/images/{rng.choice(self.image_ids)}/data")
+            return "GET /images/{image_id}/data", response.status_code == 200
+        if scenario == "thumbnail":
+            # 브라우저 캐시가 없는 첫 요청 (If-None-Match 없음)
+            response = await client.get(f"/images/{rng.choice(self.image_ids)}/thumbnail")
+            return "GET /images/{image_id}/thumbnail", response.status_code == 200
+        response = await client.get(f"/images/{rng.choice(self.image_ids)}")
+        return "GET /images/{image_id}", response.status_code == 200
+
+    async def _user(self, client, rng, deadline, samples):
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(self.scenarios, self.weights)[0]
+            started = time.perf_counter()
+            try:
+                endpoint, ok = await self._request(client, scenario, rng)
+            except httpx.HTTPError:
+                endpoint, ok = scenario, False
+            samples[endpoint].append((time.perf_counter() - started, ok))
+
+    async def seed_images(self, count: int):
+        """
+        조회 요청에 사용할 이미지를 미리 업로드합니다.
+        """
+        rng = random.Random(self.seed)
+        async with httpx.AsyncClient(base_url=self.url, timeout=60) as client:
+            for _ in range(count):
+                await self._request(client, "upload", rng)
+
+    async def run_level(self, concurrency: int, duration: float, warmup: float):
+        """
+        동시 요청 수 concurrency로 warmup 후 duration초 동안 요청을 보냅니다.
+
+        Returns:
+            (엔드포인트별 [(지연 시간, 성공 여부)] 목록, 측정 시간)
+        """
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=self.url, timeout=60, limits=limits) as client:
+            if warmup > 0:
+                deadline = time.perf_counter() + warmup
+                discarded = defaultdict(list)
+                await asyncio.gather(*(
+                    self._user(client, random.Random(self.seed + index), deadline, discarded) for index in range(concurrency)
+                ))
+
+            samples = defaultdict(list)
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(*(
+                self._user(client, random.Random(self.seed + concurrency * 1000 + index), deadline, samples)
+                for index in range(concurrency)
+            ))
+            return samples, time.perf_counter() - started
+
+def summarize(samples, elapsed: float):
+    """
+    엔드포인트별 요청 수, 오류 수, rps, p50/p99(ms)를 계산합니다. 마지막 행은 전체 합계입니다.
+    """
+    rows = []
+    all_latencies = []
+    total_errors = 0
+    for endpoint in sorted(samples):
+        latencies = sorted(latency for latency, _ in samples[endpoint])
+        errors = sum(1 for _, ok in samples[endpoint] if not ok)
+        all_latencies.extend(latencies)
+        total_errors += errors
+        rows.append({
+            "endpoint": endpoint,
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        })
+    all_latencies.sort()
+    rows.append({
+        "endpoint": "전체",
+        "requests": len(all_latencies),
+        "errors": total_errors,
+        "rps": len(all_latencies) / elapsed,
+        "p50_ms": percentile(all_latencies, 0.50) * 1000,
+        "p99_ms": percentile(all_latencies, 0.99) * 1000,
+    })
+    return rows
+
+def print_level(concurrency: int, rows, memory):
+    print(f"\n### 동시 요청 {concurrency}\n")
+    print("| 엔드포인트 | 요청 | 오류 | rps | p50 (ms) | p99 (ms) |")
+    print("|---|---:|---:|---:|---:|---:|")
+    for row in rows:
+        print(f"| {row['endpoint']} | {row['requests']} | {row['errors']} | {row['rps']:.1f} | {row['p50_ms']:.1f} | {row['p99_ms']:.1f} |")
+    if memory:
+        sizes = sorted(memory.values())
+        print(f"\n워커 {len(sizes)}개 RSS: 최대 {sizes[-1] / 2**20:.0f}MB, 합계 {sum(sizes) / 2**20:.0f}MB")
+
+async def run(args, backend: Backend):
+    scenarios, weights = args.mix
+    with open(args.image, "rb") as image_file:
+        image = image_file.read()
+
+    runner = LoadRunner(backend.url, image, scenarios, weights, args.users, args.seed)
+    await runner.seed_images(args.seed_images)
+
+    print(f"# 부하 테스트 ({backend.mode}, Vision 지연 {args.vision_latency_ms}±{args.vision_jitter_ms}ms, "
+          f"오류율 {args.vision_error_rate}, 구성 {', '.join(f'{s}={w:g}' for s, w in zip(scenarios, weights))})")
+
+    results = []
+    for concurrency in args.levels:
+        samples, elapsed = await runner.run_level(concurrency, args.duration, args.warmup)
+        rows = summarize(samples, elapsed)
+        memory = backend.memory()
+        print_level(concurrency, rows, memory)
+        results.append({
+            "concurrency": concurrency,
+            "elapsed": elapsed,
+            "endpoints": rows,
+            "worker_rss_bytes": list(memory.values())
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 부하 테스트")
+    parser.add_argument("--url", help="이미 실행 중인 서버 주소 (지정 시 서버를 시작하지 않음)")
+    parser.add_argument("--mongo", choices=["auto", "mongod", "memory"], default="auto", help="데이터베이스 (기본값: auto)")
+    parser.add_argument("--mongo-url", help="사용할 MongoDB 주소 (임시 데이터베이스를 만든 뒤 삭제)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 워커 수")
+    parser.add_argument("--levels", type=lambda value: [int(level) for level in value.split(",")], default=[1, 4, 16, 64],
+                        help="단계별 동시 요청 수 (기본값: 1,4,16,64)")
+    parser.add_argument("--duration", type=float, default=20, help="단계별 측정 시간 (초)")
+    parser.add_argument("--warmup", type=float, default=3, help="단계별 예열 시간 (초, 측정에서 제외)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"시나리오 가중치 (기본값: {DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=50, help="가상 사용자 ID 수")
+    parser.add_argument("--seed-images", type=int, default=20, help="측정 전에 업로드할 이미지 수")
+    parser.add_argument("--image", default=os.path.join(ROOT, "samples", "objects.jpg"), help="업로드할 이미지 파일")
+    parser.add_argument("--vision-latency-ms", type=float, default=150, help="Vision 호출당 평균 지연 시간")
+    parser.add_argument("--vision-jitter-ms", type=float, default=50, help="Vision 지연 시간 편차")
+    parser.add_argument("--vision-error-rate", type=float, default=0.0, help="Vision 호출 실패 비율 (0~1)")
+    parser.add_argument("--startup-timeout", type=float, default=60, help="서버 준비 대기 시간 (초)")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    backend = Backend(args)
+    try:
+        backend.start()
+        backend.wait_ready(args.startup_timeout)
+        results = asyncio.run(run(args, backend))
+    finally:
+        backend.stop()
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"mode": backend.mode, "workers": args.workers, "levels": results}, output, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+부하 테스트용 Vision API 대체 클라이언트
+
+VISION_CLIENT_FACTORY=benchmarks.stub_vision:create_client 로 지정하면
+Vision API를 호출하지 않고 고정된 결과를 지연 시간과 함께 반환합니다.
+
+- STUB_VISION_LATENCY_MS: 호출당 평균 지연 시간 (기본값: 150)
+- STUB_VISION_JITTER_MS: 지연 시간 편차 (균등 분포, 기본값: 50)
+- STUB_VISION_ERROR_RATE: 호출 실패 비율 (0~1, 기본값: 0)
+"""
+
+import os
+import random
+import time
+from types import SimpleNamespace
+
+LABELS = [
+    ("Plastic bottle", 0.95), ("Bottle", 0.93), ("Drinking water", 0.88), ("Paper", 0.81),
+    ("Cardboard", 0.77), ("Tin can", 0.74), ("Packaging and labeling", 0.61), ("Aluminium", 0.58)
+]
+OBJECTS = [("Bottle", 0.91), ("Tin can", 0.83), ("Box", 0.72)]
+
+class StubVisionError(Exception):
+    pass
+
+class StubVisionClient:
+    """
+    ImageAnnotatorClient와 같은 메서드를 가진 대체 클라이언트
+    """
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    def _wait(self):
+        delay = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms))
+        time.sleep(delay / 1000)
+        if random.random() < self.error_rate:
+            raise StubVisionError("stub vision error")
+
+    @staticmethod
+    def _labels():
+        return [SimpleNamespace(description=description, score=score) for description, score in LABELS]
+
+    @staticmethod
+    def _objects():
+        vertices = [SimpleNamespace(x=x, y=y) for x, y in ((0.1, 0.1), (0.9, 0.1), (0.9, 0.9), (0.1, 0.9))]
+        return [
+            SimpleNamespace(name=name, score=score, bounding_poly=SimpleNamespace(normalized_vertices=vertices))
+            for name, score in OBJECTS
+        ]
+
+    @staticmethod
+    def _texts():
+        return [
+            SimpleNamespace(description="PET 1", locale="en"),
+            SimpleNamespace(description="PET", locale="en"),
+            SimpleNamespace(description="1", locale="en")
+        ]
+
+    def label_detection(self, image=None, **kwargs):
+        self._wait()
+        return SimpleNamespace(label_annotations=self._labels())
+
+    def object_localization(self, image=None, **kwargs):
+        self._wait()
+        return SimpleNamespace(localized_object_annotations=self._objects())
+
+    def text_detection(self, image=None, **kwargs):
+        self._wait()
+        return SimpleNamespace(text_annotations=self._texts())
+
+    def annotate_image(self, request, **kwargs):
+        # 여러 기능을 요청해도 호출 한 번의 지연 시간만 적용
+        self._wait()
+        return SimpleNamespace(
+            label_annotations=self._labels(),
+            localized_object_annotations=self._objects(),
+            text_annotations=self._texts(),
+            error=SimpleNamespace(message="")
+        )
+
+def create_client():
+    return StubVisionClient(
+        latency_ms=float(os.getenv("STUB_VISION_LATENCY_MS", "150")),
+        jitter_ms=float(os.getenv("STUB_VISION_JITTER_MS", "50")),
+        error_rate=float(os.getenv("STUB_VISION_ERROR_RATE", "0"))
+    )
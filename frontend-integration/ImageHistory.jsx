@@ -6,7 +6,7 @@
 
 import { useState, useEffect } from 'react';
 import Link from 'next/link';
-import { getRecentImages, getImageUrl } from './camera-integration';
+import { getRecentImages, getThumbnailUrl } from './camera-integration';
 
 export default function ImageHistory() {
   const [recentImages, setRecentImages] = useState([]);
@@ -52,7 +52,7 @@ export default function ImageHistory() {
                 <a>
                   <div className="image-thumbnail">
                     <img 
-                      src={getImageUrl(image.image_id)} 
+                      src={getThumbnailUrl(image.image_id)} 
                       alt={image.filename} 
                       className="thumbnail"
                     />
@@ -99,6 +99,16 @@ export function getImageUrl(imageId) {
   return `${API_BASE_URL}/images/${imageId}/data`;
 }
 
+/**
+ * 썸네일 URL을 생성하는 함수
+ * @param {string} imageId - 이미지 ID
+ * @param {number} size - 썸네일 크기 (긴 변 기준 픽셀, 기본값: 160)
+ * @returns {string} 썸네일 URL
+ */
+export function getThumbnailUrl(imageId, size = 160) {
+  return `${API_BASE_URL}/images/${imageId}/thumbnail?size=${size}`;
+}
+
 /**
  * 한국어 재질 이름 변환 함수
  * @param {string} materialType - 재질 유형
@@ -1,5 +1,7 @@
 import uvicorn
 import os
+import shutil
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -9,6 +11,71 @@ load_dotenv()
 host = os.getenv("API_HOST", "127.0.0.1")
 port = int(os.getenv("API_PORT", "8001"))
 
+# 실행 모드 (development: 코드 변경 시 자동 재시작, production: 다중 워커)
+mode = "production" if "--production" in sys.argv[1:] else os.getenv("API_MODE", "development")
+
+def available_cpus():
+    """
+    이 프로세스가 사용할 수 있는 CPU 수를 반환합니다. (컨테이너 CPU 제한 반영)
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def optional_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+def has_module(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+def production_options():
+    """
+    운영 환경용 uvicorn 설정을 환경 변수에서 읽습니다.
+
+    - API_WORKERS: 워커 프로세스 수 (기본값: 사용 가능한 CPU 수)
+    - API_KEEPALIVE: keep-alive 연결 유지 시간 (초, 기본값: 30)
+    - API_BACKLOG: 대기 중인 연결 최대 수 (기본값: 2048)
+    - API_LIMIT_CONCURRENCY: 워커당 동시 연결 최대 수, 초과 시 503 (기본값: 제한 없음)
+    - API_LIMIT_MAX_REQUESTS: 워커 재시작 전 처리할 요청 수 (기본값: 제한 없음)
+    - API_GRACEFUL_TIMEOUT: 종료 시 처리 중인 요청을 기다리는 시간 (초, 기본값: 30)
+    """
+    return {
+        "workers": int(os.getenv("API_WORKERS", str(available_cpus()))),
+        # uvloop/httptools가 설치되어 있으면 사용 (fastapi[standard]에 포함)
+        "loop": "uvloop" if has_module("uvloop") else "asyncio",
+        "http": "httptools" if has_module("httptools") else "h11",
+        "timeout_keep_alive": int(os.getenv("API_KEEPALIVE", "30")),
+        "backlog": int(os.getenv("API_BACKLOG", "2048")),
+        "limit_concurrency": optional_int("API_LIMIT_CONCURRENCY"),
+        "limit_max_requests": optional_int("API_LIMIT_MAX_REQUESTS"),
+        "timeout_graceful_shutdown": int(os.getenv("API_GRACEFUL_TIMEOUT", "30")),
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "*"),
+        "access_log": os.getenv("API_ACCESS_LOG", "false").lower() == "true",
+    }
+
 if __name__ == "__main__":
-    print(f"Starting Carbon Neutral Vision API server at http://{host}:{port}")
-    uvicorn.run("app.main:app", host=host, port=port, reload=True)
\ No newline at end of file
+    if mode == "production":
+        # 워커가 요청을 받기 전에 Vision 클라이언트까지 준비하도록 설정
+        os.environ.setdefault("VISION_WARMUP", "true")
+        # 워커마다 MongoDB 연결을 미리 열어 두어 첫 요청들이 연결 생성을 기다리지 않도록 설정
+        # (비동기/동기 클라이언트 각각 적용되므로 워커당 최대 2배의 연결을 유지)
+        os.environ.setdefault("MONGO_MIN_POOL_SIZE", "10")
+        # 워커 간 Prometheus 지표 공유 디렉터리 초기화 (이전 실행의 지표 파일 제거)
+        multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+        if multiproc_dir:
+            shutil.rmtree(multiproc_dir, ignore_errors=True)
+            os.makedirs(multiproc_dir)
+        options = production_options()
+        print(f"Starting Carbon Neutral Vision API server at http://{host}:{port} "
+              f"(production, {options['workers']} workers, {options['loop']}/{options['http']})")
+        uvicorn.run("app.main:app", host=host, port=port, **options)
+    else:
+        print(f"Starting Carbon Neutral Vision API server at http://{host}:{port}")
+        uvicorn.run("app.main:app", host=host, port=port, reload=True)
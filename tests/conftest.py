@@ -0,0 +1,84 @@
+"""
+API 테스트 공통 설정
+
+외부 서비스 없이 실행할 수 있도록 MongoDB는 mongomock-motor 메모리 데이터베이스
+(benchmarks/inmemory_server.py), Vision API는 대체 클라이언트(benchmarks/stub_vision.py)를 사용합니다.
+
+사용법 (저장소 루트에서):
+    pip install -r tests/requirements.txt
+    python -m pytest
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app 모듈을 가져오기 전에 설정 (모듈 로드 시 환경 변수를 읽음)
+os.environ.update({
+    "VISION_CLIENT_FACTORY": "benchmarks.stub_vision:create_client",
+    "STUB_VISION_LATENCY_MS": "0",
+    "STUB_VISION_JITTER_MS": "0",
+    "STUB_VISION_ERROR_RATE": "0",
+    "STORAGE_BACKEND": "filesystem",
+    "STORAGE_PATH": tempfile.mkdtemp(prefix="tests-images-"),
+    "TRACING_EXPORTER": "none",
+    "MONGO_MONITORING_ENABLED": "false",
+})
+os.environ.pop("REDIS_URL", None)
+os.environ.pop("PROFILING_TOKEN", None)
+os.environ.pop("PROFILING_SAMPLE_RATE", None)
+
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.inmemory_server import connect_in_memory_database
+from app import cache, database, jobs, storage
+from app.main import app
+
+SAMPLE_IMAGE = os.path.join(ROOT, "samples", "objects.jpg")
+
+@pytest.fixture
+def image_bytes():
+    with open(SAMPLE_IMAGE, "rb") as image_file:
+        return image_file.read()
+
+@pytest.fixture
+def storage_dir(tmp_path, monkeypatch):
+    """
+    테스트마다 빈 디렉터리를 이미지 저장소로 사용합니다.
+    """
+    monkeypatch.setattr(storage, "STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(storage, "_backends", {})
+    return tmp_path
+
+@pytest.fixture
+def client(storage_dir, monkeypatch):
+    """
+    빈 메모리 데이터베이스에 연결한 API 테스트 클라이언트
+    """
+    connect_in_memory_database()
+    # asyncio.Queue는 처음 사용한 이벤트 루프에 묶이므로 테스트 클라이언트마다 새 큐를 사용
+    monkeypatch.setattr(jobs, "job_queue", jobs.JobQueue(jobs.JOB_WORKERS, jobs.JOB_QUEUE_SIZE))
+    cache.image_cache.local.clear()
+    cache.analysis_cache.local.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def db(client):
+    """
+    테스트 클라이언트와 같은 메모리 데이터베이스 (동기 API)
+    """
+    return database.sync_db
+
+def stored_files(directory):
+    """
+    저장소 디렉터리에 남아 있는 파일 목록을 반환합니다.
+    """
+    return sorted(
+        os.path.join(path, name)
+        for path, _, names in os.walk(directory)
+        for name in names
+    )
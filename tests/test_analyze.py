@@ -0,0 +1,76 @@
+"""
+/analyze/ 통합 분석과 Vision 엔드포인트 테스트
+"""
+
+import asyncio
+import pytest
+from prometheus_client import REGISTRY
+from app import vision_api
+
+def vision_calls(feature):
+    return REGISTRY.get_sample_value("vision_api_calls_total", {"feature": feature}) or 0
+
+def test_single_vision_request_is_counted_per_feature(client, image_bytes):
+    features = ("label_detection", "object_localization", "text_detection")
+    before = {feature: vision_calls(feature) for feature in features}
+
+    response = client.post("/analyze/", files={"file": ("objects.jpg", image_bytes, "image/jpeg")})
+
+    assert response.status_code == 200
+    assert sorted(response.json()["vision_features"]) == sorted(features)
+    assert {feature: vision_calls(feature) - before[feature] for feature in features} == dict.fromkeys(features, 1)
+
+def test_selected_analyses_request_only_needed_features(client, image_bytes):
+    before = vision_calls("text_detection")
+
+    response = client.post(
+        "/analyze/", params={"analyses": "labels,recycling"},
+        files={"file": ("objects.jpg", image_bytes, "image/jpeg")}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(body["vision_features"]) == ["label_detection", "object_localization"]
+    assert "recycling_analysis" in body
+    assert vision_calls("text_detection") == before
+
+def test_unknown_analysis_is_rejected(client, image_bytes):
+    response = client.post(
+        "/analyze/", params={"analyses": "labels,colors"},
+        files={"file": ("objects.jpg", image_bytes, "image/jpeg")}
+    )
+
+    assert response.status_code == 400
+
+class LoopCheckingClient:
+    """
+    Vision RPC가 이벤트 루프 스레드에서 호출되었는지 기록하는 클라이언트
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.calls_on_loop = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def call(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                self.calls_on_loop.append(name)
+            except RuntimeError:
+                pass
+            return method(*args, **kwargs)
+        return call
+
+@pytest.mark.parametrize("path", [
+    "/analyze-image/", "/detect-text/", "/detect-objects/", "/analyze-carbon-footprint/", "/analyze-recycling/"
+])
+def test_vision_calls_run_off_the_event_loop(client, image_bytes, monkeypatch, path):
+    checking_client = LoopCheckingClient(vision_api.get_client())
+    monkeypatch.setattr(vision_api, "_client", checking_client)
+
+    response = client.post(path, files={"file": ("objects.jpg", image_bytes, "image/jpeg")})
+
+    assert response.status_code == 200
+    assert checking_client.calls_on_loop == []
@@ -0,0 +1,110 @@
+"""
+/analyze-and-save/의 동시 저장/분석과 실패 시 정리 테스트
+"""
+
+import time
+from fastapi import HTTPException
+from app import image_service
+from conftest import stored_files
+
+def upload(client, image_bytes, **params):
+    return client.post(
+        "/analyze-and-save/",
+        params=params,
+        files={"file": ("objects.jpg", image_bytes, "image/jpeg")}
+    )
+
+def test_saves_image_and_analysis(client, db, storage_dir, image_bytes):
+    response = upload(client, image_bytes, user_id="u1", category="bottle")
+
+    assert response.status_code == 200
+    image_id = response.json()["image_id"]
+    image_doc = db.images.find_one({"image_id": image_id})
+    assert image_doc["user_id"] == "u1"
+    assert db.analyses.count_documents({"image_id": image_id}) == 1
+    assert any(path.endswith(image_doc["file_id"]) for path in stored_files(storage_dir))
+
+def test_vision_failure_leaves_nothing_behind(client, db, storage_dir, image_bytes, monkeypatch):
+    async def failing(content):
+        raise HTTPException(status_code=500, detail="Vision 오류")
+
+    monkeypatch.setattr(image_service, "analyze_image_with_vision", failing)
+
+    response = upload(client, image_bytes, user_id="u1")
+
+    assert response.status_code == 500
+    assert db.images.count_documents({}) == 0
+    assert db.analyses.count_documents({}) == 0
+    assert stored_files(storage_dir) == []
+
+def test_document_insert_failure_removes_blob_and_documents(client, db, storage_dir, image_bytes, monkeypatch):
+    async def failing(analysis_doc):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(image_service, "_insert_analysis_doc", failing)
+
+    response = upload(client, image_bytes, user_id="u1")
+
+    assert response.status_code == 500
+    assert db.images.count_documents({}) == 0
+    assert db.analyses.count_documents({}) == 0
+    assert stored_files(storage_dir) == []
+
+def test_async_mode_rejects_full_queue_before_storing(client, db, storage_dir, image_bytes, monkeypatch):
+    from app import jobs
+
+    # 다른 요청들이 큐 자리를 모두 예약한 상태
+    monkeypatch.setattr(jobs.job_queue, "reserved", jobs.job_queue.queue.maxsize)
+
+    response = upload(client, image_bytes, user_id="u1", async_mode="true")
+
+    assert response.status_code == 503
+    assert db.images.count_documents({}) == 0
+    assert db.jobs.count_documents({}) == 0
+    assert stored_files(storage_dir) == []
+
+def test_async_job_analyzes_stored_image(client, db, image_bytes):
+    response = upload(client, image_bytes, user_id="u1", async_mode="true")
+
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    deadline = time.monotonic() + 10
+    while (job := client.get(f"/jobs/{job_id}").json())["status"] not in ("completed", "failed"):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+    assert job["status"] == "completed"
+    assert db.analyses.count_documents({"image_id": response.json()["image_id"]}) == 1
+
+def test_stores_and_serves_sniffed_content_type(client, db, image_bytes):
+    # 클라이언트가 보낸 형식 대신 파일 시그니처로 판별한 형식을 저장
+    response = client.post(
+        "/analyze-and-save/",
+        files={"file": ("objects.jpg", image_bytes, "text/html")}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["content_type"] == "image/jpeg"
+    image_id = response.json()["image_id"]
+    assert db.images.find_one({"image_id": image_id})["content_type"] == "image/jpeg"
+
+    data = client.get(f"/images/{image_id}/data")
+
+    assert data.status_code == 200
+    assert data.headers["content-type"] == "image/jpeg"
+    assert data.headers["x-content-type-options"] == "nosniff"
+    assert data.content == image_bytes
+
+def test_after_save_failure_still_returns_saved_result(client, db, storage_dir, image_bytes, monkeypatch):
+    async def failing(analysis_doc):
+        raise RuntimeError("stats update failed")
+
+    monkeypatch.setattr(image_service, "_analysis_doc_saved", failing)
+
+    response = upload(client, image_bytes, user_id="u1")
+
+    # 문서는 이미 저장되었으므로 실패로 응답하거나 저장한 데이터를 삭제하지 않음
+    assert response.status_code == 200
+    image_id = response.json()["image_id"]
+    assert db.images.count_documents({"image_id": image_id}) == 1
+    assert db.analyses.count_documents({"image_id": image_id}) == 1
@@ -0,0 +1,45 @@
+"""
+응답 압축과 Vary 헤더 테스트
+"""
+
+from datetime import datetime
+from app import compression
+
+def insert_images(db, count):
+    db.images.insert_many([
+        {"image_id": f"image-{index:03d}", "filename": f"{index}.jpg", "content_type": "image/jpeg",
+         "user_id": "u1", "category": "test", "created_at": datetime(2024, 5, 1, 12, 0, index)}
+        for index in range(count)
+    ])
+
+def vary(response):
+    return [value.strip() for value in response.headers.get("vary", "").split(",")]
+
+def test_large_json_response_is_compressed(client, db):
+    insert_images(db, 50)
+
+    response = client.get("/images/recent", params={"limit": 50}, headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert vary(response).count("Accept-Encoding") == 1
+
+def test_uncompressed_responses_still_vary_on_accept_encoding(client, db):
+    insert_images(db, 50)
+
+    # 압축을 지원하지 않는 클라이언트
+    identity = client.get("/images/recent", params={"limit": 50}, headers={"Accept-Encoding": "identity"})
+    # COMPRESSION_MIN_SIZE보다 작은 응답
+    small = client.get("/images/recent", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+
+    for response in (identity, small):
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert "Accept-Encoding" in vary(response)
+    assert len(small.content) < compression.COMPRESSION_MIN_SIZE
+
+def test_existing_vary_is_kept():
+    headers = compression._vary_accept_encoding([(b"content-type", b"application/json"), (b"vary", b"Accept")])
+
+    assert headers == [(b"content-type", b"application/json"), (b"vary", b"Accept, Accept-Encoding")]
+    assert compression._vary_accept_encoding(headers) == headers
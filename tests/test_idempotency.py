@@ -0,0 +1,133 @@
+"""
+/analyze-and-save/의 Idempotency-Key 처리 테스트
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+from fastapi import HTTPException
+from app import image_service
+
+def upload(client, image_bytes, key, **params):
+    return client.post(
+        "/analyze-and-save/",
+        params=params,
+        files={"file": ("objects.jpg", image_bytes, "image/jpeg")},
+        headers={"Idempotency-Key": key}
+    )
+
+def test_retry_replays_first_response(client, db, image_bytes):
+    first = upload(client, image_bytes, "key-replay", user_id="u1")
+    second = upload(client, image_bytes, "key-replay", user_id="u1")
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    # 재시도는 이미지를 다시 저장하거나 분석하지 않음
+    assert db.images.count_documents({}) == 1
+    assert db.analyses.count_documents({}) == 1
+
+def test_same_key_with_different_request_is_rejected(client, db, image_bytes):
+    assert upload(client, image_bytes, "key-conflict", user_id="u1").status_code == 200
+
+    response = upload(client, image_bytes, "key-conflict", user_id="u2")
+
+    assert response.status_code == 422
+    assert db.images.count_documents({}) == 1
+
+def test_key_is_released_after_failure(client, db, image_bytes, monkeypatch):
+    original = image_service.analyze_and_save_image
+
+    async def failing(*args, **kwargs):
+        raise HTTPException(status_code=500, detail="분석 실패")
+
+    monkeypatch.setattr(image_service, "analyze_and_save_image", failing)
+    assert upload(client, image_bytes, "key-failure", user_id="u1").status_code == 500
+    assert db.idempotency_keys.count_documents({"key": "key-failure"}) == 0
+
+    # 실패한 요청의 키는 재사용되지 않고 재시도가 처음부터 처리됨
+    monkeypatch.setattr(image_service, "analyze_and_save_image", original)
+    response = upload(client, image_bytes, "key-failure", user_id="u1")
+
+    assert response.status_code == 200
+    assert "idempotent-replayed" not in response.headers
+    assert db.idempotency_keys.find_one({"key": "key-failure"})["status"] == "completed"
+
+def test_retry_waits_for_request_in_flight(client, db, image_bytes, monkeypatch):
+    original = image_service.analyze_and_save_image
+    release_first = threading.Event()
+
+    async def slow(*args, **kwargs):
+        await asyncio.to_thread(release_first.wait, 10)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(image_service, "analyze_and_save_image", slow)
+
+    responses = {}
+    first = threading.Thread(target=lambda: responses.setdefault("first", upload(client, image_bytes, "key-inflight")))
+    first.start()
+    deadline = time.monotonic() + 10
+    while db.idempotency_keys.count_documents({"key": "key-inflight"}) == 0:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    second = threading.Thread(target=lambda: responses.setdefault("second", upload(client, image_bytes, "key-inflight")))
+    second.start()
+    time.sleep(0.3)
+    # 처음 요청이 끝나기 전에는 재시도도 응답하지 않음
+    assert "second" not in responses
+
+    release_first.set()
+    first.join(10)
+    second.join(10)
+
+    assert responses["first"].status_code == 200
+    assert responses["second"].status_code == 200
+    assert responses["second"].headers["idempotent-replayed"] == "true"
+    assert responses["second"].json()["image_id"] == responses["first"].json()["image_id"]
+    assert db.images.count_documents({}) == 1
+
+def test_replayed_async_response_keeps_location(client, db, image_bytes):
+    first = upload(client, image_bytes, "key-async", user_id="u1", async_mode="true")
+    second = upload(client, image_bytes, "key-async", user_id="u1", async_mode="true")
+
+    assert first.status_code == 202
+    assert second.status_code == 202
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.headers["location"] == first.headers["location"] == first.json()["status_url"]
+
+def test_expired_owner_cannot_overwrite_taken_over_key(client, db, image_bytes, monkeypatch):
+    original = image_service.analyze_and_save_image
+    release_first = threading.Event()
+
+    async def slow(*args, **kwargs):
+        await asyncio.to_thread(release_first.wait, 10)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(image_service, "analyze_and_save_image", slow)
+
+    responses = {}
+    first = threading.Thread(target=lambda: responses.setdefault("first", upload(client, image_bytes, "key-takeover")))
+    first.start()
+    deadline = time.monotonic() + 10
+    while db.idempotency_keys.count_documents({"key": "key-takeover"}) == 0:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    # 처음 요청의 잠금이 만료되어 재시도가 이어받아 처리를 마침
+    db.idempotency_keys.update_one({"key": "key-takeover"}, {"$set": {"lock_expires_at": datetime(2000, 1, 1)}})
+    monkeypatch.setattr(image_service, "analyze_and_save_image", original)
+    second = upload(client, image_bytes, "key-takeover")
+    assert second.status_code == 200
+
+    # 뒤늦게 끝난 처음 요청은 재시도가 저장한 결과를 덮어쓰지 않음
+    release_first.set()
+    first.join(10)
+
+    assert responses["first"].status_code == 200
+    record = db.idempotency_keys.find_one({"key": "key-takeover"})
+    assert record["status"] == "completed"
+    assert record["response"]["image_id"] == second.json()["image_id"]
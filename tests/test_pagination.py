@@ -0,0 +1,67 @@
+"""
+이미지 목록 키셋 페이지 커서 테스트
+"""
+
+from datetime import datetime, timedelta
+
+def insert_images(db, count, user_id="u1"):
+    base = datetime(2024, 5, 1, 12, 0, 0)
+    docs = [
+        {
+            "image_id": f"image-{index:02d}",
+            "filename": f"{index}.jpg",
+            "content_type": "image/jpeg",
+            "user_id": user_id,
+            "category": "test",
+            # 세 건씩 같은 시각으로 저장하여 created_at이 같은 경우의 순서도 확인
+            "created_at": base + timedelta(seconds=index // 3),
+        }
+        for index in range(count)
+    ]
+    db.images.insert_many(docs)
+    return [doc["image_id"] for doc in sorted(docs, key=lambda doc: (doc["created_at"], doc["image_id"]), reverse=True)]
+
+def fetch_all_pages(client, path, limit):
+    image_ids = []
+    pages = 0
+    params = {"limit": limit}
+    while True:
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        image_ids.extend(image["image_id"] for image in response.json())
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return image_ids, pages
+        params = {"limit": limit, "cursor": cursor}
+
+def test_cursor_pages_cover_every_image_once_in_order(client, db):
+    expected = insert_images(db, 10)
+
+    image_ids, pages = fetch_all_pages(client, "/images/recent", 3)
+
+    assert image_ids == expected
+    assert pages == 4
+
+def test_cursor_pages_for_user_images(client, db):
+    expected = insert_images(db, 7, user_id="u1")
+    db.images.insert_one({"image_id": "other", "user_id": "u2", "created_at": datetime(2024, 6, 1)})
+
+    image_ids, _ = fetch_all_pages(client, "/images/user/u1", 2)
+
+    assert image_ids == expected
+
+def test_last_full_page_returns_empty_next_page(client, db):
+    insert_images(db, 4)
+
+    first = client.get("/images/recent", params={"limit": 4})
+    last = client.get("/images/recent", params={"limit": 4, "cursor": first.headers["x-next-cursor"]})
+
+    assert last.status_code == 200
+    assert last.json() == []
+    assert "x-next-cursor" not in last.headers
+
+def test_invalid_cursor_is_rejected(client, db):
+    response = client.get("/images/recent", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
@@ -0,0 +1,45 @@
+"""
+썸네일 생성이 여러 서버에서 겹치는 경우의 테스트
+"""
+
+import time
+from app import cache, thumbnails
+from conftest import stored_files
+
+def upload_with_thumbnails(client, db, image_bytes):
+    response = client.post("/analyze-and-save/", files={"file": ("objects.jpg", image_bytes, "image/jpeg")})
+    image_id = response.json()["image_id"]
+    deadline = time.monotonic() + 10
+    while "thumbnails" not in (image_doc := db.images.find_one({"image_id": image_id})):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    while thumbnails._pending_tasks:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    return image_doc
+
+def test_stale_cached_doc_uses_thumbnails_saved_by_another_server(client, db, storage_dir, image_bytes):
+    image_doc = upload_with_thumbnails(client, db, image_bytes)
+    files = stored_files(storage_dir)
+
+    # 썸네일이 기록되기 전의 문서가 캐시에 남아 있는 상태
+    stale_doc = {key: value for key, value in image_doc.items() if key != "thumbnails"}
+    stale_doc["_id"] = str(stale_doc["_id"])
+    client.portal.call(cache.image_cache.set, image_doc["image_id"], stale_doc)
+
+    response = client.get(f"/images/{image_doc['image_id']}/thumbnail", params={"size": 160})
+
+    assert response.status_code == 200
+    assert stored_files(storage_dir) == files
+    assert db.images.find_one({"image_id": image_doc["image_id"]})["thumbnails"] == image_doc["thumbnails"]
+
+def test_concurrent_generation_keeps_first_thumbnails(client, db, storage_dir, image_bytes):
+    image_doc = upload_with_thumbnails(client, db, image_bytes)
+    files = stored_files(storage_dir)
+
+    # 다른 서버가 먼저 기록한 뒤 늦게 끝난 생성 작업
+    file_ids = client.portal.call(thumbnails.generate_thumbnails, image_doc, image_bytes)
+
+    assert file_ids == {int(size): file_id for size, file_id in image_doc["thumbnails"].items()}
+    assert db.images.find_one({"image_id": image_doc["image_id"]})["thumbnails"] == image_doc["thumbnails"]
+    assert stored_files(storage_dir) == files